@@ -9,5 +9,6 @@ from .module_registry import ModuleRegistry
 from .event_bus import EventBus
 from .hooks import HookManager
 from .config import ConfigManager
+from .instrumentation import DispatchInstrumentation
 
-__all__ = ['Engine', 'ModuleRegistry', 'EventBus', 'HookManager', 'ConfigManager']
+__all__ = ['Engine', 'ModuleRegistry', 'EventBus', 'HookManager', 'ConfigManager', 'DispatchInstrumentation']
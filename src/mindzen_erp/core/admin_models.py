@@ -8,6 +8,7 @@ from mindzen_erp.core.orm import BaseModel
 class Currency(BaseModel):
     """Currency Master"""
     __tablename__ = 'currencies'
+    __cacheable__ = True
     
     name = Column(String(100), nullable=False)
     code = Column(String(10), unique=True, nullable=False) # e.g. SAR, USD
@@ -28,6 +29,7 @@ class Country(BaseModel):
 class FinancialYear(BaseModel):
     """Financial Year Master"""
     __tablename__ = 'financial_years'
+    __cacheable__ = True
     
     name = Column(String(100), nullable=False) # e.g. "FL 2024-25"
     start_date = Column(Date, nullable=False)
@@ -0,0 +1,198 @@
+"""
+Model Cache - In-process read-through cache for master data
+
+Bounded LRU caches with TTL for rarely-changing master models
+(products, UOMs, customers, ...). Entries are invalidated when
+BaseModel writes are announced on the event bus.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event published for every committed BaseModel write
+RECORD_CHANGED_EVENT = 'orm.record.changed'
+
+# Sentinel for "not in cache" (None is a valid cached value)
+MISSING = object()
+
+
+class ModelCache:
+    """
+    Thread-safe LRU cache with per-entry TTL for one model.
+
+    Keys are ('id', pk) for single records and ('query', ...) tuples for
+    cached result lists. Values are plain column dictionaries, never live
+    ORM instances, so cached state cannot be mutated by callers.
+    """
+
+    def __init__(self, name: str, max_size: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a load that started before one must not be stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """
+        Store value under key, evicting the least recently used entries.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            generation: The cache generation read before the value was
+                loaded; if an invalidation happened since, the value may be
+                stale and is not stored
+
+        Returns:
+            True if the value was stored
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Drop entries affected by a write.
+
+        Args:
+            ids: Changed primary keys, or None when any row may have changed
+        """
+        with self._lock:
+            self.invalidations += 1
+            self.generation += 1
+            if ids is None:
+                self._entries.clear()
+                return
+
+            for record_id in ids:
+                self._entries.pop(('id', record_id), None)
+            # Any cached result list may contain (or now match) the changed rows
+            for key in [k for k in self._entries if k[0] != 'id']:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for this cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+class CacheManager:
+    """
+    Registry of model caches, keyed by table name.
+
+    Once bound to the engine's event bus, caches are invalidated by
+    'orm.record.changed' events; before that, writes invalidate directly.
+
+    Example:
+        CacheManager().bind(engine.events)
+        CacheManager().stats()  # {'products': {'hits': ..., 'misses': ...}}
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._caches = {}
+            cls._instance._lock = threading.Lock()
+            cls._instance.event_bus = None
+        return cls._instance
+
+    def get_cache(self, name: str, max_size: int = 1024, ttl: float = 300.0) -> ModelCache:
+        """Get or create the cache for a table"""
+        cache = self._caches.get(name)
+        if cache is None:
+            with self._lock:
+                cache = self._caches.setdefault(name, ModelCache(name, max_size, ttl))
+        return cache
+
+    def bind(self, event_bus) -> None:
+        """Receive invalidations through the given event bus"""
+        if self.event_bus is event_bus:
+            return
+        if self.event_bus is not None:
+            self.event_bus.unsubscribe(RECORD_CHANGED_EVENT, self._on_record_changed)
+
+        self.event_bus = event_bus
+        event_bus.subscribe(RECORD_CHANGED_EVENT, self._on_record_changed)
+        logger.debug("Model cache bound to event bus")
+
+    def record_changed(self, table: str, ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Announce a committed write to a table.
+
+        Args:
+            table: Table name of the changed model
+            ids: Changed primary keys, or None if unknown
+        """
+        data = {'model': table, 'ids': list(ids) if ids is not None else None}
+        if self.event_bus is not None:
+            self.event_bus.publish(RECORD_CHANGED_EVENT, data)
+        else:
+            self._on_record_changed(data)
+
+    def _on_record_changed(self, data: Dict[str, Any]) -> None:
+        cache = self._caches.get(data['model'])
+        if cache is not None:
+            cache.invalidate(data.get('ids'))
+
+    def clear(self) -> None:
+        """Empty every cache"""
+        for cache in list(self._caches.values()):
+            cache.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get hit/miss counters for every cache"""
+        return {name: cache.stats() for name, cache in list(self._caches.items())}
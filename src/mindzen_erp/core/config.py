@@ -35,11 +35,67 @@ class ConfigManager:
             'debug': True,
             'database': {
                 'type': 'sqlite',
-                'path': 'mindzen_erp.db'
+                'path': 'mindzen_erp.db',
+                # Connection pool (ignored for in-memory SQLite)
+                'pool_size': 5,
+                'max_overflow': 10,
+                'pool_timeout': 30,
+                'pool_recycle': 1800,
+                'pool_pre_ping': True,
+                # PostgreSQL only; None disables
+                'statement_timeout_ms': None,
+                # Log a warning when a connection checkout waits this long
+                'slow_pool_wait_ms': 500
+            },
+            'sequences': {
+                # Document numbers each worker reserves per database round trip
+                'block_size': 20
+            },
+            'inventory': {
+                # 'moving_average' or 'fifo'
+                'valuation_method': 'moving_average',
+                # Ledger entries valued per transaction
+                'valuation_batch_size': 5000,
+                # Seconds the repost worker sleeps when its queue is empty
+                'repost_poll_interval': 5,
+                # Seconds a repost stays claimed without progress before another worker may take it over
+                'repost_lease_seconds': 300
+            },
+            'events': {
+                # Pool threads delivering to queued subscribers
+                'max_workers': 4,
+                # Seconds shutdown waits for queued events to be delivered
+                'drain_timeout': 10,
+                # Durable outbox relay: events per claim, idle poll seconds, claim lease seconds
+                'outbox_batch_size': 100,
+                'outbox_poll_interval': 1,
+                'outbox_lease_seconds': 60,
+                # Topics forwarded to the other worker processes through the database;
+                # only needed when more than one worker process serves the app
+                'broadcast_enabled': False,
+                'broadcast_topics': ['orm.record.changed'],
+                'broadcast_poll_interval': 0.2,
+                'broadcast_retention_seconds': 300,
+                # Per-topic and per-callback timings of subscribers and hooks
+                'instrumentation_enabled': False,
+                # Callbacks running at least this long are logged as slow (milliseconds)
+                'slow_callback_ms': 100
+            },
+            'hooks': {
+                # Pool threads running parallel and time-limited hook callbacks
+                'max_workers': 4,
+                # Seconds execute() waits for a callback without its own timeout (None: no limit)
+                'default_timeout': None
             },
             'modules': {
                 'auto_discover': True,
-                'auto_install': []
+                'auto_install': [],
+                # Import module models and controllers when first used instead of at install
+                'lazy_import': True,
+                # Modules whose dependencies are met are installed concurrently by this many threads
+                'install_workers': 4,
+                # Parsed manifest cache file (None: in the system temp directory)
+                'index_cache': None
             },
             'multi_tenant': {
                 'enabled': False,
@@ -5,13 +5,19 @@ Coordinates all core services and manages the application lifecycle.
 """
 
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from .module_registry import ModuleRegistry
 from .event_bus import EventBus
 from .hooks import HookManager
 from .config import ConfigManager
+from .sequence import SequenceService
+from .cache import CacheManager
+from .outbox import OutboxRelay
+from .event_broadcast import EventBroadcaster
+from .instrumentation import DispatchInstrumentation
 
 
 logger = logging.getLogger(__name__)
@@ -46,6 +52,9 @@ class Engine:
         self.modules: Optional[ModuleRegistry] = None
         self.events: Optional[EventBus] = None
         self.hooks: Optional[HookManager] = None
+        self.outbox: Optional[OutboxRelay] = None
+        self.broadcast: Optional[EventBroadcaster] = None
+        self.instrumentation: Optional[DispatchInstrumentation] = None
         
         logger.info("MindZen ERP Engine initialized")
     
@@ -66,12 +75,45 @@ class Engine:
         self.config = ConfigManager(config_path)
         logger.info("Configuration loaded")
         
+        # Subscriber and hook timings, shared by the event bus and hook manager
+        self.instrumentation = DispatchInstrumentation(
+            enabled=self.config.get('events.instrumentation_enabled', False),
+            slow_threshold_ms=self.config.get('events.slow_callback_ms', 100)
+        )
+        
         # Initialize event bus
-        self.events = EventBus()
+        self.events = EventBus(max_workers=self.config.get('events.max_workers', 4),
+                               instrumentation=self.instrumentation)
         logger.info("Event bus initialized")
         
+        # Invalidate model caches through the event bus
+        CacheManager().bind(self.events)
+        
+        # Durable events, relayed to the event bus once committed
+        self.outbox = OutboxRelay(
+            self.events,
+            batch_size=self.config.get('events.outbox_batch_size', 100),
+            poll_interval=self.config.get('events.outbox_poll_interval', 1),
+            lease_seconds=self.config.get('events.outbox_lease_seconds', 60)
+        )
+        
+        # Fan-out of selected events to the other worker processes (started by the app)
+        self.broadcast = EventBroadcaster(
+            self.events,
+            self.config.get('events.broadcast_topics', []),
+            poll_interval=self.config.get('events.broadcast_poll_interval', 0.2),
+            retention_seconds=self.config.get('events.broadcast_retention_seconds', 300)
+        )
+        
+        SequenceService().set_block_size(self.config.get('sequences.block_size', SequenceService.DEFAULT_BLOCK_SIZE))
+        
         # Initialize hook manager
-        self.hooks = HookManager(self.events)
+        self.hooks = HookManager(
+            self.events,
+            self.instrumentation,
+            max_workers=self.config.get('hooks.max_workers', 4),
+            default_timeout=self.config.get('hooks.default_timeout')
+        )
         logger.info("Hook manager initialized")
         
         # Initialize module registry
@@ -107,15 +149,45 @@ class Engine:
         success = self.modules.install(module_name)
         
         if success:
-            # Trigger hook for module installation
-            self.hooks.execute(f"on_module_installed", module_name=module_name)
-            self.events.publish("module.installed", {"module": module_name})
-            logger.info(f"✓ Module '{module_name}' installed successfully")
+            self._module_installed(module_name)
         else:
             logger.error(f"✗ Failed to install module '{module_name}'")
         
         return success
     
+    def install_modules(self, module_names: List[str]) -> Dict[str, bool]:
+        """
+        Install several modules, independent ones concurrently.
+        
+        The dependency order is computed from the manifests first, so a
+        missing module or a dependency cycle fails before anything is
+        installed.
+        
+        Args:
+            module_names: Names of the modules to install
+            
+        Returns:
+            Success per module, dependencies included
+        """
+        if not self._initialized:
+            raise RuntimeError("Engine not initialized. Call initialize() first.")
+        
+        logger.info(f"Installing modules: {', '.join(module_names)}")
+        start = time.perf_counter()
+        results = self.modules.install_many(module_names, on_installed=self._module_installed)
+        
+        failed = [name for name, success in results.items() if not success]
+        if failed:
+            logger.error(f"✗ Failed to install modules: {', '.join(failed)}")
+        logger.info(f"Installed {len(results) - len(failed)} modules in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return results
+    
+    def _module_installed(self, module_name: str) -> None:
+        # Trigger hook for module installation
+        self.hooks.execute("on_module_installed", module_name=module_name)
+        self.events.publish("module.installed", {"module": module_name})
+        logger.info(f"✓ Module '{module_name}' installed successfully")
+    
     def uninstall_module(self, module_name: str) -> bool:
         """
         Uninstall and deactivate a module.
@@ -154,8 +226,19 @@ class Engine:
         if self.modules:
             self.modules.shutdown_all()
         
+        if self.outbox:
+            self.outbox.stop(timeout=self.config.get('events.drain_timeout', 10))
+        
+        if self.broadcast:
+            self.broadcast.stop(timeout=self.config.get('events.drain_timeout', 10))
+        
         if self.events:
             self.events.publish("engine.shutdown", {})
+            # Deliver what queued subscribers still hold before the process exits
+            self.events.shutdown(timeout=self.config.get('events.drain_timeout', 10))
+        
+        if self.hooks:
+            self.hooks.shutdown()
         
         logger.info("✓ Engine shutdown complete")
     
@@ -0,0 +1,313 @@
+"""
+Event Broadcast - Fan selected events out to every worker process
+
+Each worker process has its own EventBus. The broadcaster forwards
+chosen topics (by default the cache invalidation event) through a shared
+database table, so the other workers publish them on their own bus.
+Writes are batched; readers poll the table, and on PostgreSQL they are
+woken by LISTEN/NOTIFY instead of waiting for the next poll.
+"""
+
+import bisect
+import json
+import logging
+import os
+import select as select_module
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, Float, String, Text, delete, func, insert, select, text
+
+from .orm import BaseModel, Database
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL notification channel announcing new broadcast rows
+BROADCAST_CHANNEL = 'mindzen_events'
+
+# Upper bounds (milliseconds) of the publish-to-delivery latency histogram
+LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+# Ids below the newest seen that are read again, for rows committed out of id order
+LOOKBACK_IDS = 100
+
+
+class BroadcastEvent(BaseModel):
+    """An event forwarded to the other worker processes"""
+    __tablename__ = 'event_broadcasts'
+    
+    origin = Column(String(100), nullable=False)
+    topic = Column(String(200), nullable=False)
+    payload = Column(Text)
+    # Epoch seconds at publish, for fan-out latency
+    published_at = Column(Float, nullable=False, index=True)
+
+
+class EventBroadcaster:
+    """
+    Forwards events between the EventBus instances of several processes.
+    
+    Only exact topic names are forwarded. Events received from other
+    processes are published locally and are not forwarded again.
+    
+    Example:
+        broadcaster = EventBroadcaster(engine.events, ['orm.record.changed'])
+        broadcaster.start()
+        broadcaster.stats()  # {'sent': 10, 'received': 12, 'p99_latency_ms': 250, ...}
+    """
+    
+    def __init__(self, event_bus, topics: List[str], poll_interval: float = 0.2, flush_interval: float = 0.05,
+                 batch_size: int = 500, retention_seconds: int = 300):
+        self.event_bus = event_bus
+        self.topics = list(topics)
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retention_seconds = retention_seconds
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        
+        self._callbacks = {topic: self._forwarder(topic) for topic in self.topics}
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_now = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._receiving = threading.local()
+        self._floor = 0
+        self._seen: deque = deque()
+        self._seen_ids: set = set()
+        self._last_purge = 0.0
+        self._reset_stats()
+    
+    def start(self) -> None:
+        """Subscribe to the forwarded topics and start the writer and reader threads"""
+        if self._threads:
+            return
+        
+        table = BroadcastEvent.__table__
+        with Database().session_scope() as session:
+            # Only events published from now on are received
+            self._floor = session.execute(select(func.max(table.c.id))).scalar() or 0
+        
+        for topic, callback in self._callbacks.items():
+            self.event_bus.subscribe(topic, callback)
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._write_loop, name='event-broadcast-writer', daemon=True),
+            threading.Thread(target=self._read_loop, name='event-broadcast-reader', daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Broadcasting events {self.topics} as {self.origin}")
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop forwarding; events still buffered are written first"""
+        if not self._threads:
+            return
+        for topic, callback in self._callbacks.items():
+            self.event_bus.unsubscribe(topic, callback)
+        self._stop.set()
+        self._flush_now.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.flush()
+        logger.info("Event broadcast stopped")
+    
+    def flush(self) -> int:
+        """
+        Write buffered events to the broadcast table; returns the number written.
+        
+        If the write fails the events stay buffered for the next flush.
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        
+        table = BroadcastEvent.__table__
+        try:
+            with Database().get_session() as session:
+                session.execute(insert(table), rows)
+                if session.get_bind().dialect.name == 'postgresql':
+                    # Delivered on commit
+                    session.execute(text("SELECT pg_notify(:channel, '')"), {'channel': BROADCAST_CHANNEL})
+        except Exception:
+            with self._lock:
+                # Ahead of events buffered meanwhile, to keep publish order
+                self._buffer[:0] = rows
+            raise
+        with self._lock:
+            self.sent += len(rows)
+        return len(rows)
+    
+    def poll(self) -> int:
+        """Publish events of other processes that have not been received yet; returns their number"""
+        table = BroadcastEvent.__table__
+        with Database().session_scope() as session:
+            rows = session.execute(
+                select(table.c.id, table.c.origin, table.c.topic, table.c.payload, table.c.published_at)
+                .where(table.c.id > self._floor)
+                .order_by(table.c.id)
+                .limit(self.batch_size + LOOKBACK_IDS)
+            ).all()
+        
+        received = 0
+        for row in rows:
+            if row.id in self._seen_ids:
+                continue
+            self._remember(row.id)
+            if row.origin == self.origin:
+                continue
+            
+            self._record_latency(time.time() - row.published_at)
+            self._receiving.active = True
+            try:
+                self.event_bus.publish(row.topic, json.loads(row.payload) if row.payload else None)
+            finally:
+                self._receiving.active = False
+            received += 1
+        
+        if rows:
+            # Rows with smaller ids may still commit; keep re-reading a short window
+            self._advance_floor(rows[-1].id - LOOKBACK_IDS)
+        return received
+    
+    def stats(self) -> Dict[str, Any]:
+        """Forwarded and received event counts and the fan-out latency histogram"""
+        with self._lock:
+            histogram = {f'le_{bound}': count for bound, count in zip(LATENCY_BUCKETS_MS, self._buckets)}
+            histogram['gt_' + str(LATENCY_BUCKETS_MS[-1])] = self._buckets[-1]
+            return {
+                'origin': self.origin,
+                'topics': self.topics,
+                'sent': self.sent,
+                'received': self.received,
+                'avg_latency_ms': self.total_latency * 1000 / self.received if self.received else 0.0,
+                'max_latency_ms': self.max_latency * 1000,
+                'p99_latency_ms': self._percentile(0.99),
+                'latency_ms': histogram
+            }
+    
+    def reset_stats(self) -> None:
+        """Zero the counters and the latency histogram"""
+        with self._lock:
+            self._reset_stats()
+    
+    def _reset_stats(self) -> None:
+        self._buckets: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.sent = 0
+        self.received = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+    
+    def _forwarder(self, topic: str):
+        def forward(data: Any) -> None:
+            if getattr(self._receiving, 'active', False):
+                return
+            row = {
+                'origin': self.origin,
+                'topic': topic,
+                'payload': json.dumps(data, default=str),
+                'published_at': time.time()
+            }
+            with self._lock:
+                self._buffer.append(row)
+                full = len(self._buffer) >= self.batch_size
+            if full:
+                self._flush_now.set()
+        return forward
+    
+    def _write_loop(self) -> None:
+        while not self._stop.is_set():
+            self._flush_now.wait(self.flush_interval)
+            self._flush_now.clear()
+            try:
+                self.flush()
+                self._purge()
+            except Exception as e:
+                logger.error(f"Event broadcast write failed: {e}")
+    
+    def _read_loop(self) -> None:
+        listener = self._listen()
+        try:
+            while not self._stop.is_set():
+                try:
+                    if self.poll() >= self.batch_size:
+                        continue
+                except Exception as e:
+                    logger.error(f"Event broadcast read failed: {e}")
+                self._wait(listener)
+        finally:
+            if listener is not None:
+                listener.close()
+    
+    def _listen(self):
+        """Dedicated LISTEN connection on PostgreSQL, None elsewhere"""
+        engine = Database().engine
+        if engine.dialect.name != 'postgresql':
+            return None
+        try:
+            connection = engine.raw_connection()
+            connection.detach()
+            connection.driver_connection.autocommit = True
+            with connection.driver_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {BROADCAST_CHANNEL}")
+            return connection
+        except Exception as e:
+            logger.warning(f"LISTEN unavailable, polling every {self.poll_interval}s: {e}")
+            return None
+    
+    def _wait(self, listener) -> None:
+        if listener is None:
+            self._stop.wait(self.poll_interval)
+            return
+        driver = listener.driver_connection
+        if select_module.select([driver], [], [], self.poll_interval)[0]:
+            driver.poll()
+            driver.notifies.clear()
+    
+    def _purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge < self.retention_seconds / 10:
+            return
+        self._last_purge = now
+        # Not delete_where(): its change announcement is itself a forwarded event
+        table = BroadcastEvent.__table__
+        with Database().session_scope() as session:
+            session.execute(delete(table).where(table.c.published_at < now - self.retention_seconds))
+    
+    def _remember(self, event_id: int) -> None:
+        self._seen.append(event_id)
+        self._seen_ids.add(event_id)
+    
+    def _advance_floor(self, floor: int) -> None:
+        if floor <= self._floor:
+            return
+        self._floor = floor
+        while self._seen and self._seen[0] <= floor:
+            self._seen_ids.discard(self._seen.popleft())
+    
+    def _record_latency(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        with self._lock:
+            self._buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+            self.received += 1
+            self.total_latency += seconds
+            if seconds > self.max_latency:
+                self.max_latency = seconds
+    
+    def _percentile(self, fraction: float) -> Optional[float]:
+        """Upper bucket bound below which the given fraction of latencies fall"""
+        if not self.received:
+            return None
+        threshold = fraction * self.received
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self._buckets):
+            seen += count
+            if seen >= threshold:
+                return float(bound)
+        return self.max_latency * 1000
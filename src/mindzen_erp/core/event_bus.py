@@ -4,12 +4,243 @@ Event Bus - Pub/Sub system for module communication
 Allows modules to communicate without tight coupling.
 """
 
+import contextvars
 import logging
-from typing import Dict, List, Callable, Any
-from collections import defaultdict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Callable, Any, Optional, Tuple, Union
+from collections import deque
+
+from .instrumentation import DispatchInstrumentation
 
 logger = logging.getLogger(__name__)
 
+# What a queued subscriber does with an event when its queue is full
+OVERFLOW_BLOCK = 'block'              # publisher waits for room (backpressure)
+OVERFLOW_DROP_NEWEST = 'drop_newest'  # the new event is discarded
+OVERFLOW_DROP_OLDEST = 'drop_oldest'  # the oldest queued event of the same lane is discarded
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST)
+
+# Topic pattern segments: exactly one segment, and any number of segments (including none)
+WILDCARD = '*'
+MULTI_WILDCARD = '**'
+
+
+def is_pattern(event_name: str) -> bool:
+    """True if the event name contains wildcard segments"""
+    return any(segment in (WILDCARD, MULTI_WILDCARD) for segment in event_name.split('.'))
+
+
+class _TrieNode:
+    __slots__ = ('children', 'patterns')
+    
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.patterns: List[str] = []
+
+
+class TopicTrie:
+    """
+    Index of wildcard topic patterns, one trie level per dot-separated segment.
+    
+    Matching a topic walks the trie once per segment, so its cost depends
+    on the topic length, not on the number of patterns.
+    
+    Example:
+        trie.add('sales.**')       # every sales event
+        trie.add('*.lead.created') # lead.created of any module
+        trie.match('sales.order.created')  # ['sales.**']
+    """
+    
+    def __init__(self):
+        self._root = _TrieNode()
+        self._order: Dict[str, int] = {}
+    
+    def add(self, pattern: str) -> None:
+        if pattern in self._order:
+            return
+        node = self._root
+        for segment in pattern.split('.'):
+            node = node.children.setdefault(segment, _TrieNode())
+        node.patterns.append(pattern)
+        self._order[pattern] = len(self._order)
+    
+    def match(self, topic: str) -> List[str]:
+        """Patterns matching a concrete topic, in the order they were added"""
+        found: Dict[str, None] = {}
+        self._match(self._root, topic.split('.'), 0, found)
+        return sorted(found, key=self._order.__getitem__)
+    
+    def __len__(self) -> int:
+        return len(self._order)
+    
+    def _match(self, node: _TrieNode, segments: List[str], index: int, found: Dict[str, None]) -> None:
+        multi = node.children.get(MULTI_WILDCARD)
+        if multi is not None:
+            for end in range(index, len(segments) + 1):
+                self._match(multi, segments, end, found)
+        
+        if index == len(segments):
+            found.update(dict.fromkeys(node.patterns))
+            return
+        
+        for key in (segments[index], WILDCARD):
+            child = node.children.get(key)
+            if child is not None:
+                self._match(child, segments, index + 1, found)
+
+
+class QueuedSubscriber:
+    """
+    Delivers events to a callback on the event bus thread pool.
+    
+    Events are split into lanes by key; each lane is delivered strictly
+    in publish order by one pool thread at a time, different lanes in
+    parallel. At most max_queue events wait across all lanes.
+    
+    The callback does not inherit the publisher's context: each event is
+    delivered in an empty contextvars.Context, so in particular it never
+    joins the publisher's unit of work (that session may have been
+    committed by then, and sessions must not be shared across threads).
+    A callback that writes opens its own Database().unit_of_work().
+    """
+    
+    # Events delivered per pool task before the lane yields its thread
+    DRAIN_BATCH = 100
+    
+    def __init__(self, bus: 'EventBus', event_name: str, callback: Callable,
+                 key: Union[str, Callable, None], lanes: int, max_queue: int, overflow: str):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.bus = bus
+        self.event_name = event_name
+        self.callback = callback
+        self.key = key
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self._lanes = [deque() for _ in range(lanes if key is not None else 1)]
+        self._scheduled = [False] * len(self._lanes)
+        self._cond = threading.Condition()
+        self.queued = 0
+        self.running = 0
+        self.delivered = 0
+        self.dropped = 0
+    
+    def __call__(self, data: Any, topic: Optional[str] = None) -> None:
+        """Queue an event; topic is the published name (default: the subscribed one)"""
+        lane = self._lane(data)
+        queue = self._lanes[lane]
+        with self._cond:
+            if self.queued >= self.max_queue:
+                if self.overflow == OVERFLOW_BLOCK and not self.bus.in_dispatcher:
+                    while self.queued >= self.max_queue:
+                        self._cond.wait()
+                else:
+                    # A pool thread never blocks: it may be the one that has to make room
+                    self._record_drop()
+                    if self.overflow != OVERFLOW_DROP_OLDEST or not queue:
+                        return
+                    queue.popleft()
+                    self.queued -= 1
+            
+            queue.append((topic or self.event_name, data))
+            self.queued += 1
+            if self._scheduled[lane]:
+                return
+            self._scheduled[lane] = True
+        
+        self.bus._submit(self._drain, lane)
+    
+    def _record_drop(self) -> None:
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            logger.warning(f"Queue of '{self.event_name}' subscriber full, {self.dropped} events dropped so far")
+    
+    def _lane(self, data: Any) -> int:
+        if len(self._lanes) == 1:
+            return 0
+        if callable(self.key):
+            value = self.key(data)
+        else:
+            value = data.get(self.key) if isinstance(data, dict) else None
+        return hash(value) % len(self._lanes)
+    
+    def _drain(self, lane: int) -> None:
+        queue = self._lanes[lane]
+        for _ in range(self.DRAIN_BATCH):
+            with self._cond:
+                if not queue:
+                    self._scheduled[lane] = False
+                    self._cond.notify_all()
+                    return
+                topic, data = queue.popleft()
+                self.queued -= 1
+                self.running += 1
+                self._cond.notify_all()
+            
+            try:
+                # Fresh context per event: nothing leaks from the publisher or the previous callback
+                contextvars.Context().run(self._deliver, topic, data)
+            except Exception as e:
+                logger.error(f"Error in event callback for '{topic}': {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self.running -= 1
+                    self.delivered += 1
+                    self._cond.notify_all()
+        
+        # Let other lanes and subscribers have the thread, then continue
+        self.bus._submit(self._drain, lane)
+    
+    def _deliver(self, topic: str, data: Any) -> None:
+        instrumentation = self.bus.instrumentation
+        if instrumentation.enabled:
+            # Timed under the published topic, like inline subscribers of a pattern
+            instrumentation.call('event', topic, self.callback, data)
+        else:
+            self.callback(data)
+    
+    def wait_idle(self, deadline: Optional[float]) -> bool:
+        """Wait until every queued event is delivered; False if the deadline passed first"""
+        with self._cond:
+            while self.queued or self.running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'event': self.event_name,
+                'callback': getattr(self.callback, '__qualname__', repr(self.callback)),
+                'queued': self.queued,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'overflow': self.overflow
+            }
+
+
+class _Subscriptions:
+    """
+    Immutable subscriber table of an EventBus.
+    
+    Every change builds a new table and swaps it in with one assignment,
+    so publishers iterate a consistent snapshot without taking a lock.
+    """
+    __slots__ = ('subscribers', 'patterns', 'resolved')
+    
+    def __init__(self, subscribers: Dict[str, Tuple[Callable, ...]]):
+        self.subscribers = subscribers
+        self.patterns = TopicTrie()
+        for name in subscribers:
+            if is_pattern(name):
+                self.patterns.add(name)
+        # Filled in by publishers; discarded together with this table
+        self.resolved: Dict[str, Tuple[Callable, ...]] = {}
+
 
 class EventBus:
     """
@@ -21,21 +252,55 @@ class EventBus:
         
         # Module B publishes the event
         engine.events.publish('sales.order.created', {'order_id': 123})
+        
+        # Slow subscribers can opt out of running on the publisher's thread
+        engine.events.subscribe('crm.lead.created', send_welcome_mail, queued=True, key='lead_id')
+        
+        # '*' matches one name segment, '**' any number of them
+        engine.events.subscribe('sales.**', audit_sales)
+        engine.events.subscribe('**.created', index_new_document)
     """
     
-    def __init__(self):
-        self._subscribers: Dict[str, List[Callable]] = defaultdict(list)
+    # Resolved subscriber lists kept per concrete topic
+    MAX_CACHED_TOPICS = 10000
+    
+    def __init__(self, max_workers: int = 4, instrumentation: Optional[DispatchInstrumentation] = None):
+        # Replaced as a whole under _write_lock; publish reads it without locking
+        self._subscriptions = _Subscriptions({})
+        self._write_lock = threading.Lock()
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._closed = False
+        self._dispatcher = threading.local()
+        # Subscriber timings; only consulted while enabled
+        self.instrumentation = instrumentation or DispatchInstrumentation()
         logger.info("Event bus initialized")
     
-    def subscribe(self, event_name: str, callback: Callable) -> None:
+    def subscribe(self, event_name: str, callback: Callable, queued: bool = False,
+                  key: Union[str, Callable, None] = None, lanes: int = 4,
+                  max_queue: int = 1000, overflow: str = OVERFLOW_BLOCK) -> None:
         """
         Subscribe to an event.
         
         Args:
-            event_name: Name of the event (e.g., 'sales.order.created')
+            event_name: Name of the event (e.g., 'sales.order.created'), or a
+                pattern with '*' (one segment) or '**' (any segments) wildcards
             callback: Function to call when event is published
+            queued: Deliver on the event bus thread pool instead of inline;
+                the callback then runs outside the publisher's unit of work
+            key: Queued only; data field name or function giving the ordering
+                key. Events with equal keys are delivered in publish order;
+                without a key all events are.
+            lanes: Queued only; events with different keys delivered in parallel
+            max_queue: Queued only; events that may wait for delivery
+            overflow: Queued only; 'block', 'drop_newest' or 'drop_oldest'
         """
-        self._subscribers[event_name].append(callback)
+        if queued:
+            callback = QueuedSubscriber(self, event_name, callback, key, lanes, max_queue, overflow)
+        with self._write_lock:
+            current = self._subscriptions.subscribers.get(event_name, ())
+            self._replace(event_name, current + (callback,))
         logger.debug(f"Subscribed to event: {event_name}")
     
     def unsubscribe(self, event_name: str, callback: Callable) -> None:
@@ -46,30 +311,62 @@ class EventBus:
             event_name: Name of the event
             callback: The callback function to remove
         """
-        if event_name in self._subscribers:
-            try:
-                self._subscribers[event_name].remove(callback)
-                logger.debug(f"Unsubscribed from event: {event_name}")
-            except ValueError:
-                logger.warning(f"Callback not found for event: {event_name}")
+        with self._write_lock:
+            current = self._subscriptions.subscribers.get(event_name)
+            if current is None:
+                return
+            for index, subscriber in enumerate(current):
+                if subscriber == callback or getattr(subscriber, 'callback', None) == callback:
+                    self._replace(event_name, current[:index] + current[index + 1:])
+                    logger.debug(f"Unsubscribed from event: {event_name}")
+                    return
+        logger.warning(f"Callback not found for event: {event_name}")
     
     def publish(self, event_name: str, data: Any = None) -> None:
         """
         Publish an event to all subscribers.
         
+        Subscribers of the exact name are called first, then those of
+        matching patterns in the order the patterns were first subscribed.
+        Subscribing or unsubscribing meanwhile does not affect a publish
+        in progress.
+        
         Args:
             event_name: Name of the event
             data: Event data to pass to subscribers
         """
-        if event_name not in self._subscribers:
+        subscriptions = self._subscriptions
+        callbacks = subscriptions.resolved.get(event_name)
+        if callbacks is None:
+            callbacks = self._resolve(subscriptions, event_name)
+        if not callbacks:
             logger.debug(f"No subscribers for event: {event_name}")
             return
         
         logger.debug(f"Publishing event: {event_name}")
         
-        for callback in self._subscribers[event_name]:
+        if self.instrumentation.enabled:
+            self._publish_instrumented(event_name, callbacks, data)
+            return
+        
+        for callback in callbacks:
+            try:
+                if isinstance(callback, QueuedSubscriber):
+                    callback(data, event_name)
+                else:
+                    callback(data)
+            except Exception as e:
+                logger.error(f"Error in event callback for '{event_name}': {e}", exc_info=True)
+    
+    def _publish_instrumented(self, event_name: str, callbacks: Tuple[Callable, ...], data: Any) -> None:
+        instrumentation = self.instrumentation
+        for callback in callbacks:
             try:
-                callback(data)
+                if isinstance(callback, QueuedSubscriber):
+                    # Timed when delivered on the pool
+                    callback(data, event_name)
+                else:
+                    instrumentation.call('event', event_name, callback, data)
             except Exception as e:
                 logger.error(f"Error in event callback for '{event_name}': {e}", exc_info=True)
     
@@ -80,18 +377,108 @@ class EventBus:
         Args:
             event_name: Event to clear, or None to clear all
         """
-        if event_name:
-            if event_name in self._subscribers:
-                del self._subscribers[event_name]
-                logger.debug(f"Cleared subscribers for: {event_name}")
+        with self._write_lock:
+            if event_name:
+                if event_name in self._subscriptions.subscribers:
+                    self._replace(event_name, ())
+                    logger.debug(f"Cleared subscribers for: {event_name}")
+            else:
+                self._subscriptions = _Subscriptions({})
+                logger.debug("Cleared all event subscribers")
+    
+    def matches(self, event_name: str) -> List[str]:
+        """Subscribed patterns (and the name itself, if subscribed) that receive an event"""
+        return self._matches(self._subscriptions, event_name)
+    
+    def _matches(self, subscriptions: '_Subscriptions', event_name: str) -> List[str]:
+        names = [event_name] if event_name in subscriptions.subscribers else []
+        return names + [pattern for pattern in subscriptions.patterns.match(event_name) if pattern != event_name]
+    
+    def _resolve(self, subscriptions: '_Subscriptions', event_name: str) -> Tuple[Callable, ...]:
+        """Subscribers receiving a concrete topic, cached in the subscriber table they came from"""
+        callbacks = tuple(
+            callback
+            for name in self._matches(subscriptions, event_name)
+            for callback in subscriptions.subscribers[name]
+        )
+        if len(subscriptions.resolved) >= self.MAX_CACHED_TOPICS:
+            subscriptions.resolved.clear()
+        subscriptions.resolved[event_name] = callbacks
+        return callbacks
+    
+    def _replace(self, event_name: str, callbacks: Tuple[Callable, ...]) -> None:
+        """Publish a new subscriber table with the given subscribers of one name (hold _write_lock)"""
+        subscribers = dict(self._subscriptions.subscribers)
+        if callbacks:
+            subscribers[event_name] = callbacks
         else:
-            self._subscribers.clear()
-            logger.debug("Cleared all event subscribers")
+            subscribers.pop(event_name, None)
+        self._subscriptions = _Subscriptions(subscribers)
     
     def get_event_names(self) -> List[str]:
         """Get list of all event names with subscribers"""
-        return list(self._subscribers.keys())
+        return list(self._subscriptions.subscribers)
     
     def get_subscriber_count(self, event_name: str) -> int:
         """Get number of subscribers for an event"""
-        return len(self._subscribers.get(event_name, []))
+        return len(self._subscriptions.subscribers.get(event_name, ()))
+    
+    def get_queue_stats(self) -> List[Dict[str, Any]]:
+        """Queue length, delivered and dropped counts of every queued subscriber"""
+        return [subscriber.stats() for subscriber in self._queued_subscribers()]
+    
+    @property
+    def in_dispatcher(self) -> bool:
+        """True on an event bus pool thread"""
+        return getattr(self._dispatcher, 'active', False)
+    
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until queued subscribers have delivered every published event.
+        
+        Args:
+            timeout: Seconds to wait at most (None waits indefinitely)
+            
+        Returns:
+            True if all queues are empty
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return all(subscriber.wait_idle(deadline) for subscriber in self._queued_subscribers())
+    
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        Drain queued subscribers and stop the thread pool.
+        
+        Events published afterwards are delivered inline, queued
+        subscribers included.
+        
+        Returns:
+            True if all queues were drained within the timeout
+        """
+        drained = self.drain(timeout)
+        if not drained:
+            logger.warning("Event queues not drained before shutdown; pending events are dropped")
+        
+        with self._executor_lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=drained, cancel_futures=not drained)
+        return drained
+    
+    def _queued_subscribers(self) -> List[QueuedSubscriber]:
+        return [subscriber for subscribers in self._subscriptions.subscribers.values() for subscriber in subscribers
+                if isinstance(subscriber, QueuedSubscriber)]
+    
+    def _submit(self, func: Callable, *args) -> None:
+        with self._executor_lock:
+            if not self._closed:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='event-bus',
+                                                        initializer=self._mark_dispatcher)
+                self._executor.submit(func, *args)
+                return
+        func(*args)
+    
+    def _mark_dispatcher(self) -> None:
+        self._dispatcher.active = True
@@ -5,11 +5,52 @@ Implements the metadata-driven hook system shown in the architecture.
 Example: "If Inventory installed, run inventory.create.picking"
 """
 
+import contextvars
 import logging
-from typing import Dict, Any, Callable, List, Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Callable, FrozenSet, List, Optional, Set, Tuple
+
+from .instrumentation import DispatchInstrumentation, callback_name
+from .orm import Database
 
 logger = logging.getLogger(__name__)
 
+# Condition prefix understood by check_condition()
+MODULE_INSTALLED_CONDITION = "module_installed:"
+
+
+def hook_options(priority: int = 0, timeout: Optional[float] = None, parallel: bool = False) -> Callable:
+    """
+    Decorator giving a hook callback its default registration options.
+    
+    Used for the functions of a module's hooks.py, which are registered
+    automatically.
+    
+    Example:
+        @hook_options(priority=10, timeout=5, parallel=True)
+        def on_module_installed(module_name):
+            ...
+    """
+    def decorate(callback: Callable) -> Callable:
+        callback.hook_priority = priority
+        callback.hook_timeout = timeout
+        callback.hook_parallel = parallel
+        return callback
+    return decorate
+
+
+class _HookEntry:
+    """A registered callback with its execution options"""
+    __slots__ = ('callback', 'priority', 'timeout', 'parallel')
+    
+    def __init__(self, callback: Callable, priority: int, timeout: Optional[float], parallel: bool):
+        self.callback = callback
+        self.priority = priority
+        self.timeout = timeout
+        self.parallel = parallel
+
 
 class HookManager:
     """
@@ -19,26 +60,69 @@ class HookManager:
     Example from architecture:
         - When Sales Order is confirmed → trigger Inventory picking
         - When Opportunity is won → create Sales Order
+    
+    Callbacks run by descending priority, equal priorities in registration
+    order. Adjacent callbacks registered as parallel run together on the
+    hook thread pool. A callback with a timeout is abandoned (not killed)
+    once it runs longer; execute() then goes on without its result. When
+    every pool thread is held by an abandoned callback, later callbacks
+    get a new pool.
+    
+    Pool callbacks see the caller's context variables, but not its unit
+    of work: database calls there run in their own transactions.
     """
     
-    def __init__(self, event_bus):
+    def __init__(self, event_bus, instrumentation: Optional[DispatchInstrumentation] = None,
+                 max_workers: int = 4, default_timeout: Optional[float] = None):
         self.event_bus = event_bus
-        self._hooks: Dict[str, List[Callable]] = {}
+        # Callback timings, shared with the event bus unless given
+        self.instrumentation = instrumentation or event_bus.instrumentation
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        # Copy-on-write: replaced under _write_lock, read by execute() without locking.
+        # Per hook: its entries in execution order, and whether any of them needs the pool
+        self._hooks: Dict[str, Tuple[Tuple[_HookEntry, ...], bool]] = {}
+        self._installed_modules: FrozenSet[str] = frozenset()
+        self._write_lock = threading.Lock()
         self._module_hooks: Dict[str, Any] = {}
+        # Parsed check_condition() strings: condition -> module name (None if not understood)
+        self._conditions: Dict[str, Optional[str]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Timed-out callbacks still running on the current pool
+        self._abandoned: Set[Future] = set()
+        self._closed = False
+        self._worker = threading.local()
         logger.info("Hook manager initialized")
     
-    def register_hook(self, hook_name: str, callback: Callable) -> None:
+    def register_hook(self, hook_name: str, callback: Callable, priority: Optional[int] = None,
+                      timeout: Optional[float] = None, parallel: Optional[bool] = None) -> None:
         """
         Register a hook callback.
         
+        Options not given are taken from the callback's @hook_options,
+        else the defaults apply.
+        
         Args:
             hook_name: Name of the hook (e.g., 'on_module_installed')
             callback: Function to execute when hook is triggered
+            priority: Higher priorities run first (default 0)
+            timeout: Seconds execute() waits for the callback (default: the manager's default_timeout)
+            parallel: Callback may run concurrently with other parallel callbacks of the hook
         """
-        if hook_name not in self._hooks:
-            self._hooks[hook_name] = []
-        
-        self._hooks[hook_name].append(callback)
+        entry = _HookEntry(
+            callback,
+            priority if priority is not None else getattr(callback, 'hook_priority', 0),
+            timeout if timeout is not None else getattr(callback, 'hook_timeout', None) or self.default_timeout,
+            parallel if parallel is not None else getattr(callback, 'hook_parallel', False)
+        )
+        with self._write_lock:
+            hooks = dict(self._hooks)
+            entries = hooks.get(hook_name, ((), False))[0] + (entry,)
+            # sorted() is stable: equal priorities keep registration order
+            entries = tuple(sorted(entries, key=lambda e: -e.priority))
+            hooks[hook_name] = (entries, any(e.parallel or e.timeout for e in entries))
+            self._hooks = hooks
         logger.debug(f"Registered hook: {hook_name}")
     
     def register_module_hooks(self, module_name: str, hooks_module: Any) -> None:
@@ -65,6 +149,20 @@ class HookManager:
                 self.register_hook(hook_name, callback)
                 logger.debug(f"  Registered {module_name}.{hook_name}")
     
+    def set_module_installed(self, module_name: str, installed: bool = True) -> None:
+        """
+        Record that a module was installed or uninstalled (used by conditions).
+        
+        Args:
+            module_name: Name of the module
+            installed: False when the module was uninstalled
+        """
+        with self._write_lock:
+            if installed:
+                self._installed_modules = self._installed_modules | {module_name}
+            else:
+                self._installed_modules = self._installed_modules - {module_name}
+    
     def execute(self, hook_name: str, **kwargs) -> List[Any]:
         """
         Execute all callbacks registered for a hook.
@@ -72,23 +170,47 @@ class HookManager:
         Args:
             hook_name: Name of the hook to execute
             **kwargs: Arguments to pass to hook callbacks
-            
+        
         Returns:
-            List of return values from all callbacks
+            List of return values from all callbacks, in execution order;
+            callbacks that failed or timed out are left out
         """
-        if hook_name not in self._hooks:
+        hook = self._hooks.get(hook_name)
+        if not hook:
             logger.debug(f"No callbacks for hook: {hook_name}")
             return []
         
         logger.debug(f"Executing hook: {hook_name}")
+        entries, pooled = hook
         results = []
+        # Pool threads run everything inline, so nested hooks cannot wait on a full pool
+        inline = not pooled or self.in_worker or self._closed
         
-        for callback in self._hooks[hook_name]:
-            try:
-                result = callback(**kwargs)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error executing hook '{hook_name}': {e}", exc_info=True)
+        if inline:
+            for entry in entries:
+                try:
+                    results.append(self._call(hook_name, entry.callback, kwargs))
+                except Exception as e:
+                    logger.error(f"Error executing hook '{hook_name}': {e}", exc_info=True)
+            return results
+        
+        index = 0
+        while index < len(entries):
+            entry = entries[index]
+            if not (entry.parallel or entry.timeout):
+                try:
+                    results.append(self._call(hook_name, entry.callback, kwargs))
+                except Exception as e:
+                    logger.error(f"Error executing hook '{hook_name}': {e}", exc_info=True)
+                index += 1
+                continue
+            
+            batch = [entry]
+            if entry.parallel:
+                while index + len(batch) < len(entries) and entries[index + len(batch)].parallel:
+                    batch.append(entries[index + len(batch)])
+            results.extend(self._run_on_pool(hook_name, batch, kwargs))
+            index += len(batch)
         
         return results
     
@@ -98,19 +220,18 @@ class HookManager:
         
         Example from architecture:
             "If Inventory installed, run inventory.create.picking"
-            
+        
         Args:
             condition: Condition string to evaluate
-            
+        
         Returns:
             True if condition is met
         """
-        # Simple implementation - check if module is installed
-        if condition.startswith("module_installed:"):
-            module_name = condition.split(":", 1)[1].strip()
-            return module_name in self._module_hooks
-        
-        return False
+        try:
+            module_name = self._conditions[condition]
+        except KeyError:
+            module_name = self._conditions[condition] = self._parse_condition(condition)
+        return module_name is not None and module_name in self._installed_modules
     
     def execute_conditional(self, condition: str, hook_name: str, **kwargs) -> Optional[List[Any]]:
         """
@@ -120,7 +241,7 @@ class HookManager:
             condition: Condition to check
             hook_name: Hook to execute if condition is true
             **kwargs: Arguments for the hook
-            
+        
         Returns:
             Hook results if executed, None otherwise
         """
@@ -138,7 +259,7 @@ class HookManager:
         Args:
             module_name: Name of the module
             hook_name: Name of the hook function
-            
+        
         Returns:
             The hook function if it exists
         """
@@ -155,10 +276,88 @@ class HookManager:
         Args:
             hook_name: Specific hook to clear, or None to clear all
         """
-        if hook_name:
-            if hook_name in self._hooks:
-                del self._hooks[hook_name]
-                logger.debug(f"Cleared hook: {hook_name}")
-        else:
-            self._hooks.clear()
-            logger.debug("Cleared all hooks")
+        with self._write_lock:
+            if hook_name:
+                if hook_name in self._hooks:
+                    self._hooks = {name: callbacks for name, callbacks in self._hooks.items() if name != hook_name}
+                    logger.debug(f"Cleared hook: {hook_name}")
+            else:
+                self._hooks = {}
+                logger.debug("Cleared all hooks")
+    
+    @property
+    def in_worker(self) -> bool:
+        """True on a hook pool thread"""
+        return getattr(self._worker, 'active', False)
+    
+    def shutdown(self) -> None:
+        """Stop the thread pool; callbacks abandoned after a timeout are not waited for"""
+        with self._executor_lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _call(self, hook_name: str, callback: Callable, kwargs: Dict[str, Any]) -> Any:
+        if self.instrumentation.enabled:
+            return self.instrumentation.call('hook', hook_name, callback, **kwargs)
+        return callback(**kwargs)
+    
+    def _run_on_pool(self, hook_name: str, batch: List[_HookEntry], kwargs: Dict[str, Any]) -> List[Any]:
+        """Run callbacks concurrently and wait for each within its timeout"""
+        start = time.monotonic()
+        futures = [self._submit(self._call, hook_name, entry.callback, kwargs) for entry in batch]
+        
+        results = []
+        for entry, future in zip(batch, futures):
+            remaining = None if entry.timeout is None else max(entry.timeout - (time.monotonic() - start), 0)
+            try:
+                results.append(future.result(remaining))
+            except FutureTimeoutError:
+                logger.error(f"Hook '{hook_name}' callback {callback_name(entry.callback)} timed out "
+                             f"after {entry.timeout}s; continuing without it")
+                self._abandon(future)
+            except Exception as e:
+                logger.error(f"Error executing hook '{hook_name}': {e}", exc_info=True)
+        return results
+    
+    def _abandon(self, future: Future) -> None:
+        """Account for a timed-out callback; retire the pool once all its threads hang"""
+        with self._executor_lock:
+            abandoned = self._abandoned
+            abandoned.add(future)
+            if len(abandoned) >= self.max_workers and self._executor is not None:
+                logger.warning(f"All {self.max_workers} hook pool threads are held by timed-out callbacks; "
+                               f"starting a new pool")
+                self._executor.shutdown(wait=False)
+                self._executor = None
+                self._abandoned = set()
+        future.add_done_callback(abandoned.discard)
+    
+    def _submit(self, func: Callable, *args) -> Future:
+        with self._executor_lock:
+            if not self._closed:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='hooks',
+                                                        initializer=self._mark_worker)
+                context = contextvars.copy_context()
+                context.run(Database().detach_unit_of_work)
+                return self._executor.submit(context.run, func, *args)
+        
+        # Shut down: run on the caller's thread
+        future: Future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def _mark_worker(self) -> None:
+        self._worker.active = True
+    
+    @staticmethod
+    def _parse_condition(condition: str) -> Optional[str]:
+        # Simple implementation - check if module is installed
+        if condition.startswith(MODULE_INSTALLED_CONDITION):
+            return condition.split(":", 1)[1].strip()
+        return None
@@ -0,0 +1,177 @@
+"""
+Dispatch Instrumentation - Timing of event subscribers and hook callbacks
+
+Records, per topic and per callback, how often EventBus subscribers and
+HookManager callbacks ran, how long they took and how often they raised.
+Disabled by default; the event bus and hook manager then only check one
+flag per publish or execute.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the callback latency histogram
+LATENCY_BUCKETS_MS = [0.1, 0.5, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+def callback_name(callback: Callable) -> str:
+    """Readable name of a subscriber or hook callback ('module.qualname')"""
+    # Queued subscribers wrap the subscribed function
+    callback = getattr(callback, 'callback', callback)
+    name = getattr(callback, '__qualname__', None) or type(callback).__qualname__
+    module = getattr(callback, '__module__', None)
+    return f"{module}.{name}" if module else name
+
+
+class _Timing:
+    """Counters and latency histogram of one topic or one callback"""
+    __slots__ = ('calls', 'errors', 'slow', 'total', 'max', 'buckets', 'last_error')
+    
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.last_error: Optional[str] = None
+    
+    def add(self, seconds: float, error: Optional[BaseException], slow: bool) -> None:
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        if slow:
+            self.slow += 1
+        if error is not None:
+            self.errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bucket bound below which the given fraction of calls fall (ms)"""
+        if not self.calls:
+            return None
+        threshold = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= threshold:
+                return float(bound)
+        return self.max * 1000
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'slow': self.slow,
+            'total_ms': self.total * 1000,
+            'avg_ms': self.total * 1000 / self.calls if self.calls else 0.0,
+            'max_ms': self.max * 1000,
+            'p99_ms': self.percentile(0.99),
+            'last_error': self.last_error
+        }
+
+
+class DispatchInstrumentation:
+    """
+    Collects timings of event subscribers and hook callbacks.
+    
+    Timings are kept per (kind, topic) and per (kind, topic, callback),
+    kind being 'event' or 'hook'. A callback running longer than
+    slow_threshold_ms is logged as a warning.
+    
+    Example:
+        engine.instrumentation.enable()
+        engine.instrumentation.stats()
+        # {'event': {'sales.order.created': {'calls': 12, 'p99_ms': 5.0, ...,
+        #                                    'callbacks': {'...on_order_created': {...}}}}, 'hook': {...}}
+    """
+    
+    def __init__(self, enabled: bool = False, slow_threshold_ms: Optional[float] = 100):
+        self.enabled = enabled
+        self.slow_threshold_ms = slow_threshold_ms
+        self._lock = threading.Lock()
+        self._topics: Dict[Tuple[str, str], _Timing] = {}
+        self._callbacks: Dict[Tuple[str, str, str], _Timing] = {}
+    
+    def enable(self, slow_threshold_ms: Optional[float] = None) -> None:
+        """Start recording; optionally change the slow callback threshold"""
+        if slow_threshold_ms is not None:
+            self.slow_threshold_ms = slow_threshold_ms
+        self.enabled = True
+    
+    def disable(self) -> None:
+        """Stop recording (collected timings are kept)"""
+        self.enabled = False
+    
+    def call(self, kind: str, topic: str, callback: Callable, *args, **kwargs) -> Any:
+        """
+        Run a callback and record its timing; exceptions are recorded and re-raised.
+        
+        Args:
+            kind: 'event' or 'hook'
+            topic: Event or hook name the callback runs for
+            callback: The subscriber or hook callback
+        """
+        start = time.perf_counter()
+        try:
+            result = callback(*args, **kwargs)
+        except Exception as e:
+            self.record(kind, topic, callback, time.perf_counter() - start, e)
+            raise
+        self.record(kind, topic, callback, time.perf_counter() - start)
+        return result
+    
+    def record(self, kind: str, topic: str, callback: Callable, seconds: float,
+               error: Optional[BaseException] = None) -> None:
+        """Add one callback run to the topic and callback timings"""
+        name = callback_name(callback)
+        slow = self.slow_threshold_ms is not None and seconds * 1000 >= self.slow_threshold_ms
+        with self._lock:
+            timing = self._topics.get((kind, topic))
+            if timing is None:
+                timing = self._topics[(kind, topic)] = _Timing()
+            timing.add(seconds, error, slow)
+            timing = self._callbacks.get((kind, topic, name))
+            if timing is None:
+                timing = self._callbacks[(kind, topic, name)] = _Timing()
+            timing.add(seconds, error, slow)
+        if slow:
+            logger.warning(f"Slow {kind} callback {name} for '{topic}': {seconds * 1000:.1f} ms "
+                           f"(threshold {self.slow_threshold_ms} ms)")
+    
+    def stats(self, kind: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Timings by kind and topic, each with its callbacks' timings.
+        
+        Args:
+            kind: Only 'event' or only 'hook' timings (optional)
+        """
+        result: Dict[str, Dict[str, Any]] = {'event': {}, 'hook': {}}
+        with self._lock:
+            for (timing_kind, topic), timing in self._topics.items():
+                result.setdefault(timing_kind, {})[topic] = dict(timing.as_dict(), callbacks={})
+            for (timing_kind, topic, name), timing in self._callbacks.items():
+                result[timing_kind][topic]['callbacks'][name] = timing.as_dict()
+        if kind is not None:
+            return result.get(kind, {})
+        return result
+    
+    def slowest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Callbacks with the highest cumulative time"""
+        with self._lock:
+            ranked = sorted(self._callbacks.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+            return [dict(timing.as_dict(), kind=kind, topic=topic, callback=name)
+                    for (kind, topic, name), timing in ranked]
+    
+    def reset(self) -> None:
+        """Discard all collected timings"""
+        with self._lock:
+            self._topics = {}
+            self._callbacks = {}
@@ -2,14 +2,30 @@
 Module Registry - Discovers and manages pluggable modules
 """
 
+import hashlib
 import json
 import logging
 import importlib
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
+
+from sqlalchemy.orm import configure_mappers
+
+from .orm import Database
 
 logger = logging.getLogger(__name__)
 
+# Held while module model files are imported and their mappers configured, and
+# while a LazyImport resolves, so no thread gets a half-imported model set.
+# Queries on other threads are not held off: import the models (load_models())
+# before serving requests that may run concurrently with the import.
+_MODEL_IMPORT_LOCK = threading.RLock()
+
 
 class ModuleMetadata:
     """Represents module metadata from manifest.json"""
@@ -19,7 +35,8 @@ class ModuleMetadata:
         self.version: str = data.get('version', '0.1.0')
         self.description: str = data.get('description', '')
         self.author: str = data.get('author', '')
-        self.depends: List[str] = data.get('depends', [])
+        # Some manifests name the key 'dependencies'
+        self.depends: List[str] = data.get('depends', data.get('dependencies', []))
         self.category: str = data.get('category', 'other')
         self.installable: bool = data.get('installable', True)
         self.auto_install: bool = data.get('auto_install', False)
@@ -28,6 +45,42 @@ class ModuleMetadata:
         return f"<ModuleMetadata {self.name} v{self.version}>"
 
 
+class LazyImport:
+    """
+    Stand-in for a class or function of a module, imported on first use.
+    
+    Calls and attribute access are forwarded to the real object.
+    
+    Example:
+        Lead = engine.modules.lazy('crm', 'models.lead', 'Lead')
+        leads = Lead.find_all()  # imports the CRM models here
+    """
+    
+    def __init__(self, registry: 'ModuleRegistry', module_name: str, part: str, attribute: str):
+        self._registry = registry
+        self._module_name = module_name
+        self._part = part
+        self._attribute = attribute
+        self._target = None
+    
+    def resolve(self) -> Any:
+        """Import the module part and return the real object"""
+        if self._target is None:
+            with _MODEL_IMPORT_LOCK:
+                module = self._registry.load(self._module_name, self._part)
+                self._target = getattr(module, self._attribute)
+        return self._target
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+    
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.resolve()(*args, **kwargs)
+    
+    def __repr__(self) -> str:
+        return f"<LazyImport {self._module_name}.{self._part}.{self._attribute}>"
+
+
 class ModuleRegistry:
     """
     Discovers, loads, and manages pluggable modules.
@@ -38,6 +91,13 @@ class ModuleRegistry:
     - controllers/: Business logic
     - views/: UI templates
     - hooks.py: Integration hooks
+    
+    Parsed manifests are kept in an index file and reused while the
+    module files are unchanged. With lazy imports, install() imports only
+    the module package and its hooks; models and controllers are imported
+    by load() when first needed. load() also creates the models' tables; a
+    model imported directly instead gets its table when the next database
+    session opens (see Database.has_new_models).
     """
     
     def __init__(self, config, events, hooks):
@@ -48,10 +108,28 @@ class ModuleRegistry:
         self.available_modules: Dict[str, ModuleMetadata] = {}
         self.installed_modules: Dict[str, Any] = {}
         self.module_paths: Dict[str, Path] = {}
+        # Per module: manifest data and the files found next to it (see _index_entry)
+        self.module_index: Dict[str, Dict[str, Any]] = {}
+        # Seconds spent importing, per module and part ('package', 'hooks', 'models', ...)
+        self.import_times: Dict[str, Dict[str, float]] = {}
+        self.lazy_import = config.get('modules.lazy_import', True)
+        # Seconds each module took to install
+        self.install_times: Dict[str, float] = {}
+        self._loaded_models: set = set()
+        self._load_lock = threading.RLock()
+        self._install_lock = threading.Lock()
         
         # Get modules directory from config or use default
         self.modules_dir = Path(__file__).parent.parent / 'modules'
         logger.info(f"Module directory: {self.modules_dir}")
+        
+        index_cache = config.get('modules.index_cache')
+        if index_cache:
+            self.index_path = Path(index_cache)
+        else:
+            # One index per installation directory
+            digest = hashlib.sha1(str(self.modules_dir.resolve()).encode()).hexdigest()[:12]
+            self.index_path = Path(tempfile.gettempdir()) / f"mindzen_erp_modules_{digest}.json"
     
     def discover(self) -> None:
         """
@@ -65,7 +143,10 @@ class ModuleRegistry:
         
         logger.info("Scanning for modules...")
         
-        for module_path in self.modules_dir.iterdir():
+        cached_index = self._read_index()
+        index: Dict[str, Dict[str, Any]] = {}
+        
+        for module_path in sorted(self.modules_dir.iterdir()):
             if not module_path.is_dir():
                 continue
             
@@ -75,10 +156,10 @@ class ModuleRegistry:
                 continue
             
             try:
-                with open(manifest_path, 'r') as f:
-                    manifest_data = json.load(f)
+                entry = self._index_entry(module_path, cached_index.get(module_path.name))
+                index[module_path.name] = entry
                 
-                metadata = ModuleMetadata(manifest_data)
+                metadata = ModuleMetadata(entry['manifest'])
                 
                 if not metadata.installable:
                     logger.debug(f"Skipping {metadata.name} - not installable")
@@ -86,21 +167,66 @@ class ModuleRegistry:
                 
                 self.available_modules[metadata.name] = metadata
                 self.module_paths[metadata.name] = module_path
+                self.module_index[metadata.name] = entry
                 
                 logger.info(f"  Found module: {metadata.name} v{metadata.version}")
-                
+            
             except Exception as e:
                 logger.error(f"Error loading manifest for {module_path.name}: {e}")
         
+        if index != cached_index:
+            self._write_index(index)
+        
         logger.info(f"Discovery complete: {len(self.available_modules)} modules found")
     
+    def _index_entry(self, module_path: Path, cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Manifest and file layout of a module; the cached entry if its files are unchanged"""
+        models_path = module_path / 'models'
+        stamp = [
+            module_path.stat().st_mtime_ns,
+            (module_path / 'manifest.json').stat().st_mtime_ns,
+            models_path.stat().st_mtime_ns if models_path.is_dir() else None
+        ]
+        if cached is not None and cached.get('stamp') == stamp:
+            return cached
+        
+        with open(module_path / 'manifest.json', 'r') as f:
+            manifest_data = json.load(f)
+        # Model files are imported one by one: not every models package imports them
+        models = sorted(path.stem for path in models_path.glob('*.py') if path.stem != '__init__')
+        return {
+            'stamp': stamp,
+            'manifest': manifest_data,
+            'hooks': (module_path / 'hooks.py').exists(),
+            'controllers': (module_path / 'controllers').is_dir(),
+            'models': models
+        }
+    
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('modules_dir') != str(self.modules_dir):
+            return {}
+        return data.get('modules', {})
+    
+    def _write_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        try:
+            with open(self.index_path, 'w') as f:
+                json.dump({'modules_dir': str(self.modules_dir), 'modules': index}, f)
+        except OSError as e:
+            # Only costs re-parsing the manifests on the next start
+            logger.debug(f"Could not write module index {self.index_path}: {e}")
+    
     def install(self, module_name: str) -> bool:
         """
         Install a module and its dependencies.
         
         Args:
             module_name: Name of the module to install
-            
+        
         Returns:
             True if installation successful
         """
@@ -108,60 +234,228 @@ class ModuleRegistry:
             logger.warning(f"Module '{module_name}' already installed")
             return True
         
-        if module_name not in self.available_modules:
-            logger.error(f"Module '{module_name}' not found")
-            return False
+        return self.install_many([module_name])[module_name]
+    
+    def plan(self, module_names: List[str]) -> List[List[str]]:
+        """
+        Order the installation of modules and their missing dependencies.
         
-        metadata = self.available_modules[module_name]
+        Args:
+            module_names: Modules to install
+        
+        Returns:
+            Installation levels: every module depends only on installed
+            modules and those of earlier levels, so the modules of one
+            level can be installed concurrently
         
-        # Install dependencies first
-        for dep in metadata.depends:
-            if dep not in self.installed_modules:
-                logger.info(f"Installing dependency: {dep}")
-                if not self.install(dep):
-                    logger.error(f"Failed to install dependency '{dep}' for '{module_name}'")
-                    return False
+        Raises:
+            ValueError: A module is not available or dependencies form a cycle
+        """
+        # Every module still to install, with its dependencies still to install
+        pending: Dict[str, List[str]] = {}
+        stack = list(reversed(module_names))
+        while stack:
+            name = stack.pop()
+            if name in pending or name in self.installed_modules:
+                continue
+            if name not in self.available_modules:
+                raise ValueError(f"Module '{name}' not found")
+            pending[name] = [dep for dep in self.available_modules[name].depends if dep not in self.installed_modules]
+            stack.extend(reversed(pending[name]))
         
-        # Load the module
+        levels = []
+        while pending:
+            level = [name for name, deps in pending.items() if not any(dep in pending for dep in deps)]
+            if not level:
+                raise ValueError(f"Module dependency cycle: {' -> '.join(self._find_cycle(pending))}")
+            levels.append(level)
+            for name in level:
+                del pending[name]
+        return levels
+    
+    def install_many(self, module_names: List[str], on_installed: Optional[Callable[[str], None]] = None,
+                     max_workers: Optional[int] = None) -> Dict[str, bool]:
+        """
+        Install modules and their dependencies, independent ones concurrently.
+        
+        Modules are installed level by level (see plan()); the imports and
+        post_install hooks of one level run in a thread pool. A module whose
+        dependency failed is not installed.
+        
+        Args:
+            module_names: Modules to install
+            on_installed: Called on the calling thread for every installed
+                module, level by level in plan order
+            max_workers: Concurrent installations (default: modules.install_workers)
+        
+        Returns:
+            Success per module, dependencies included
+        """
+        try:
+            levels = self.plan(module_names)
+        except ValueError as e:
+            logger.error(f"Cannot install {module_names}: {e}")
+            return {name: name in self.installed_modules for name in module_names}
+        
+        results = {name: True for name in module_names if name in self.installed_modules}
+        workers = max_workers or self.config.get('modules.install_workers', 4)
+        with ThreadPoolExecutor(workers, thread_name_prefix='module-install') as executor:
+            for level in levels:
+                ready = []
+                for name in level:
+                    failed = [dep for dep in self.available_modules[name].depends if results.get(dep) is False]
+                    if failed:
+                        logger.error(f"Failed to install dependency {failed} for '{name}'")
+                        results[name] = False
+                    else:
+                        ready.append(name)
+                
+                if len(ready) == 1:
+                    outcomes = [self._install_one(ready[0])]
+                else:
+                    outcomes = list(executor.map(self._install_one, ready))
+                for name, installed in zip(ready, outcomes):
+                    results[name] = installed
+                    if installed and on_installed is not None:
+                        on_installed(name)
+        return results
+    
+    def get_install_stats(self) -> Dict[str, float]:
+        """Milliseconds each module took to install (imports and post_install)"""
+        return {name: seconds * 1000 for name, seconds in self.install_times.items()}
+    
+    def _install_one(self, module_name: str) -> bool:
+        """Load one module whose dependencies are installed"""
+        start = time.perf_counter()
+        metadata = self.available_modules[module_name]
         try:
             module_path = self.module_paths[module_name]
             
             # Import the module package
-            module_package = f"mindzen_erp.modules.{module_name}"
-            module = importlib.import_module(module_package)
+            module = self._import(module_name, None)
             
             # Load hooks if they exist
-            hooks_path = module_path / 'hooks.py'
-            if hooks_path.exists():
-                hooks_module = importlib.import_module(f"{module_package}.hooks")
+            if self.module_index[module_name]['hooks']:
+                hooks_module = self._import(module_name, 'hooks')
                 self.hooks.register_module_hooks(module_name, hooks_module)
                 logger.debug(f"  Loaded hooks for {module_name}")
             
             # Store installed module
-            self.installed_modules[module_name] = {
-                'metadata': metadata,
-                'module': module,
-                'path': module_path
-            }
+            with self._install_lock:
+                self.installed_modules[module_name] = {
+                    'metadata': metadata,
+                    'module': module,
+                    'path': module_path
+                }
+            self.hooks.set_module_installed(module_name)
+            
+            if not self.lazy_import:
+                self.load_models()
+                if self.module_index[module_name]['controllers']:
+                    self.load(module_name, 'controllers')
             
             # Execute post-install hook if defined
             if hasattr(module, 'post_install'):
                 module.post_install()
             
-            logger.info(f"✓ Module '{module_name}' installed")
+            self.install_times[module_name] = time.perf_counter() - start
+            logger.info(f"✓ Module '{module_name}' installed in {self.install_times[module_name] * 1000:.1f} ms")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Error installing module '{module_name}': {e}", exc_info=True)
             return False
     
+    @staticmethod
+    def _find_cycle(dependencies: Dict[str, List[str]]) -> List[str]:
+        """A dependency cycle among modules that all still have pending dependencies"""
+        path: List[str] = []
+        name = next(iter(dependencies))
+        while name not in path:
+            path.append(name)
+            name = next(dep for dep in dependencies[name] if dep in dependencies)
+        return path[path.index(name):] + [name]
+    
+    def load(self, module_name: str, part: Optional[str] = None) -> Any:
+        """
+        Import a module's package or one of its parts on first use.
+        
+        Any part ('models.lead', 'controllers', ...) first imports the
+        models of all installed modules, since models refer to each other
+        across modules, and creates their missing tables.
+        
+        Args:
+            module_name: Name of the module
+            part: Dotted sub-module (e.g. 'controllers'), None for the package
+        
+        Returns:
+            The imported Python module
+        """
+        with self._load_lock:
+            if part is not None:
+                self.load_models()
+            return self._import(module_name, part)
+    
+    def load_models(self) -> None:
+        """Import the models of every installed module not imported yet"""
+        with self._load_lock, _MODEL_IMPORT_LOCK:
+            # Modules may be installed concurrently; iterate a copy
+            pending = [name for name in list(self.installed_modules) if name not in self._loaded_models]
+            if not pending:
+                return
+            
+            for module_name in pending:
+                start = time.perf_counter()
+                for model_file in self.module_index[module_name]['models']:
+                    importlib.import_module(f"mindzen_erp.modules.{module_name}.models.{model_file}")
+                self._record_import(module_name, 'models', time.perf_counter() - start)
+                self._loaded_models.add(module_name)
+            
+            # The model set is complete: configure it before any of it is handed out
+            configure_mappers()
+            if Database().engine is not None:
+                Database().create_tables()
+    
+    def lazy(self, module_name: str, part: str, attribute: str) -> LazyImport:
+        """
+        Reference a module's class or function without importing it yet.
+        
+        Args:
+            module_name: Name of the module
+            part: Dotted sub-module holding the attribute (e.g. 'models.lead')
+            attribute: Name of the class or function
+        """
+        return LazyImport(self, module_name, part, attribute)
+    
+    def get_import_stats(self) -> Dict[str, Dict[str, float]]:
+        """Milliseconds spent importing each module, by part and in total"""
+        stats = {}
+        for module_name, parts in self.import_times.items():
+            stats[module_name] = {part: seconds * 1000 for part, seconds in parts.items()}
+            stats[module_name]['total'] = sum(parts.values()) * 1000
+        return stats
+    
+    def _import(self, module_name: str, part: Optional[str]) -> Any:
+        package = f"mindzen_erp.modules.{module_name}"
+        name = f"{package}.{part}" if part else package
+        already_imported = name in sys.modules
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        if not already_imported:
+            self._record_import(module_name, part or 'package', time.perf_counter() - start)
+        return module
+    
+    def _record_import(self, module_name: str, part: str, seconds: float) -> None:
+        self.import_times.setdefault(module_name, {})[part] = seconds
+        logger.debug(f"  Imported {module_name} {part} in {seconds * 1000:.1f} ms")
+    
     def uninstall(self, module_name: str) -> bool:
         """
         Uninstall a module.
         
         Args:
             module_name: Name of the module to uninstall
-            
+        
         Returns:
             True if uninstallation successful
         """
@@ -184,11 +478,13 @@ class ModuleRegistry:
                 module.pre_uninstall()
             
             # Remove from installed modules
-            del self.installed_modules[module_name]
+            with self._install_lock:
+                del self.installed_modules[module_name]
+            self.hooks.set_module_installed(module_name, False)
             
             logger.info(f"✓ Module '{module_name}' uninstalled")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Error uninstalling module '{module_name}': {e}")
             return False
@@ -2,15 +2,32 @@
 ORM - SQLAlchemy Implementation with PostgreSQL
 """
 
+import asyncio
 import logging
 import os
-from contextlib import contextmanager
-from typing import Any, Dict, List, Optional, Type, TypeVar
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type, TypeVar, Union
 
-from sqlalchemy import create_engine, Column, Integer, DateTime, String, Boolean, Float, inspect
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, scoped_session
+from sqlalchemy import (
+    create_engine, event, Column, Integer, DateTime, String, Boolean, Float, Numeric, Text,
+    inspect, insert, select, update, delete
+)
+from sqlalchemy.engine import Row, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import (
+    sessionmaker, declarative_base, Session, scoped_session, make_transient_to_detached,
+    aliased, defer, joinedload, selectinload
+)
+from sqlalchemy.orm.util import identity_key
 from sqlalchemy.sql import func
 from datetime import datetime
+from decimal import Decimal
+
+from .cache import CacheManager, ModelCache, MISSING
+from .config import ConfigManager
+from .pool_monitor import MonitoredAsyncQueuePool, MonitoredQueuePool, PoolMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +35,31 @@ logger = logging.getLogger(__name__)
 SqlBase = declarative_base()
 Base = SqlBase  # Alias for compatibility
 
+# Session of the active unit of work (None outside of Database.unit_of_work)
+_current_session: ContextVar[Optional[Session]] = ContextVar('mindzen_current_session', default=None)
+
+# Query counters active in the current context (see Database.count_queries)
+_query_counters: ContextVar[tuple] = ContextVar('mindzen_query_counters', default=())
+
+
+class QueryCounter:
+    """SQL statements executed while a Database.count_queries() block is active"""
+    
+    def __init__(self):
+        self.statements: List[str] = []
+    
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+    
+    def __repr__(self) -> str:
+        return f"<QueryCounter {self.count} statements>"
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _query_counters.get():
+        counter.statements.append(statement)
+
 class Database:
     """Database connection manager"""
     
@@ -28,24 +70,112 @@ class Database:
             cls._instance = super().__new__(cls)
             cls._instance.engine = None
             cls._instance.SessionLocal = None
+            # Number of model tables the last create_tables() created
+            cls._instance._table_count = 0
+            cls._instance._tables_lock = threading.Lock()
         return cls._instance
     
-    def connect(self, connection_string: str):
-        """Connect to PostgreSQL"""
+    def connect(self, connection_string: str, config: Optional[ConfigManager] = None):
+        """
+        Connect to the database.
+        
+        Pool settings come from the 'database.*' configuration keys
+        (pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping,
+        statement_timeout_ms, slow_pool_wait_ms).
+        
+        Args:
+            connection_string: SQLAlchemy database URL
+            config: Configuration manager (optional, defaults are used otherwise)
+        """
         try:
-            self.engine = create_engine(connection_string)
+            config = config or ConfigManager()
+            self.engine = create_engine(connection_string, **self._engine_options(connection_string, config))
+            event.listen(self.engine, 'before_cursor_execute', _count_statement)
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
+            PoolMonitor().slow_wait_ms = config.get('database.slow_pool_wait_ms')
             
             # Create tables
-            SqlBase.metadata.create_all(bind=self.engine)
-            logger.info("Connected to PostgreSQL database")
+            self.create_tables()
+            logger.info(f"Connected to {self.engine.dialect.name} database")
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
 
+    def create_tables(self) -> None:
+        """Create the tables of all imported models that do not exist yet"""
+        with self._tables_lock:
+            count = len(SqlBase.metadata.tables)
+            SqlBase.metadata.create_all(bind=self.engine)
+            self._table_count = count
+    
+    @property
+    def has_new_models(self) -> bool:
+        """
+        True if models were imported since the tables were last created.
+        
+        Module models are imported lazily, usually through the module
+        registry, which creates their tables; a model imported directly
+        after connect() gets its table when the next session opens.
+        """
+        return self.engine is not None and len(SqlBase.metadata.tables) != self._table_count
+    
+    @staticmethod
+    def _engine_options(connection_string: str, config: ConfigManager, is_async: bool = False) -> Dict[str, Any]:
+        """Build create_engine() pool arguments from configuration"""
+        url = make_url(connection_string)
+        options: Dict[str, Any] = {
+            'pool_pre_ping': bool(config.get('database.pool_pre_ping', True)),
+            'pool_recycle': config.get('database.pool_recycle', -1),
+        }
+        
+        # In-memory SQLite keeps its single-connection pool
+        if not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+            options.update(
+                poolclass=MonitoredAsyncQueuePool if is_async else MonitoredQueuePool,
+                pool_size=config.get('database.pool_size', 5),
+                max_overflow=config.get('database.max_overflow', 10),
+                pool_timeout=config.get('database.pool_timeout', 30),
+            )
+        
+        statement_timeout = config.get('database.statement_timeout_ms')
+        if statement_timeout and url.get_backend_name() == 'postgresql':
+            if is_async:
+                options['connect_args'] = {'server_settings': {'statement_timeout': str(int(statement_timeout))}}
+            else:
+                options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+        return options
+
+    @contextmanager
+    def count_queries(self):
+        """
+        Count the SQL statements executed by the current thread or task.
+        
+        Example:
+            with Database().count_queries() as queries:
+                invoice.save()
+            assert queries.count == 1
+        """
+        counter = QueryCounter()
+        token = _query_counters.set(_query_counters.get() + (counter,))
+        try:
+            yield counter
+        finally:
+            _query_counters.reset(token)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool occupancy and checkout wait-time histogram"""
+        pools = {}
+        if self.engine is not None:
+            pools['sync'] = self.engine.pool
+        if AsyncDatabase().engine is not None:
+            pools['async'] = AsyncDatabase().engine.sync_engine.pool
+        return PoolMonitor().stats(pools)
+
     @contextmanager
     def get_session(self):
         """Provide a transactional scope around a series of operations."""
+        if self.has_new_models:
+            self.create_tables()
         session = self.SessionLocal()
         try:
             yield session
@@ -56,93 +186,927 @@ class Database:
         finally:
             session.close()
 
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Share one session and one commit across all BaseModel calls in the block.
+        
+        Nested units of work join the outermost one, so controllers can open
+        their own scope and still take part in a per-request scope.
+        """
+        outer = _current_session.get()
+        if outer is not None:
+            yield outer
+            return
+        
+        with self.get_session() as session:
+            token = _current_session.set(session)
+            try:
+                yield session
+            finally:
+                _current_session.reset(token)
+            changes = session.info.pop('changed_records', {})
+        
+        # Announce writes only once they are committed
+        for table, ids in changes.items():
+            CacheManager().record_changed(table, ids)
+
+    @contextmanager
+    def session_scope(self):
+        """Yield the active unit-of-work session, or a fresh transactional session."""
+        session = _current_session.get()
+        if session is not None:
+            yield session
+            return
+        
+        with self.get_session() as session:
+            yield session
+
+    @property
+    def in_unit_of_work(self) -> bool:
+        """True while a unit of work is active in the current context"""
+        return _current_session.get() is not None
+
+    def detach_unit_of_work(self) -> None:
+        """
+        Leave the active unit of work in the current context, without ending it.
+        
+        For a context copied to another thread: a session must not be used
+        from two threads, nor after its owner committed it.
+        """
+        _current_session.set(None)
+
+    def record_changes(self, table: str, ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Announce a write to a table, deferred to commit inside a unit of work.
+        
+        Args:
+            table: Table name of the changed model
+            ids: Changed primary keys, or None if any row may have changed
+        """
+        session = _current_session.get()
+        if session is None:
+            CacheManager().record_changed(table, ids)
+            return
+        
+        changes = session.info.setdefault('changed_records', {})
+        if ids is None or (table in changes and changes[table] is None):
+            changes[table] = None
+        else:
+            changes.setdefault(table, set()).update(ids)
+
+    def has_pending_changes(self, table: str) -> bool:
+        """True if the active unit of work has uncommitted writes to table"""
+        session = _current_session.get()
+        return session is not None and table in session.info.get('changed_records', {})
+
+class AsyncDatabase:
+    """
+    Asyncio database connection manager, used by the BaseModel a* methods.
+    
+    Connects to the same database as Database through an asyncio driver
+    (aiosqlite for SQLite, asyncpg for PostgreSQL), so FastAPI routes can
+    await queries instead of blocking the event loop. Tables are created
+    through the synchronous Database.
+    """
+    
+    _instance = None
+    
+    # Asyncio driver for each synchronous backend
+    ASYNC_DRIVERS = {
+        'sqlite': 'sqlite+aiosqlite',
+        'postgresql': 'postgresql+asyncpg',
+    }
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.engine = None
+            cls._instance.SessionLocal = None
+        return cls._instance
+    
+    def connect(self, connection_string: str, config: Optional[ConfigManager] = None):
+        """
+        Connect through the asyncio driver matching connection_string.
+        
+        Args:
+            connection_string: SQLAlchemy database URL (sync or async driver)
+            config: Configuration manager for pool settings (optional)
+        """
+        url = make_url(connection_string)
+        backend = url.get_backend_name()
+        if not url.get_dialect().is_async:
+            if backend not in self.ASYNC_DRIVERS:
+                raise ValueError(f"No asyncio driver configured for '{backend}'")
+            url = url.set(drivername=self.ASYNC_DRIVERS[backend])
+        
+        try:
+            options = Database._engine_options(url, config or ConfigManager(), is_async=True)
+            self.engine = create_async_engine(url, **options)
+            event.listen(self.engine.sync_engine, 'before_cursor_execute', _count_statement)
+            self.SessionLocal = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+            logger.info(f"Connected to {backend} database ({url.drivername})")
+        except Exception as e:
+            logger.error(f"Failed to connect async database: {e}")
+            raise
+    
+    @asynccontextmanager
+    async def get_session(self):
+        """Provide an async transactional scope around a series of operations."""
+        if self.SessionLocal is None:
+            raise RuntimeError("AsyncDatabase not connected. Call connect() first.")
+        if Database().has_new_models:
+            await asyncio.to_thread(Database().create_tables)
+        
+        session: AsyncSession = self.SessionLocal()
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+    
+    async def dispose(self) -> None:
+        """Close all pooled connections"""
+        if self.engine is not None:
+            await self.engine.dispose()
+
+
 # Type variable for model classes
 T = TypeVar('T', bound='BaseModel')
 
+# find_by lookup operators: 'field__<operator>' -> SQL expression
+_LOOKUPS: Dict[str, Callable[[Any, Any], Any]] = {
+    '': lambda column, value: column.is_(None) if value is None else column == value,
+    'exact': lambda column, value: column.is_(None) if value is None else column == value,
+    'ne': lambda column, value: column.is_not(None) if value is None else column != value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'in': lambda column, value: column.in_(value),
+    'not_in': lambda column, value: column.not_in(value),
+    'like': lambda column, value: column.like(value),
+    'ilike': lambda column, value: column.ilike(value),
+    'contains': lambda column, value: column.contains(value),
+    'icontains': lambda column, value: column.icontains(value),
+    'startswith': lambda column, value: column.startswith(value),
+    'isnull': lambda column, value: column.is_(None) if value else column.is_not(None),
+}
+
+
+def upsert_insert(dialect_name: str) -> Optional[Callable]:
+    """
+    Dialect insert() construct supporting ON CONFLICT DO NOTHING / DO UPDATE.
+    
+    Args:
+        dialect_name: Name of the session's dialect
+        
+    Returns:
+        The insert() function of the dialect, or None if it has no upsert
+    """
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of lookup criteria, for use in cache keys"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Column keys deferred by list queries asked to defer_text, per model class
+_heavy_columns_by_model: Dict[type, List[str]] = {}
+
+
+def _heavy_columns(model: type) -> List[str]:
+    """Text columns of a model, computed once per class"""
+    keys = _heavy_columns_by_model.get(model)
+    if keys is None:
+        keys = [attr.key for attr in inspect(model).column_attrs if isinstance(attr.columns[0].type, Text)]
+        _heavy_columns_by_model[model] = keys
+    return keys
+
+
+class LoadPlan:
+    """
+    A model bound to one of its named eager-loading plans.
+    
+    Returned by BaseModel.load(); the find methods fetch the plan's
+    relationships up front so they stay usable on detached instances.
+    """
+    
+    def __init__(self, model: Type['BaseModel'], name: str):
+        if name not in model.__load_plans__:
+            raise ValueError(f"{model.__name__} has no load plan '{name}'")
+        self.model = model
+        self.name = name
+    
+    def find_by_id(self, record_id: int):
+        return self.model.find_by_id(record_id, load=self.name)
+    
+    def find_all(self, limit: int = 100):
+        return self.model.find_all(limit, load=self.name)
+    
+    def find_by(self, **criteria):
+        return self.model.find_by(load=self.name, **criteria)
+    
+    def iter_all(self, batch_size: int = 1000, **criteria):
+        return self.model.iter_all(batch_size, load=self.name, **criteria)
+    
+    async def afind_by_id(self, record_id: int):
+        return await self.model.afind_by_id(record_id, load=self.name)
+    
+    async def afind_all(self, limit: int = 100):
+        return await self.model.afind_all(limit, load=self.name)
+    
+    async def afind_by(self, **criteria):
+        return await self.model.afind_by(load=self.name, **criteria)
+    
+    def __repr__(self) -> str:
+        return f"<LoadPlan {self.model.__name__}.{self.name}>"
+
+
 class BaseModel(SqlBase):
     """
     Base model Class mixed with SQLAlchemy Declarative Base.
     """
     __abstract__ = True
     
+    # Read-through cache for master data; models opt in with __cacheable__ = True
+    __cacheable__ = False
+    __cache_size__ = 1024
+    __cache_ttl__ = 300.0
+    
+    # Named eager-loading plans: {'plan': ['relationship', 'relationship.nested', ...]}
+    __load_plans__: Dict[str, List[str]] = {}
+    
+    # Fetch server-generated columns (created_at, updated_at) in the INSERT/UPDATE
+    # itself, via RETURNING where supported, instead of refreshing afterwards
+    __mapper_args__ = {'eager_defaults': True}
+    
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     @classmethod
-    def find_by_id(cls: Type[T], record_id: int) -> Optional[T]:
+    def find_by_id(cls: Type[T], record_id: int, load: Optional[str] = None) -> Optional[T]:
+        key = ('id', record_id)
+        return cls._cached(key, lambda: select(cls).where(cls.id == record_id), load, first=True)
+
+    @classmethod
+    def find_all(cls: Type[T], limit: int = 100, load: Optional[str] = None, defer_text: bool = False) -> List[T]:
+        key = ('query', 'all', limit, defer_text)
+        return cls._cached(key, lambda: select(cls).options(*cls._list_options(defer_text)).limit(limit), load)
+
+    @classmethod
+    def find_by(cls: Type[T], load: Optional[str] = None, order_by: Union[str, List[str], None] = None,
+                limit: Optional[int] = None, offset: Optional[int] = None, defer_text: bool = False,
+                **criteria) -> List[T]:
+        """
+        Find records matching the given lookups, filtered and paged in SQL.
+        
+        Criteria use Django-style lookups: ``status='new'``,
+        ``amount__gte=100``, ``stage__in=['won', 'lost']``,
+        ``name__icontains='acme'``, ``assigned_to__isnull=True``.
+        
+        Args:
+            load: Name of an eager-loading plan (optional)
+            order_by: Field name or list of names; prefix '-' for descending
+            limit: Maximum number of results (optional)
+            offset: Number of results to skip (optional)
+            defer_text: Leave Text columns unloaded; they then raise on the
+                detached results, so only use it when they are not read
+            **criteria: Field lookups
+        """
+        key = ('query', 'by', _freeze(criteria), _freeze(order_by), limit, offset, defer_text)
+        return cls._cached(key, lambda: cls._find_by_statement(order_by, limit, offset, criteria, defer_text), load)
+
+    @classmethod
+    def _find_by_statement(cls, order_by, limit: Optional[int], offset: Optional[int], criteria: Dict[str, Any],
+                           defer_text: bool = False):
+        stmt = cls._apply_criteria(select(cls).options(*cls._list_options(defer_text)), criteria)
+        return cls._apply_paging(stmt, order_by, limit, offset)
+
+    @classmethod
+    def find_values(cls, fields: List[str], order_by: Union[str, List[str], None] = None,
+                    limit: Optional[int] = None, offset: Optional[int] = None, **criteria) -> List[Row]:
+        """
+        Fetch only the given columns as lightweight named rows.
+        
+        Rows are plain tuples (no identity map, no change tracking), read
+        with attribute access (``row.name``). A dotted field follows a
+        many-to-one relationship with an outer join and is labelled with
+        an underscore, e.g. 'category.name' -> ``row.category_name``.
+        
+        Args:
+            fields: Column names, optionally 'relationship.column'
+            order_by: Field name or list of names, as for find_by (default: id)
+            limit: Maximum number of rows (optional)
+            offset: Number of rows to skip (optional)
+            **criteria: Field lookups, as for find_by
+            
+        Returns:
+            List of rows
+        """
+        stmt = cls._values_statement(fields, order_by, limit, offset, criteria)
+        db = Database()
+        with db.session_scope() as session:
+            return session.execute(stmt).all()
+
+    @classmethod
+    def aggregate(cls, group_by: Optional[List[str]] = None, sums: Optional[List[str]] = None,
+                  counts: bool = True, **filters) -> List[Dict[str, Any]]:
+        """
+        Count and sum in the database with GROUP BY, without loading records.
+        
+        Example:
+            Lead.aggregate(group_by=['status'], sums=['expected_revenue'])
+            # [{'status': 'new', 'count': 12, 'expected_revenue': 4200.0}, ...]
+        
+        Args:
+            group_by: Column names to group by (default: one overall row)
+            sums: Column names to total; each total is keyed by its column name
+            counts: Include the number of rows per group as 'count'
+            **filters: Field lookups, as for find_by
+            
+        Returns:
+            List of plain dictionaries, one per group
+        """
+        stmt = cls._aggregate_statement(group_by, sums, counts, filters)
         db = Database()
-        with db.get_session() as session:
-            return session.query(cls).filter(cls.id == record_id).first()
+        with db.session_scope() as session:
+            return [dict(row._mapping) for row in session.execute(stmt)]
+
+    @classmethod
+    def _aggregate_statement(cls, group_by: Optional[List[str]], sums: Optional[List[str]], counts: bool,
+                             filters: Dict[str, Any]):
+        group_columns = [getattr(cls, name) for name in group_by or []]
+        columns = list(group_columns)
+        if counts:
+            columns.append(func.count(cls.id).label('count'))
+        for name in sums or []:
+            # SUM of no rows is NULL; report 0 like an empty Python sum
+            columns.append(func.coalesce(func.sum(getattr(cls, name)), 0).label(name))
+        
+        stmt = cls._apply_criteria(select(*columns).select_from(cls), filters)
+        return stmt.group_by(*group_columns) if group_columns else stmt
+
+    @classmethod
+    def _values_statement(cls, fields: List[str], order_by, limit: Optional[int], offset: Optional[int],
+                          criteria: Dict[str, Any]):
+        relationships = inspect(cls).relationships
+        targets = {}
+        columns = []
+        for field in fields:
+            if '.' not in field:
+                columns.append(getattr(cls, field))
+                continue
+            
+            rel_name, column_name = field.split('.', 1)
+            if rel_name not in targets:
+                targets[rel_name] = aliased(relationships[rel_name].mapper.class_)
+            columns.append(getattr(targets[rel_name], column_name).label(f"{rel_name}_{column_name}"))
+        
+        stmt = select(*columns).select_from(cls)
+        for rel_name, target in targets.items():
+            stmt = stmt.outerjoin(getattr(cls, rel_name).of_type(target))
+        stmt = cls._apply_criteria(stmt, criteria)
+        return cls._apply_paging(stmt, order_by or 'id', limit, offset)
+
+    @classmethod
+    def _list_options(cls, defer_text: bool) -> list:
+        """Loader options for list queries: with defer_text, heavy Text columns are left unloaded"""
+        if not defer_text:
+            return []
+        return [defer(getattr(cls, key)) for key in _heavy_columns(cls)]
+
+    @classmethod
+    def load(cls: Type[T], plan: str) -> LoadPlan:
+        """
+        Bind a named eager-loading plan for the next lookup.
+        
+        Example:
+            order = SalesOrder.load('with_items_and_products').find_by_id(order_id)
+        """
+        return LoadPlan(cls, plan)
 
     @classmethod
-    def find_all(cls: Type[T], limit: int = 100) -> List[T]:
+    def _load_options(cls, plan: str) -> list:
+        """
+        Compile a load plan into loader options.
+        
+        Collections are fetched with one extra SELECT ... IN per level
+        (selectinload); many-to-one references are joined into the parent
+        query (joinedload).
+        """
+        if plan not in cls.__load_plans__:
+            raise ValueError(f"{cls.__name__} has no load plan '{plan}'")
+        
+        options = []
+        for path in cls.__load_plans__[plan]:
+            option = None
+            model = cls
+            for name in path.split('.'):
+                relationship_prop = inspect(model).relationships[name]
+                attr = getattr(model, name)
+                strategy = selectinload if relationship_prop.uselist else joinedload
+                option = strategy(attr) if option is None else getattr(option, strategy.__name__)(attr)
+                model = relationship_prop.mapper.class_
+            options.append(option)
+        return options
+
+    @classmethod
+    def _cache(cls) -> Optional[ModelCache]:
+        """The model's cache, or None if uncached or written in the current unit of work"""
+        if not cls.__cacheable__ or Database().has_pending_changes(cls.__tablename__):
+            return None
+        return CacheManager().get_cache(cls.__tablename__, cls.__cache_size__, cls.__cache_ttl__)
+
+    @classmethod
+    def _cached(cls, key, build, load: Optional[str] = None, first: bool = False):
+        """Serve a find_* lookup from the model cache, running the statement from build() on a miss"""
+        # The cache holds plain columns, so eager-loaded lookups always hit the database
+        cache = cls._cache() if load is None else None
+        result = cls._cache_get(cache, key)
+        if result is not MISSING:
+            return result
+        
+        # Read before the SELECT: an invalidation meanwhile makes the result unsafe to cache
+        generation = cache.generation if cache is not None else None
+        stmt = cls._with_plan(build(), load)
         db = Database()
-        with db.get_session() as session:
-            return session.query(cls).limit(limit).all()
+        with db.session_scope() as session:
+            records = session.scalars(stmt)
+            result = records.first() if first else records.all()
+            cls._cache_put(cache, key, result, session, generation)
+            return result
+
+    @classmethod
+    async def _acached(cls, key, build, load: Optional[str] = None, first: bool = False):
+        """Async counterpart of _cached"""
+        cache = cls._cache() if load is None else None
+        result = cls._cache_get(cache, key)
+        if result is not MISSING:
+            return result
+        
+        generation = cache.generation if cache is not None else None
+        stmt = cls._with_plan(build(), load)
+        async with AsyncDatabase().get_session() as session:
+            records = await session.scalars(stmt)
+            result = records.first() if first else records.all()
+            cls._cache_put(cache, key, result, session, generation)
+        return result
+
+    @classmethod
+    def _with_plan(cls, stmt, load: Optional[str]):
+        return stmt.options(*cls._load_options(load)) if load is not None else stmt
+
+    @classmethod
+    def _cache_get(cls, cache: Optional[ModelCache], key):
+        """Cached instance(s) for key, or MISSING"""
+        if cache is None:
+            return MISSING
+        values = cache.get(key)
+        if values is MISSING:
+            return MISSING
+        if isinstance(values, list):
+            return [cls._from_cache(v) for v in values]
+        return cls._from_cache(values) if values is not None else None
+
+    @classmethod
+    def _cache_put(cls, cache: Optional[ModelCache], key, result, session, generation: Optional[int] = None) -> None:
+        if cache is None:
+            return
+        records = result if isinstance(result, list) else [result]
+        # Never cache state that has not been written yet
+        if any(r is not None and session.is_modified(r) for r in records):
+            return
+        if isinstance(result, list):
+            cache.put(key, [r._loaded_values() for r in result], generation)
+        else:
+            cache.put(key, result._loaded_values() if result is not None else None, generation)
+
+    @classmethod
+    def _from_cache(cls: Type[T], values: Dict[str, Any]) -> T:
+        """Rebuild a detached instance from cached column values"""
+        session = _current_session.get()
+        if session is not None:
+            existing = session.identity_map.get(identity_key(cls, values['id']))
+            if existing is not None:
+                return existing
+        
+        instance = cls(**values)
+        make_transient_to_detached(instance)
+        if session is not None:
+            # Join the unit of work without a SELECT
+            return session.merge(instance, load=False)
+        return instance
 
     @classmethod
-    def find_by(cls: Type[T], **criteria) -> List[T]:
+    def iter_all(cls: Type[T], batch_size: int = 1000, load: Optional[str] = None, defer_text: bool = False,
+                 **criteria) -> Iterator[T]:
+        """
+        Stream matching records in primary key order, one batch at a time.
+        
+        Uses keyset pagination on ``id`` so each batch is an indexed range
+        scan and only one batch is held in memory. Outside a unit of work
+        every batch is read in its own short session.
+        
+        Args:
+            batch_size: Number of rows fetched per query
+            load: Name of an eager-loading plan applied to each batch
+            defer_text: Leave Text columns unloaded, as for find_by
+            **criteria: Field lookups, as for find_by
+        """
         db = Database()
-        with db.get_session() as session:
-            query = session.query(cls)
-            for key, value in criteria.items():
-                if hasattr(cls, key):
-                    query = query.filter(getattr(cls, key) == value)
-            return query.all()
+        options = cls._load_options(load) if load is not None else []
+        last_id = None
+        while True:
+            with db.session_scope() as session:
+                query = session.query(cls).options(*cls._list_options(defer_text), *options)
+                query = cls._apply_criteria(query, criteria)
+                if last_id is not None:
+                    query = query.filter(cls.id > last_id)
+                batch = query.order_by(cls.id).limit(batch_size).all()
+            
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1].id
+
+    @classmethod
+    def _apply_criteria(cls, query, criteria: Dict[str, Any]):
+        """Add a WHERE clause per 'field' or 'field__operator' lookup on a known column"""
+        for key, value in criteria.items():
+            field, _, operator = key.partition('__')
+            if not hasattr(cls, field):
+                continue
+            if operator not in _LOOKUPS:
+                raise ValueError(f"Unsupported lookup '{operator}' in '{key}'")
+            query = query.filter(_LOOKUPS[operator](getattr(cls, field), value))
+        return query
+
+    @classmethod
+    def _apply_paging(cls, query, order_by: Union[str, List[str], None],
+                      limit: Optional[int], offset: Optional[int]):
+        """Add ORDER BY / LIMIT / OFFSET to a query or select"""
+        if order_by:
+            for name in [order_by] if isinstance(order_by, str) else order_by:
+                if name.startswith('-'):
+                    query = query.order_by(getattr(cls, name[1:]).desc())
+                else:
+                    query = query.order_by(getattr(cls, name))
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+        return query
 
     @classmethod
     def create(cls: Type[T], data: Dict[str, Any]) -> T:
         db = Database()
-        with db.get_session() as session:
-            # Filter data to only include valid columns
-            mapper = inspect(cls).mapper
-            valid_columns = {c.key for c in mapper.column_attrs}
-            valid_relationships = {r.key for r in mapper.relationships}
-            
-            clean_data = {k: v for k, v in data.items() if k in valid_columns}
-            relation_data = {k: v for k, v in data.items() if k in valid_relationships}
-            
-            instance = cls(**clean_data)
-            
-            # Handle Relationships (assuming One-to-Many list of dicts)
-            for key, value in relation_data.items():
-                rel_prop = mapper.relationships[key]
-                rel_cls = rel_prop.mapper.class_
-                if isinstance(value, list):
-                    for item_data in value:
-                        if isinstance(item_data, dict):
-                             # Recursive creation not fully supported via same method due to session handling
-                             # So we instantiate directly
-                             rel_instance = rel_cls(**item_data)
-                             getattr(instance, key).append(rel_instance)
-                
+        with db.session_scope() as session:
+            instance = cls._build(data)
             session.add(instance)
+            if db.in_unit_of_work:
+                # Flush for the primary key; the unit of work commits once at the end
+                session.flush()
+                db.record_changes(cls.__tablename__, [instance.id])
+                return instance
+            
             session.commit() # Commit to save everything including children
-            session.refresh(instance)
             session.expunge(instance)
-            return instance
+        db.record_changes(cls.__tablename__, [instance.id])
+        return instance
+
+    @classmethod
+    def _build(cls: Type[T], data: Dict[str, Any]) -> T:
+        """New unsaved instance from data, ignoring unknown keys"""
+        # Filter data to only include valid columns
+        mapper = inspect(cls).mapper
+        valid_columns = {c.key for c in mapper.column_attrs}
+        valid_relationships = {r.key for r in mapper.relationships}
+        
+        clean_data = {k: v for k, v in data.items() if k in valid_columns}
+        relation_data = {k: v for k, v in data.items() if k in valid_relationships}
+        
+        instance = cls(**clean_data)
+        instance._apply_column_defaults()
+        
+        # Handle Relationships (assuming One-to-Many list of dicts)
+        for key, value in relation_data.items():
+            rel_prop = mapper.relationships[key]
+            rel_cls = rel_prop.mapper.class_
+            if isinstance(value, list):
+                for item_data in value:
+                    if isinstance(item_data, dict):
+                         # Recursive creation not fully supported via same method due to session handling
+                         # So we instantiate directly
+                         rel_instance = rel_cls(**item_data)
+                         getattr(instance, key).append(rel_instance)
+        return instance
+
+    def _apply_column_defaults(self) -> None:
+        """
+        Fill scalar column defaults and coerce Numeric values to Decimal in memory,
+        so derived-amount calculations see the same types a refresh would return.
+        """
+        for attr in inspect(self).mapper.column_attrs:
+            column = attr.columns[0]
+            value = getattr(self, attr.key)
+            if value is None and column.default is not None and column.default.is_scalar:
+                value = column.default.arg
+            if value is not None and isinstance(column.type, Numeric) and column.type.asdecimal \
+                    and not isinstance(value, Decimal):
+                value = Decimal(str(value))
+            if value is not None:
+                setattr(self, attr.key, value)
+            elif column.onupdate is not None and column.default is None and column.server_default is None:
+                # Known to be NULL on insert; otherwise it is expired and re-selected after the flush
+                setattr(self, attr.key, None)
+
+    @classmethod
+    def bulk_create(cls, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert many rows with a single executemany INSERT.
+        
+        Scalar column defaults are applied and ``calculate_amounts()`` (when the
+        model defines it) is run in memory before the insert, so derived amounts
+        are stored without a save per row.
+        
+        Args:
+            rows: List of column dictionaries
+            
+        Returns:
+            Primary keys of the inserted rows, in the order given
+        """
+        if not rows:
+            return []
+        
+        records = cls._bulk_records(rows)
+        # executemany needs the same keys on every row: one INSERT per run of rows
+        # with the same keys, so a column a row leaves out gets its column or
+        # server default instead of NULL, and ids still ascend in input order
+        runs: List[List[Dict[str, Any]]] = []
+        for record in records:
+            if runs and runs[-1][0].keys() == record.keys():
+                runs[-1].append(record)
+            else:
+                runs.append([record])
+        
+        ids: List[int] = []
+        db = Database()
+        with db.session_scope() as session:
+            stmt, unordered = cls._bulk_insert_statement(session.get_bind().dialect.name)
+            for run in runs:
+                run_ids = list(session.execute(stmt, run).scalars())
+                if unordered:
+                    run_ids.sort()
+                ids.extend(run_ids)
+            db.record_changes(cls.__tablename__, ids)
+        return ids
+
+    @classmethod
+    def _bulk_records(cls, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """INSERT parameter rows, with scalar defaults and derived amounts filled in (None values left out)"""
+        columns = {attr.key: attr.columns[0] for attr in inspect(cls).mapper.column_attrs}
+        
+        records = []
+        for data in rows:
+            instance = cls(**{k: v for k, v in data.items() if k in columns})
+            instance._apply_column_defaults()
+            if hasattr(instance, 'calculate_amounts'):
+                instance.calculate_amounts()
+            
+            records.append({column.name: getattr(instance, key) for key, column in columns.items()
+                            if getattr(instance, key) is not None})
+        return records
+
+    @classmethod
+    def _bulk_insert_statement(cls, dialect_name: str):
+        """INSERT ... RETURNING id for bulk_create, and whether the ids come back unordered"""
+        table = cls.__table__
+        if dialect_name == 'sqlite':
+            # Ordered RETURNING degrades to one statement per row on SQLite;
+            # rowids are assigned in VALUES order, so sorting restores it
+            return insert(table).returning(table.c.id), True
+        return insert(table).returning(table.c.id, sort_by_parameter_order=True), False
 
     def save(self) -> 'BaseModel':
+        """
+        Write pending changes of this instance.
+        
+        Only modified columns are sent; server-generated values come back in
+        the same statement, so a save is a single UPDATE (or INSERT) and an
+        unchanged record issues no SQL at all.
+        """
+        state = inspect(self)
+        if state.key is not None and not state.modified:
+            return self
+        
         db = Database()
-        with db.get_session() as session:
+        with db.session_scope() as session:
             session.add(self)
+            if db.in_unit_of_work:
+                session.flush()
+                db.record_changes(self.__tablename__, [self.id])
+                return self
+            
             session.commit()
-            session.refresh(self)
             session.expunge(self)
-            return self
+        db.record_changes(self.__tablename__, [self.id])
+        return self
 
     def delete(self) -> bool:
         if self.id is None:
             return False
         db = Database()
-        with db.get_session() as session:
+        with db.session_scope() as session:
             instance = session.query(self.__class__).get(self.id)
-            if instance:
-                session.delete(instance)
-                return True
-        return False
+            if not instance:
+                return False
+            session.delete(instance)
+            if db.in_unit_of_work:
+                session.flush()
+        db.record_changes(self.__tablename__, [self.id])
+        return True
+
+    @classmethod
+    def update_where(cls, criteria: Dict[str, Any], values: Dict[str, Any]) -> int:
+        """
+        Update every matching row with a single UPDATE statement.
+        
+        Rows are not loaded; cached records of the model are invalidated.
+        
+        Example:
+            Lead.update_where({'id__in': lead_ids}, {'assigned_to': user_id})
+        
+        Args:
+            criteria: Field lookups, as for find_by (empty matches every row)
+            values: Column values to set
+            
+        Returns:
+            Number of rows updated
+        """
+        stmt = cls._where(update(cls), criteria).values(**cls._check_columns(values))
+        return cls._execute_where(stmt)
+
+    @classmethod
+    def delete_where(cls, criteria: Dict[str, Any]) -> int:
+        """
+        Delete every matching row with a single DELETE statement.
+        
+        Unlike delete(), ORM cascades do not run: child rows are only
+        removed by ON DELETE rules of the database.
         
+        Args:
+            criteria: Field lookups, as for find_by (empty matches every row)
+            
+        Returns:
+            Number of rows deleted
+        """
+        return cls._execute_where(cls._where(delete(cls), criteria))
+
+    @classmethod
+    def _where(cls, stmt, criteria: Dict[str, Any]):
+        # A misspelt field must not widen a bulk write to the whole table
+        cls._check_columns({key.partition('__')[0]: None for key in criteria})
+        return cls._apply_criteria(stmt, criteria)
+
+    @classmethod
+    def _check_columns(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        columns = {attr.key for attr in inspect(cls).mapper.column_attrs}
+        unknown = set(values) - columns
+        if unknown:
+            raise ValueError(f"{cls.__name__} has no column(s): {', '.join(sorted(unknown))}")
+        return values
+
+    @classmethod
+    def _execute_where(cls, stmt) -> int:
+        db = Database()
+        with db.session_scope() as session:
+            count = session.execute(stmt).rowcount
+        if count:
+            db.record_changes(cls.__tablename__, None)
+        return count
+
+    # Async counterparts, run through AsyncDatabase. They never join a
+    # synchronous unit of work; every call is its own transaction.
+
+    @classmethod
+    async def afind_by_id(cls: Type[T], record_id: int, load: Optional[str] = None) -> Optional[T]:
+        key = ('id', record_id)
+        return await cls._acached(key, lambda: select(cls).where(cls.id == record_id), load, first=True)
+
+    @classmethod
+    async def afind_all(cls: Type[T], limit: int = 100, load: Optional[str] = None,
+                        defer_text: bool = False) -> List[T]:
+        key = ('query', 'all', limit, defer_text)
+        return await cls._acached(key, lambda: select(cls).options(*cls._list_options(defer_text)).limit(limit), load)
+
+    @classmethod
+    async def afind_by(cls: Type[T], load: Optional[str] = None, order_by: Union[str, List[str], None] = None,
+                       limit: Optional[int] = None, offset: Optional[int] = None, defer_text: bool = False,
+                       **criteria) -> List[T]:
+        key = ('query', 'by', _freeze(criteria), _freeze(order_by), limit, offset, defer_text)
+        return await cls._acached(key, lambda: cls._find_by_statement(order_by, limit, offset, criteria, defer_text),
+                                  load)
+
+    @classmethod
+    async def afind_values(cls, fields: List[str], order_by: Union[str, List[str], None] = None,
+                           limit: Optional[int] = None, offset: Optional[int] = None, **criteria) -> List[Row]:
+        stmt = cls._values_statement(fields, order_by, limit, offset, criteria)
+        async with AsyncDatabase().get_session() as session:
+            result = await session.execute(stmt)
+            return result.all()
+
+    @classmethod
+    async def aaggregate(cls, group_by: Optional[List[str]] = None, sums: Optional[List[str]] = None,
+                         counts: bool = True, **filters) -> List[Dict[str, Any]]:
+        stmt = cls._aggregate_statement(group_by, sums, counts, filters)
+        async with AsyncDatabase().get_session() as session:
+            result = await session.execute(stmt)
+            return [dict(row._mapping) for row in result]
+
+    @classmethod
+    async def acreate(cls: Type[T], data: Dict[str, Any]) -> T:
+        instance = cls._build(data)
+        async with AsyncDatabase().get_session() as session:
+            session.add(instance)
+        Database().record_changes(cls.__tablename__, [instance.id])
+        return instance
+
+    @classmethod
+    async def abulk_create(cls, rows: List[Dict[str, Any]]) -> List[int]:
+        if not rows:
+            return []
+        
+        records = cls._bulk_records(rows)
+        async_db = AsyncDatabase()
+        async with async_db.get_session() as session:
+            stmt, unordered = cls._bulk_insert_statement(async_db.engine.dialect.name)
+            result = await session.execute(stmt, records)
+            ids = list(result.scalars())
+        if unordered:
+            ids.sort()
+        Database().record_changes(cls.__tablename__, ids)
+        return ids
+
+    async def asave(self) -> 'BaseModel':
+        state = inspect(self)
+        if state.key is not None and not state.modified:
+            return self
+        
+        async with AsyncDatabase().get_session() as session:
+            session.add(self)
+        Database().record_changes(self.__tablename__, [self.id])
+        return self
+
+    @classmethod
+    async def aupdate_where(cls, criteria: Dict[str, Any], values: Dict[str, Any]) -> int:
+        stmt = cls._where(update(cls), criteria).values(**cls._check_columns(values))
+        return await cls._aexecute_where(stmt)
+
+    @classmethod
+    async def adelete_where(cls, criteria: Dict[str, Any]) -> int:
+        return await cls._aexecute_where(cls._where(delete(cls), criteria))
+
+    @classmethod
+    async def _aexecute_where(cls, stmt) -> int:
+        async with AsyncDatabase().get_session() as session:
+            result = await session.execute(stmt)
+            count = result.rowcount
+        if count:
+            Database().record_changes(cls.__tablename__, None)
+        return count
+
+    async def adelete(self) -> bool:
+        if self.id is None:
+            return False
+        async with AsyncDatabase().get_session() as session:
+            instance = await session.get(self.__class__, self.id)
+            if not instance:
+                return False
+            await session.delete(instance)
+        Database().record_changes(self.__tablename__, [self.id])
+        return True
+        
+    def _loaded_values(self) -> Dict[str, Any]:
+        """Column values already loaded on this instance (deferred ones are skipped)"""
+        state = inspect(self)
+        return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert model to dictionary"""
         return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
@@ -0,0 +1,234 @@
+"""
+Event Outbox - Durable events written in the business transaction
+
+An event put in the outbox is inserted into the same database transaction
+as the change it describes: it exists exactly when that change commits.
+A relay thread then hands outbox rows to the EventBus, so subscribers
+see every committed event at least once, even across process crashes.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, func, insert, or_, select, update
+
+from .cache import RECORD_CHANGED_EVENT
+from .orm import BaseModel, Database
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEvent(BaseModel):
+    """One durable event; its id is the event's offset in the outbox"""
+    __tablename__ = 'event_outbox'
+    
+    topic = Column(String(200), nullable=False)
+    payload = Column(Text)
+    # Set while a relay holds the event; an expired claim may be taken over
+    claimed_by = Column(String(100))
+    claimed_until = Column(DateTime)
+    dispatched_at = Column(DateTime, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    
+    @classmethod
+    def enqueue(cls, topic: str, data: Any = None) -> int:
+        """
+        Add an event to the outbox in the active unit of work.
+        
+        Outside a unit of work the event is committed on its own.
+        
+        Returns:
+            Offset (id) of the event
+        """
+        table = cls.__table__
+        db = Database()
+        with db.session_scope() as session:
+            event_id = session.execute(
+                insert(table).values(topic=topic, payload=json.dumps(data, default=str), attempts=0)
+                .returning(table.c.id)
+            ).scalar_one()
+        # Announced on commit, which wakes the relay
+        db.record_changes(cls.__tablename__, [event_id])
+        return event_id
+
+
+class OutboxRelay:
+    """
+    Dispatches committed outbox events to the EventBus.
+    
+    Relays claim batches of events with a time-limited lease, so several
+    processes can relay one outbox. An event is marked dispatched only
+    after its batch was published; if the relay dies in between, the
+    lease expires and the batch is published again (at-least-once).
+    Subscribers should therefore be idempotent, e.g. by remembering the
+    '_outbox_id' added to dict payloads.
+    
+    Example:
+        engine.outbox.publish('crm.lead.converted', {'lead_id': 7})  # inside a unit of work
+        engine.outbox.start()
+    """
+    
+    def __init__(self, event_bus, batch_size: int = 100, poll_interval: float = 1.0, lease_seconds: int = 60):
+        self.event_bus = event_bus
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.relay_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        event_bus.subscribe(RECORD_CHANGED_EVENT, self._on_record_changed)
+    
+    def publish(self, topic: str, data: Any = None) -> int:
+        """Add an event to the outbox (see OutboxEvent.enqueue)"""
+        return OutboxEvent.enqueue(topic, data)
+    
+    def start(self) -> None:
+        """Start relaying in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='outbox-relay', daemon=True)
+        self._thread.start()
+        logger.info("Outbox relay started")
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the relay thread, then dispatch what is still pending.
+        
+        Also called when the relay was never started (scripts, workers
+        without the web app): events written by the process are then
+        dispatched here, before the event bus shuts down.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        if Database().engine is None:
+            return
+        try:
+            self.run_pending()
+        except Exception as e:
+            logger.error(f"Outbox flush on shutdown failed: {e}")
+        logger.info("Outbox relay stopped")
+    
+    def run_pending(self) -> int:
+        """
+        Dispatch claimable events until none are left.
+        
+        Returns:
+            Number of events dispatched
+        """
+        dispatched = 0
+        while True:
+            events = self._claim()
+            if not events:
+                return dispatched
+            self._dispatch(events)
+            self._mark_dispatched([event.id for event in events])
+            dispatched += len(events)
+    
+    def replay(self, from_offset: int, to_offset: Optional[int] = None,
+               topic: Optional[str] = None, callback: Optional[Callable[[str, Any], None]] = None) -> int:
+        """
+        Publish stored events again, dispatched or not, in offset order.
+        
+        Args:
+            from_offset: First event id to replay
+            to_offset: Last event id to replay (default: the newest)
+            topic: Only replay events of this topic (optional)
+            callback: Receive (topic, data) instead of the EventBus (optional)
+        
+        Returns:
+            Number of events replayed
+        """
+        table = OutboxEvent.__table__
+        position = from_offset - 1
+        count = 0
+        while True:
+            stmt = select(table.c.id, table.c.topic, table.c.payload).where(table.c.id > position)
+            if to_offset is not None:
+                stmt = stmt.where(table.c.id <= to_offset)
+            if topic is not None:
+                stmt = stmt.where(table.c.topic == topic)
+            with Database().session_scope() as session:
+                events = session.execute(stmt.order_by(table.c.id).limit(self.batch_size)).all()
+            if not events:
+                return count
+            self._dispatch(events, callback)
+            position = events[-1].id
+            count += len(events)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pending event count and the newest dispatched offset"""
+        table = OutboxEvent.__table__
+        with Database().session_scope() as session:
+            pending = session.execute(
+                select(func.count()).select_from(table).where(table.c.dispatched_at.is_(None))
+            ).scalar()
+            last = session.execute(
+                select(table.c.id).where(table.c.dispatched_at.isnot(None)).order_by(table.c.id.desc()).limit(1)
+            ).scalar()
+        return {'pending': pending, 'last_dispatched_offset': last, 'running': self._thread is not None}
+    
+    def purge(self, before: datetime) -> int:
+        """Delete events dispatched before a point in time; returns the number deleted"""
+        return OutboxEvent.delete_where({'dispatched_at__lt': before})
+    
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Outbox relay error: {e}")
+            self._wake.wait(self.poll_interval)
+    
+    def _on_record_changed(self, data: Dict[str, Any]) -> None:
+        if data.get('model') == OutboxEvent.__tablename__:
+            self._wake.set()
+    
+    def _claim(self) -> List[Any]:
+        """Lease the oldest claimable batch to this relay"""
+        table = OutboxEvent.__table__
+        now = datetime.now()
+        claimable = (
+            select(table.c.id)
+            .where(table.c.dispatched_at.is_(None),
+                   or_(table.c.claimed_until.is_(None), table.c.claimed_until < now))
+            .order_by(table.c.id)
+            .limit(self.batch_size)
+            # Concurrent relays skip each other's rows instead of waiting (PostgreSQL)
+            .with_for_update(skip_locked=True)
+        )
+        with Database().get_session() as session:
+            events = session.execute(
+                update(table)
+                .where(table.c.id.in_(claimable.scalar_subquery()))
+                .values(claimed_by=self.relay_id, claimed_until=now + self.lease, attempts=table.c.attempts + 1)
+                .returning(table.c.id, table.c.topic, table.c.payload)
+            ).all()
+        return sorted(events, key=lambda event: event.id)
+    
+    def _dispatch(self, events: List[Any], callback: Optional[Callable[[str, Any], None]] = None) -> None:
+        publish = callback or self.event_bus.publish
+        for event in events:
+            data = json.loads(event.payload) if event.payload else None
+            if isinstance(data, dict):
+                data['_outbox_id'] = event.id
+            publish(event.topic, data)
+    
+    def _mark_dispatched(self, ids: List[int]) -> None:
+        table = OutboxEvent.__table__
+        with Database().get_session() as session:
+            session.execute(
+                update(table)
+                .where(table.c.id.in_(ids), table.c.claimed_by == self.relay_id)
+                .values(dispatched_at=datetime.now(), claimed_until=None)
+            )
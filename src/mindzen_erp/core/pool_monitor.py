@@ -0,0 +1,124 @@
+"""
+Pool Monitor - Connection pool telemetry
+
+Records how long callers wait for a pooled database connection so pool
+starvation can be told apart from slow queries.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the wait-time histogram buckets
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+class PoolMonitor:
+    """
+    Process-wide connection wait statistics.
+
+    Example:
+        PoolMonitor().stats({'sync': Database().engine.pool})
+        # {'checkouts': 120, 'wait_ms': {'le_1': 118, ...}, 'pools': {'sync': {'checked_out': 3, ...}}}
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance.slow_wait_ms = None
+            cls._instance.reset()
+        return cls._instance
+
+    def reset(self) -> None:
+        """Zero all counters"""
+        with self._lock:
+            self._buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        """Record one successful connection checkout"""
+        wait_ms = seconds * 1000
+        with self._lock:
+            self._buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.checkouts += 1
+            self.total_wait += seconds
+            if seconds > self.max_wait:
+                self.max_wait = seconds
+
+        if self.slow_wait_ms is not None and wait_ms >= self.slow_wait_ms:
+            logger.warning(f"Waited {wait_ms:.1f} ms for a database connection")
+
+    def record_timeout(self) -> None:
+        """Record a checkout that gave up after pool_timeout"""
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self, pools: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get pool occupancy and wait-time statistics.
+
+        Args:
+            pools: Pools to report occupancy for, by name (optional)
+
+        Returns:
+            Dictionary of counters, the wait-time histogram and per-pool occupancy
+        """
+        with self._lock:
+            histogram = {f'le_{bound}': count for bound, count in zip(WAIT_BUCKETS_MS, self._buckets)}
+            histogram['gt_' + str(WAIT_BUCKETS_MS[-1])] = self._buckets[-1]
+            stats = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': self.total_wait * 1000 / self.checkouts if self.checkouts else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+                'wait_ms': histogram
+            }
+
+        stats['pools'] = {name: self._occupancy(pool) for name, pool in (pools or {}).items()}
+        return stats
+
+    @staticmethod
+    def _occupancy(pool: Any) -> Dict[str, Any]:
+        occupancy = {'pool': type(pool).__name__}
+        # Only queue pools track size and overflow
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if callable(method):
+                occupancy[name.replace('checked', 'checked_')] = method()
+        return occupancy
+
+
+class _WaitTimingMixin:
+    """Report connection wait times of a queue pool to the PoolMonitor"""
+
+    def _do_get(self):
+        monitor = PoolMonitor()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            monitor.record_timeout()
+            raise
+        monitor.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class MonitoredQueuePool(_WaitTimingMixin, QueuePool):
+    """QueuePool that reports connection wait times to the PoolMonitor"""
+
+
+class MonitoredAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports connection wait times to the PoolMonitor"""
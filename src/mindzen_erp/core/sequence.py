@@ -0,0 +1,160 @@
+"""
+Document Sequences - Atomic numbering for quotations, orders and invoices
+
+Numbers come from a counter row per (prefix, fiscal year). Each worker
+process reserves a block of numbers with one UPDATE ... RETURNING and
+hands them out from memory, so issuing a number is O(1) and two workers
+can never issue the same one.
+"""
+
+import logging
+import os
+import threading
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, Integer, String, UniqueConstraint, insert, update
+
+from .admin_models import FinancialYear
+from .orm import BaseModel, Database, _current_session, upsert_insert
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentSequence(BaseModel):
+    """Next unreserved number of one document series"""
+    __tablename__ = 'document_sequences'
+    __table_args__ = (UniqueConstraint('prefix', 'fiscal_year', name='uq_document_sequence'),)
+
+    prefix = Column(String(20), nullable=False)
+    fiscal_year = Column(String(20), nullable=False)
+    next_value = Column(Integer, nullable=False, default=1)
+
+
+class SequenceService:
+    """
+    Issues document numbers such as 'INV-2025-00042'.
+
+    Every prefix has one series per fiscal year. Numbers are reserved from
+    the database in blocks of block_size per worker process: a block that
+    is not used up before the process exits leaves a gap, never a
+    duplicate. Use a block size of 1 for series that must stay as dense
+    as possible (only a rolled-back document then leaves a gap).
+
+    Example:
+        invoice_no = SequenceService().next_number('INV', invoice_date)
+    """
+
+    _instance = None
+
+    DEFAULT_BLOCK_SIZE = 20
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._blocks: Dict[tuple, List[int]] = {}
+            cls._instance._pid = os.getpid()
+            cls._instance.block_size = cls.DEFAULT_BLOCK_SIZE
+            cls._instance._block_sizes: Dict[str, int] = {}
+        return cls._instance
+
+    def set_block_size(self, block_size: int, prefix: Optional[str] = None) -> None:
+        """
+        Set how many numbers a worker reserves per database round trip.
+
+        Args:
+            block_size: Numbers per reservation (1 disables preallocation)
+            prefix: Series prefix, or None for the default of all series
+        """
+        if block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        if prefix is None:
+            self.block_size = block_size
+        else:
+            self._block_sizes[prefix] = block_size
+
+    def next_number(self, prefix: str, on_date: Optional[date] = None, padding: int = 5) -> str:
+        """
+        Issue the next number of a series.
+
+        Args:
+            prefix: Series prefix, e.g. 'INV'
+            on_date: Document date, selects the fiscal year (default: today)
+            padding: Minimum number of digits
+
+        Returns:
+            Formatted document number, e.g. 'INV-2025-00042'
+        """
+        fiscal_year = self.fiscal_year(on_date or date.today())
+        value = self.next_value(prefix, fiscal_year)
+        return f"{prefix}-{fiscal_year}-{value:0{padding}d}"
+
+    def next_value(self, prefix: str, fiscal_year: str) -> int:
+        """Issue the next raw counter value of a series"""
+        session = _current_session.get()
+        if session is not None and session.get_bind().dialect.name == 'sqlite':
+            # SQLite has a single writer: a separate connection would wait on the
+            # unit of work's own lock, so reserve inside it, one number at a time
+            return self._reserve(session, prefix, fiscal_year, 1)
+
+        key = (prefix, fiscal_year)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: blocks of the parent process are not ours
+                self._blocks.clear()
+                self._pid = os.getpid()
+
+            block = self._blocks.get(key)
+            if block is None or block[0] > block[1]:
+                size = self._block_sizes.get(prefix, self.block_size)
+                # Reserve in a short transaction of its own, so the counter row
+                # is not locked for the rest of the caller's unit of work
+                with Database().get_session() as reserve_session:
+                    first = self._reserve(reserve_session, prefix, fiscal_year, size)
+                block = self._blocks[key] = [first, first + size - 1]
+
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def fiscal_year(self, on_date: date) -> str:
+        """Series label of the fiscal year containing on_date (calendar year if none is defined)"""
+        years = FinancialYear.find_by(start_date__lte=on_date, end_date__gte=on_date, limit=1)
+        if years:
+            return str(years[0].start_date.year)
+        return str(on_date.year)
+
+    def reset(self) -> None:
+        """Forget preallocated blocks (their unused numbers become gaps)"""
+        with self._lock:
+            self._blocks.clear()
+
+    def _reserve(self, session, prefix: str, fiscal_year: str, count: int) -> int:
+        """Atomically take count numbers from the counter row; returns the first"""
+        table = DocumentSequence.__table__
+        stmt = (
+            update(table)
+            .where(table.c.prefix == prefix, table.c.fiscal_year == fiscal_year)
+            .values(next_value=table.c.next_value + count)
+            .returning(table.c.next_value)
+        )
+        end = session.execute(stmt).scalar()
+        if end is None:
+            self._create_series(session, prefix, fiscal_year)
+            end = session.execute(stmt).scalar_one()
+        return end - count
+
+    def _create_series(self, session, prefix: str, fiscal_year: str) -> None:
+        table = DocumentSequence.__table__
+        values = {'prefix': prefix, 'fiscal_year': fiscal_year, 'next_value': 1}
+        dialect_insert = upsert_insert(session.get_bind().dialect.name)
+        if dialect_insert is not None:
+            # Another worker may create the same series concurrently
+            stmt = dialect_insert(table).values(**values).on_conflict_do_nothing(
+                index_elements=['prefix', 'fiscal_year']
+            )
+            session.execute(stmt)
+        else:
+            session.execute(insert(table).values(**values))
+        logger.info(f"Created document series {prefix}/{fiscal_year}")
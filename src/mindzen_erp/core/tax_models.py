@@ -26,6 +26,7 @@ class TaxType(BaseModel):
 class TaxRate(BaseModel):
     """Tax Rate Mapping"""
     __tablename__ = 'tax_rates'
+    __cacheable__ = True
     
     regime_id = Column(Integer, ForeignKey('tax_regimes.id'))
     type_id = Column(Integer, ForeignKey('tax_types.id'))
@@ -5,6 +5,7 @@ Lead Controller - Business logic for leads
 import logging
 from typing import List, Optional, Dict, Any
 
+from mindzen_erp.core.orm import Database
 from ..models.lead import Lead
 from ..models.opportunity import Opportunity
 
@@ -80,7 +81,7 @@ class LeadController:
             List of Lead instances
         """
         if status:
-            return Lead.find_by(status=status)[:limit]
+            return Lead.find_by(status=status, limit=limit)
         return Lead.find_all(limit)
     
     def assign_lead(self, lead_id: int, user_id: int) -> Optional[Lead]:
@@ -95,6 +96,17 @@ class LeadController:
         logger.info(f"Assigned lead {lead_id} to user {user_id}")
         return lead
     
+    def assign_leads(self, lead_ids: List[int], user_id: int) -> int:
+        """
+        Assign many leads to a user with one UPDATE.
+        
+        Returns:
+            Number of leads reassigned
+        """
+        count = Lead.update_where({'id__in': list(lead_ids)}, {'assigned_to': user_id})
+        logger.info(f"Assigned {count} leads to user {user_id}")
+        return count
+    
     def convert_to_opportunity(self, lead_id: int, opportunity_data: Dict[str, Any] = None) -> Optional[Opportunity]:
         """
         Convert a lead to an opportunity.
@@ -106,6 +118,10 @@ class LeadController:
         Returns:
             Created Opportunity instance
         """
+        with Database().unit_of_work():
+            return self._convert_to_opportunity(lead_id, opportunity_data)
+    
+    def _convert_to_opportunity(self, lead_id: int, opportunity_data: Dict[str, Any] = None) -> Optional[Opportunity]:
         lead = Lead.find_by_id(lead_id)
         if not lead:
             logger.warning(f"Lead not found: {lead_id}")
@@ -130,9 +146,9 @@ class LeadController:
         
         logger.info(f"Converted lead {lead_id} to opportunity {opportunity.id}")
         
-        # Publish event
+        # Durable event: committed together with the conversion
         if self.engine:
-            self.engine.events.publish('crm.lead.converted', {
+            self.engine.outbox.publish('crm.lead.converted', {
                 'lead_id': lead_id,
                 'opportunity_id': opportunity.id
             })
@@ -151,23 +167,18 @@ class LeadController:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get lead statistics"""
-        all_leads = Lead.find_all(limit=10000)
-        
         stats = {
-            'total': len(all_leads),
+            'total': 0,
             'by_status': {},
             'by_source': {},
             'total_expected_revenue': 0.0
         }
         
-        for lead in all_leads:
-            # Count by status
-            stats['by_status'][lead.status] = stats['by_status'].get(lead.status, 0) + 1
-            
-            # Count by source
-            stats['by_source'][lead.source] = stats['by_source'].get(lead.source, 0) + 1
-            
-            # Sum expected revenue
-            stats['total_expected_revenue'] += lead.expected_revenue
+        # One GROUP BY query; status and source totals are rolled up from its rows
+        for row in Lead.aggregate(group_by=['status', 'source'], sums=['expected_revenue']):
+            stats['total'] += row['count']
+            stats['by_status'][row['status']] = stats['by_status'].get(row['status'], 0) + row['count']
+            stats['by_source'][row['source']] = stats['by_source'].get(row['source'], 0) + row['count']
+            stats['total_expected_revenue'] += row['expected_revenue'] or 0.0
         
         return stats
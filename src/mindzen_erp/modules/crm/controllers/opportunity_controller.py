@@ -74,7 +74,7 @@ class OpportunityController:
     def list_opportunities(self, stage: str = None, limit: int = 100) -> List[Opportunity]:
         """List opportunities with optional filtering"""
         if stage:
-            return Opportunity.find_by(stage=stage)[:limit]
+            return Opportunity.find_by(stage=stage, limit=limit)
         return Opportunity.find_all(limit)
     
     def move_to_stage(self, opp_id: int, stage: str) -> Optional[Opportunity]:
@@ -138,36 +138,33 @@ class OpportunityController:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get opportunity statistics"""
-        all_opps = Opportunity.find_all(limit=10000)
-        
         stats = {
-            'total': len(all_opps),
+            'total': 0,
             'by_stage': {},
-            'total_amount': Decimal('0.00'),
-            'total_expected_revenue': Decimal('0.00'),
+            'revenue_by_stage': {},
+            'total_amount': 0.0,
+            'total_expected_revenue': 0.0,
             'won_count': 0,
-            'won_amount': Decimal('0.00'),
+            'won_amount': 0.0,
             'lost_count': 0
         }
         
-        for opp in all_opps:
-            # Count by stage
-            stats['by_stage'][opp.stage] = stats['by_stage'].get(opp.stage, 0) + 1
-            
-            # Sum amounts
-            stats['total_amount'] += opp.amount
-            stats['total_expected_revenue'] += opp.expected_revenue
+        for row in Opportunity.aggregate(group_by=['stage'], sums=['amount', 'expected_revenue']):
+            stage = row['stage']
+            stats['total'] += row['count']
+            stats['by_stage'][stage] = row['count']
+            stats['revenue_by_stage'][stage] = {
+                'amount': float(row['amount']),
+                'expected_revenue': float(row['expected_revenue'])
+            }
+            stats['total_amount'] += float(row['amount'])
+            stats['total_expected_revenue'] += float(row['expected_revenue'])
             
             # Track wins/losses
-            if opp.stage == 'won':
-                stats['won_count'] += 1
-                stats['won_amount'] += opp.amount
-            elif opp.stage == 'lost':
-                stats['lost_count'] += 1
-        
-        # Convert Decimals to float for JSON serialization
-        stats['total_amount'] = float(stats['total_amount'])
-        stats['total_expected_revenue'] = float(stats['total_expected_revenue'])
-        stats['won_amount'] = float(stats['won_amount'])
+            if stage == 'won':
+                stats['won_count'] = row['count']
+                stats['won_amount'] = float(row['amount'])
+            elif stage == 'lost':
+                stats['lost_count'] = row['count']
         
         return stats
@@ -4,9 +4,12 @@ CRM Module Hooks - Integration with other modules
 
 import logging
 
+from mindzen_erp.core.hooks import hook_options
+
 logger = logging.getLogger(__name__)
 
 
+@hook_options(parallel=True)
 def on_module_installed(module_name):
     """
     Called when any module is installed.
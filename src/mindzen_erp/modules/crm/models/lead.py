@@ -9,8 +9,8 @@ class Lead(BaseModel):
     email = Column(String)
     phone = Column(String)
     company = Column(String)
-    status = Column(String, default="new")  # new, contacted, qualified, lost
-    source = Column(String, default="website")
+    status = Column(String, default="new", index=True)  # new, contacted, qualified, lost
+    source = Column(String, default="website", index=True)
     priority = Column(String, default="medium")
     notes = Column(String)
     expected_revenue = Column(Float, default=0.0)
@@ -14,7 +14,7 @@ class Opportunity(BaseModel):
     probability = Column(Integer, default=50)
     expected_revenue = Column(Float, default=0.0)
     
-    stage = Column(String, default="qualification")
+    stage = Column(String, default="qualification", index=True)
     assigned_to = Column(Integer, nullable=True)
     notes = Column(Text)
     
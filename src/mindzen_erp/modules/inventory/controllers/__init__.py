@@ -3,8 +3,10 @@ Inventory Module Controllers
 """
 from mindzen_erp.modules.inventory.models import (
     Product, ProductCategory, UOM, ProductUOM, ProductPrice,
-    Warehouse, StockLedger, StockEntry
+    Warehouse, StockLedger, StockBalance, StockRepostRequest, StockEntry
 )
+from mindzen_erp.modules.inventory.controllers.valuation import StockValuationEngine
+from mindzen_erp.modules.inventory.controllers.reposting import StockRepostWorker
 
 class ProductController:
     """Product Master Controller"""
@@ -17,16 +19,15 @@ class ProductController:
         product = Product.create(data)
         return product
     
-    def list_products(self, category_id=None, product_type=None):
+    def list_products(self, category_id=None, product_type=None, limit=100):
         """List all products with filters"""
-        query = Product.find_all()
-        
+        filters = {}
         if category_id:
-            query = [p for p in query if p.category_id == category_id]
+            filters['category_id'] = category_id
         if product_type:
-            query = [p for p in query if p.product_type == product_type]
+            filters['product_type'] = product_type
         
-        return query
+        return Product.load('with_category').find_by(limit=limit, **filters)
     
     def get_product(self, product_id):
         """Get product by ID"""
@@ -67,37 +68,56 @@ class WarehouseController:
         """List all active warehouses"""
         return Warehouse.find_by(is_active=True)
     
-    def get_stock_balance(self, product_id, warehouse_id=None):
-        """Get current stock balance for product"""
-        query = StockLedger.find_by(product_id=product_id)
-        
+    def post_stock(self, entries):
+        """Post stock ledger entries and update the stock bins"""
+        return StockLedger.post(entries)
+    
+    def run_valuation(self, method=None):
+        """Value stock ledger entries posted since the last run (method from config unless given)"""
+        config = self.engine.config if self.engine else None
+        if method is None:
+            method = config.get('inventory.valuation_method', 'moving_average') if config else 'moving_average'
+        batch_size = config.get('inventory.valuation_batch_size', 5000) if config else 5000
+        return StockValuationEngine(method, batch_size).run()
+    
+    def get_repost_progress(self):
+        """Queued, running and failed reposts with their progress"""
+        open_states = [StockRepostRequest.QUEUED, StockRepostRequest.RUNNING, StockRepostRequest.FAILED]
+        fields = ['product_id', 'warehouse_id', 'status', 'from_date', 'position_date', 'processed', 'total', 'error']
+        return [{
+            **row._asdict(),
+            'processed': row.processed or 0,
+            'total': row.total or 0
+        } for row in StockRepostRequest.find_values(fields, status__in=open_states, order_by='from_date')]
+    
+    def get_stock_balance(self, product_id, warehouse_id=None, batch_no=None):
+        """Get current stock balance for product (all warehouses/batches unless given)"""
+        filters = {'product_id': product_id}
         if warehouse_id:
-            query = [s for s in query if s.warehouse_id == warehouse_id]
-        
-        if query:
-            # Return the latest balance
-            latest = sorted(query, key=lambda x: x.posting_date, reverse=True)[0]
-            return latest.qty_after_transaction
+            filters['warehouse_id'] = warehouse_id
+        if batch_no is not None:
+            filters['batch_no'] = batch_no
         
-        return 0
+        totals = StockBalance.aggregate(sums=['actual_qty'], counts=False, **filters)
+        return totals[0]['actual_qty']
     
     def get_stock_summary(self, warehouse_id=None):
-        """Get stock summary for all products"""
-        # This would typically be a complex query
-        # For now, return basic structure
-        products = Product.find_all()
-        summary = []
-        
-        for product in products:
-            balance = self.get_stock_balance(product.id, warehouse_id)
-            if balance > 0:
-                summary.append({
-                    'product': product,
-                    'balance': balance,
-                    'uom': product.base_uom
-                })
+        """Get stock summary for all products in stock"""
+        filters = {'warehouse_id': warehouse_id} if warehouse_id else {}
+        balances = {
+            row['product_id']: row['actual_qty']
+            for row in StockBalance.aggregate(group_by=['product_id'], sums=['actual_qty'], counts=False, **filters)
+            if row['actual_qty'] > 0
+        }
+        if not balances:
+            return []
         
-        return summary
+        products = Product.load('with_uom').find_by(id__in=list(balances), order_by='id')
+        return [{
+            'product': product,
+            'balance': balances[product.id],
+            'uom': product.base_uom
+        } for product in products]
 
 
-__all__ = ['ProductController', 'WarehouseController']
+__all__ = ['ProductController', 'WarehouseController', 'StockValuationEngine', 'StockRepostWorker']
@@ -0,0 +1,172 @@
+"""
+Stock Reposting - Recompute the ledger after backdated postings
+
+StockLedger.post() queues a StockRepostRequest when an entry is dated
+before entries already posted for its product and warehouse. The worker
+here drains that queue in a background thread: it replays the pair's
+ledger and rewrites qty_after_transaction and valuation from the request
+date on, one batch per transaction, so live postings interleave with it.
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, update
+
+from mindzen_erp.core.orm import Database
+from mindzen_erp.modules.inventory.controllers.valuation import StockValuationEngine
+from mindzen_erp.modules.inventory.models import StockLedger, StockRepostRequest
+
+logger = logging.getLogger(__name__)
+
+
+class StockRepostWorker:
+    """
+    Drains the stock repost queue.
+    
+    Requests are claimed with a conditional UPDATE and a time-limited
+    lease, renewed after every batch, so several workers may share one
+    queue. A request whose lease expired (its worker died) is queued
+    again. A request re-queued while it runs (another backdated posting)
+    is picked up again once the current pass finishes.
+    
+    Example:
+        worker = StockRepostWorker(method='fifo')
+        worker.start()
+        ...
+        worker.stop()
+    """
+    
+    def __init__(self, method: str = 'moving_average', batch_size: int = 5000, poll_interval: float = 5.0,
+                 lease_seconds: int = 300):
+        self.valuation = StockValuationEngine(method, batch_size)
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='stock-repost', daemon=True)
+        self._thread.start()
+        logger.info("Stock repost worker started")
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread after the batch in progress"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("Stock repost worker stopped")
+    
+    def run_pending(self) -> int:
+        """
+        Process queued requests until the queue is empty.
+        
+        Returns:
+            Number of requests processed
+        """
+        self._requeue_expired()
+        processed = 0
+        while not self._stop.is_set():
+            request = self._claim()
+            if request is None:
+                break
+            self._process(*request)
+            processed += 1
+        return processed
+    
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if not self.run_pending():
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Stock repost worker error: {e}")
+                self._stop.wait(self.poll_interval)
+    
+    def _requeue_expired(self) -> None:
+        """Queue running requests again whose worker stopped renewing its lease"""
+        table = StockRepostRequest.__table__
+        with Database().session_scope() as session:
+            session.execute(
+                update(table)
+                .where(table.c.status == StockRepostRequest.RUNNING,
+                       (table.c.claimed_until.is_(None)) | (table.c.claimed_until < datetime.now()))
+                .values(status=StockRepostRequest.QUEUED, claimed_by=None, claimed_until=None)
+            )
+    
+    def _claim(self):
+        """Mark the request with the earliest date as running; returns (id, product, warehouse, from_date)"""
+        table = StockRepostRequest.__table__
+        with Database().get_session() as session:
+            while True:
+                request_id = session.execute(
+                    select(table.c.id)
+                    .where(table.c.status == StockRepostRequest.QUEUED)
+                    .order_by(table.c.from_date)
+                    .limit(1)
+                ).scalar()
+                if request_id is None:
+                    return None
+                
+                claimed = session.execute(
+                    update(table)
+                    .where(table.c.id == request_id, table.c.status == StockRepostRequest.QUEUED)
+                    .values(status=StockRepostRequest.RUNNING, processed=0, position_date=None,
+                            claimed_by=self.worker_id, claimed_until=datetime.now() + self.lease)
+                    .returning(table.c.product_id, table.c.warehouse_id, table.c.from_date)
+                ).first()
+                if claimed is not None:
+                    break
+                # Another worker claimed it first; try the next one
+            
+            ledger = StockLedger.__table__
+            total = session.execute(
+                select(func.count())
+                .where(ledger.c.product_id == claimed.product_id, ledger.c.warehouse_id == claimed.warehouse_id,
+                       ledger.c.posting_date >= claimed.from_date)
+            ).scalar()
+            session.execute(update(table).where(table.c.id == request_id).values(total=total))
+        return request_id, claimed.product_id, claimed.warehouse_id, claimed.from_date
+    
+    def _process(self, request_id: int, product_id: int, warehouse_id: int, from_date: datetime) -> None:
+        table = StockRepostRequest.__table__
+        # Only while this worker still holds the request
+        claimed = {'id': request_id, 'status': StockRepostRequest.RUNNING, 'claimed_by': self.worker_id}
+        running = (table.c.id == request_id) & (table.c.status == StockRepostRequest.RUNNING) \
+            & (table.c.claimed_by == self.worker_id)
+        
+        def report(processed: int, position_date: datetime) -> None:
+            # Runs inside the batch's transaction, so progress and ledger commit together
+            with Database().session_scope() as session:
+                session.execute(
+                    update(table)
+                    .where(running)
+                    .values(processed=processed, position_date=position_date,
+                            claimed_until=datetime.now() + self.lease)
+                )
+        
+        try:
+            count = self.valuation.value_pair(product_id, warehouse_id, rewrite_from=from_date, progress=report)
+        except Exception as e:
+            logger.error(f"Repost of product {product_id} in warehouse {warehouse_id} failed: {e}")
+            StockRepostRequest.update_where(
+                claimed, {'status': StockRepostRequest.FAILED, 'error': str(e), 'claimed_until': None}
+            )
+            return
+        
+        # Left queued if a backdated posting arrived meanwhile
+        StockRepostRequest.update_where(claimed, {'status': StockRepostRequest.COMPLETED, 'claimed_until': None})
+        logger.info(f"Reposted {count} entries of product {product_id} in warehouse {warehouse_id} "
+                    f"from {from_date}")
+
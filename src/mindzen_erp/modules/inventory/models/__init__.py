@@ -12,6 +12,10 @@ from .product import (
 from .warehouse import (
     Warehouse,
     StockLedger,
+    StockBalance,
+    StockValuationCheckpoint,
+    StockValuationSnapshot,
+    StockRepostRequest,
     StockEntry,
     StockEntryItem
 )
@@ -25,6 +29,10 @@ __all__ = [
     'ProductPrice',
     'Warehouse',
     'StockLedger',
+    'StockBalance',
+    'StockValuationCheckpoint',
+    'StockValuationSnapshot',
+    'StockRepostRequest',
     'StockEntry',
     'StockEntryItem'
 ]
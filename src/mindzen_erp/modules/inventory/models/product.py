@@ -9,6 +9,7 @@ from mindzen_erp.core.orm import BaseModel
 class UOM(BaseModel):
     """Unit of Measure Master (Piece, Carton, Box, Kg, etc.)"""
     __tablename__ = 'uoms'
+    __cacheable__ = True
     
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False, unique=True)  # e.g., "Piece", "Carton"
@@ -40,6 +41,12 @@ class ProductCategory(BaseModel):
 class Product(BaseModel):
     """Product Master - Core of the ERP"""
     __tablename__ = 'products'
+    __cacheable__ = True
+    __load_plans__ = {
+        'with_category': ['category'],
+        'with_uom': ['base_uom'],
+        'with_prices': ['prices', 'uom_conversions']
+    }
     
     id = Column(Integer, primary_key=True)
     name = Column(String(300), nullable=False)
@@ -1,10 +1,16 @@
 """
 Warehouse and Stock Management Models
 """
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Numeric, DateTime, Text
+from sqlalchemy import (
+    Column, Integer, String, Boolean, ForeignKey, Numeric, DateTime, Text, Index, UniqueConstraint,
+    case, delete, event, insert, inspect, select, tuple_, update
+)
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from datetime import datetime
-from mindzen_erp.core.orm import BaseModel
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+from mindzen_erp.core.orm import BaseModel, Database, upsert_insert
 
 class Warehouse(BaseModel):
     """Warehouse Master"""
@@ -29,6 +35,10 @@ class Warehouse(BaseModel):
 class StockLedger(BaseModel):
     """Stock Ledger"""
     __tablename__ = 'stock_ledger'
+    __table_args__ = (
+        # Posting order within an item-warehouse, as walked by the valuation engine
+        Index('ix_stock_ledger_posting_order', 'product_id', 'warehouse_id', 'posting_date', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     posting_date = Column(DateTime, default=datetime.now, nullable=False)
@@ -47,11 +57,307 @@ class StockLedger(BaseModel):
     
     product = relationship("Product")
     warehouse = relationship("Warehouse")
+    
+    @classmethod
+    def post(cls, entries: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert ledger rows and apply them to the stock bins in one transaction.
+        
+        qty_after_transaction of each row is set to its bin's quantity
+        after that row (bins are keyed by product, warehouse and batch).
+        Entries dated before the latest existing entry of their product and
+        warehouse queue a repost of everything after them.
+        
+        Args:
+            entries: Ledger column dictionaries; qty is signed (negative for issues)
+            
+        Returns:
+            Primary keys of the inserted ledger rows
+        """
+        if not entries:
+            return []
+        
+        with Database().unit_of_work() as session:
+            for (product_id, warehouse_id), from_date in cls._backdated(session, entries).items():
+                StockRepostRequest.enqueue(product_id, warehouse_id, from_date)
+            
+            deltas = StockBalance.apply(entries)
+            
+            # Walk each bin forward from its quantity before this posting
+            running = {key: after - qty for key, (qty, after) in deltas.items()}
+            rows = []
+            for entry in entries:
+                key = StockBalance.bin_key(entry)
+                running[key] += Decimal(str(entry['qty']))
+                rows.append({**entry, 'qty_after_transaction': running[key]})
+            return cls.bulk_create(rows)
+    
+    @classmethod
+    def _backdated(cls, session, entries: List[Dict[str, Any]]) -> Dict[Tuple[int, int], datetime]:
+        """Earliest posting date per (product, warehouse) that precedes already posted entries"""
+        earliest: Dict[Tuple[int, int], datetime] = {}
+        for entry in entries:
+            if entry.get('posting_date') is not None:
+                pair = (entry['product_id'], entry['warehouse_id'])
+                if pair not in earliest or entry['posting_date'] < earliest[pair]:
+                    earliest[pair] = entry['posting_date']
+        if not earliest:
+            return {}
+        
+        table = cls.__table__
+        latest = session.execute(
+            select(table.c.product_id, table.c.warehouse_id, func.max(table.c.posting_date))
+            .where(tuple_(table.c.product_id, table.c.warehouse_id).in_(list(earliest)))
+            .group_by(table.c.product_id, table.c.warehouse_id)
+        )
+        return {
+            (product_id, warehouse_id): earliest[(product_id, warehouse_id)]
+            for product_id, warehouse_id, last_date in latest
+            if earliest[(product_id, warehouse_id)] < last_date
+        }
+
+
+class StockBalance(BaseModel):
+    """
+    Current stock per (product, warehouse, batch) bin.
+    
+    Maintained by StockLedger.post() in the same transaction as the ledger
+    rows, so a balance is one indexed read instead of a ledger scan.
+    """
+    __tablename__ = 'stock_balance'
+    __table_args__ = (
+        UniqueConstraint('product_id', 'warehouse_id', 'batch_no', name='uq_stock_balance_bin'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    warehouse_id = Column(Integer, ForeignKey('warehouses.id'), nullable=False, index=True)
+    batch_no = Column(String(100), nullable=False, default='')  # '' when not batch-tracked
+    actual_qty = Column(Numeric(12, 4), nullable=False, default=0)
+    stock_value = Column(Numeric(15, 2), nullable=False, default=0)
+    
+    product = relationship("Product")
+    warehouse = relationship("Warehouse")
+    
+    @staticmethod
+    def bin_key(entry: Dict[str, Any]) -> Tuple[int, int, str]:
+        return entry['product_id'], entry['warehouse_id'], entry.get('batch_no') or ''
+    
+    @classmethod
+    def apply(cls, entries: List[Dict[str, Any]]) -> Dict[Tuple[int, int, str], Tuple[Decimal, Decimal]]:
+        """
+        Add ledger quantities and values to their bins, creating missing bins.
+        
+        Returns:
+            {bin key: (quantity added, bin quantity afterwards)}
+        """
+        deltas: Dict[Tuple[int, int, str], List[Decimal]] = {}
+        for entry in entries:
+            delta = deltas.setdefault(cls.bin_key(entry), [Decimal('0'), Decimal('0')])
+            delta[0] += Decimal(str(entry['qty']))
+            delta[1] += Decimal(str(entry.get('stock_value_difference') or 0))
+        
+        table = cls.__table__
+        result = {}
+        ids = []
+        db = Database()
+        with db.session_scope() as session:
+            dialect_insert = upsert_insert(session.get_bind().dialect.name)
+            # Fixed bin order keeps concurrent postings from deadlocking on row locks
+            for key in sorted(deltas):
+                qty, value = deltas[key]
+                product_id, warehouse_id, batch_no = key
+                if dialect_insert is not None:
+                    stmt = dialect_insert(table).values(
+                        product_id=product_id, warehouse_id=warehouse_id, batch_no=batch_no,
+                        actual_qty=qty, stock_value=value
+                    )
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['product_id', 'warehouse_id', 'batch_no'],
+                        set_={
+                            'actual_qty': table.c.actual_qty + stmt.excluded.actual_qty,
+                            'stock_value': table.c.stock_value + stmt.excluded.stock_value,
+                            'updated_at': func.now(),
+                        }
+                    ).returning(table.c.id, table.c.actual_qty)
+                    row = session.execute(stmt).one()
+                else:
+                    row = session.execute(
+                        update(table)
+                        .where(table.c.product_id == product_id, table.c.warehouse_id == warehouse_id,
+                               table.c.batch_no == batch_no)
+                        .values(actual_qty=table.c.actual_qty + qty, stock_value=table.c.stock_value + value)
+                        .returning(table.c.id, table.c.actual_qty)
+                    ).first()
+                    if row is None:
+                        row = session.execute(
+                            insert(table).values(
+                                product_id=product_id, warehouse_id=warehouse_id, batch_no=batch_no,
+                                actual_qty=qty, stock_value=value
+                            ).returning(table.c.id, table.c.actual_qty)
+                        ).one()
+                ids.append(row.id)
+                result[key] = (qty, row.actual_qty)
+        db.record_changes(cls.__tablename__, ids)
+        return result
+    
+    @classmethod
+    def rebuild(cls) -> None:
+        """Recompute every bin from the stock ledger (e.g. for ledgers posted before bins existed)"""
+        db = Database()
+        with db.unit_of_work() as session:
+            session.execute(delete(cls.__table__))
+            session.execute(cls._insert_ledger_totals())
+            db.record_changes(cls.__tablename__, None)
+    
+    @classmethod
+    def _insert_ledger_totals(cls):
+        """INSERT ... SELECT of the ledger's quantity and value totals per bin"""
+        ledger = StockLedger.__table__
+        batch_no = func.coalesce(ledger.c.batch_no, '')
+        totals = select(
+            ledger.c.product_id, ledger.c.warehouse_id, batch_no,
+            func.sum(ledger.c.qty), func.coalesce(func.sum(ledger.c.stock_value_difference), 0)
+        ).group_by(ledger.c.product_id, ledger.c.warehouse_id, batch_no)
+        return insert(cls.__table__).from_select(
+            ['product_id', 'warehouse_id', 'batch_no', 'actual_qty', 'stock_value'], totals
+        )
+
+
+@event.listens_for(StockBalance.__table__, 'after_create')
+def _backfill_stock_balance(table, connection, **kw):
+    """Fill the bins from a ledger posted before the stock_balance table existed"""
+    if inspect(connection).has_table(StockLedger.__tablename__):
+        connection.execute(StockBalance._insert_ledger_totals())
+
+
+class StockValuationCheckpoint(BaseModel):
+    """
+    Valuation progress of one (product, warehouse).
+    
+    Records the last ledger entry valued, in posting order, and the
+    running valuation state after it (JSON), so the next run resumes there.
+    """
+    __tablename__ = 'stock_valuation_checkpoints'
+    __table_args__ = (
+        UniqueConstraint('product_id', 'warehouse_id', name='uq_stock_valuation_checkpoint'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    warehouse_id = Column(Integer, ForeignKey('warehouses.id'), nullable=False)
+    method = Column(String(20), nullable=False)
+    last_posting_date = Column(DateTime)
+    last_ledger_id = Column(Integer)
+    state = Column(Text)
+
+
+class StockValuationSnapshot(BaseModel):
+    """
+    Valuation state of one (product, warehouse) after a valued batch.
+    
+    Unlike the checkpoint, earlier snapshots are kept: a repost resumes
+    from the last snapshot before its date instead of the first entry.
+    """
+    __tablename__ = 'stock_valuation_snapshots'
+    __table_args__ = (
+        Index('ix_stock_valuation_snapshot_position', 'product_id', 'warehouse_id', 'last_posting_date'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    warehouse_id = Column(Integer, ForeignKey('warehouses.id'), nullable=False)
+    method = Column(String(20), nullable=False)
+    last_posting_date = Column(DateTime, nullable=False)
+    last_ledger_id = Column(Integer, nullable=False)
+    state = Column(Text)
+
+
+class StockRepostRequest(BaseModel):
+    """
+    Pending recomputation of one (product, warehouse) from from_date onwards.
+    
+    There is one row per pair: a new request for a pair that is already
+    queued keeps the earlier date, so repeated backdated postings coalesce
+    into a single repost.
+    """
+    __tablename__ = 'stock_repost_queue'
+    __table_args__ = (
+        UniqueConstraint('product_id', 'warehouse_id', name='uq_stock_repost_pair'),
+    )
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    warehouse_id = Column(Integer, ForeignKey('warehouses.id'), nullable=False)
+    from_date = Column(DateTime, nullable=False)
+    status = Column(String(20), nullable=False, default=QUEUED, index=True)
+    # Progress of a running repost
+    total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    position_date = Column(DateTime)
+    error = Column(Text)
+    # Set while a worker runs the request; an expired claim is queued again
+    claimed_by = Column(String(100))
+    claimed_until = Column(DateTime)
+    
+    @classmethod
+    def enqueue(cls, product_id: int, warehouse_id: int, from_date: datetime) -> None:
+        """Request a repost of a pair from from_date, merging with a pending request"""
+        table = cls.__table__
+        
+        def earlier(a, b):
+            return case((a < b, a), else_=b)
+        
+        with Database().session_scope() as session:
+            dialect_insert = upsert_insert(session.get_bind().dialect.name)
+            if dialect_insert is not None:
+                stmt = dialect_insert(table).values(
+                    product_id=product_id, warehouse_id=warehouse_id, from_date=from_date, status=cls.QUEUED
+                )
+                new_date = stmt.excluded.from_date
+            else:
+                stmt = None
+                new_date = from_date
+            
+            values = {
+                # A running repost has already recomputed entries before its position
+                'from_date': case(
+                    (table.c.status == cls.QUEUED, earlier(table.c.from_date, new_date)),
+                    (table.c.status == cls.RUNNING,
+                     earlier(func.coalesce(table.c.position_date, table.c.from_date), new_date)),
+                    else_=new_date
+                ),
+                'status': cls.QUEUED,
+                'error': None,
+            }
+            if stmt is not None:
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=['product_id', 'warehouse_id'], set_=values
+                ))
+                return
+            
+            updated = session.execute(
+                update(table)
+                .where(table.c.product_id == product_id, table.c.warehouse_id == warehouse_id)
+                .values(**values)
+            ).rowcount
+            if not updated:
+                session.execute(insert(table).values(
+                    product_id=product_id, warehouse_id=warehouse_id, from_date=from_date, status=cls.QUEUED
+                ))
 
 
 class StockEntry(BaseModel):
     """Stock Entry"""
     __tablename__ = 'stock_entries'
+    __load_plans__ = {
+        'with_items_and_products': ['from_warehouse', 'to_warehouse', 'items.product']
+    }
     
     id = Column(Integer, primary_key=True)
     entry_no = Column(String(50), unique=True, nullable=False)
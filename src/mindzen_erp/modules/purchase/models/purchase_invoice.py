@@ -9,6 +9,9 @@ from mindzen_erp.core.orm import BaseModel
 class PurchaseInvoice(BaseModel):
     """Purchase Invoice / Bill"""
     __tablename__ = 'purchase_invoices'
+    __load_plans__ = {
+        'with_items_and_products': ['vendor', 'items.product']
+    }
     
     id = Column(Integer, primary_key=True)
     purchase_no = Column(String(50), unique=True, nullable=False)
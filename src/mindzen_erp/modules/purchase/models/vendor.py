@@ -7,6 +7,7 @@ from mindzen_erp.core.orm import BaseModel
 class Vendor(BaseModel):
     """Vendor Master"""
     __tablename__ = 'vendors'
+    __cacheable__ = True
     
     id = Column(Integer, primary_key=True)
     name = Column(String(200), nullable=False)
@@ -7,8 +7,19 @@ from mindzen_erp.modules.sales.models import (
     SalesInvoice, SalesInvoiceItem
 )
 from mindzen_erp.modules.inventory.models import Product, UOM, ProductUOM
+from mindzen_erp.core.orm import Database
+from mindzen_erp.core.sequence import SequenceService
 from datetime import date, timedelta
 
+
+def _load_products(items_data):
+    """Fetch each distinct product referenced by the line items once"""
+    return {
+        product_id: Product.find_by_id(product_id)
+        for product_id in {item_data['product_id'] for item_data in items_data}
+    }
+
+
 class CustomerController:
     """Customer Management"""
     
@@ -37,39 +48,30 @@ class QuotationController:
     
     def create_quotation(self, data, items_data):
         """Create new quotation with line items"""
-        # Generate quotation number
-        last_quot = Quotation.find_all()
-        quot_no = f"QT-{len(last_quot) + 1:05d}"
-        
-        data['quotation_no'] = quot_no
-        data['quotation_date'] = date.today()
-        data['valid_till'] = date.today() + timedelta(days=30)
-        data['status'] = 'draft'
-        
-        quotation = Quotation.create(data)
-        
-        # Add line items
-        for item_data in items_data:
-            product = Product.find_by_id(item_data['product_id'])
-            uom = UOM.find_by_id(item_data['uom_id'])
+        with Database().unit_of_work():
+            data['quotation_no'] = SequenceService().next_number('QT')
+            data['quotation_date'] = date.today()
+            data['valid_till'] = date.today() + timedelta(days=30)
+            data['status'] = 'draft'
             
-            item = QuotationItem.create({
+            quotation = Quotation.create(data)
+            
+            # Add line items
+            products = _load_products(items_data)
+            QuotationItem.bulk_create([{
                 'quotation_id': quotation.id,
                 'product_id': item_data['product_id'],
                 'uom_id': item_data['uom_id'],
                 'qty': item_data['qty'],
-                'rate': item_data.get('rate', product.sale_rate),
-                'vat_rate': product.vat_rate,
+                'rate': item_data.get('rate', products[item_data['product_id']].sale_rate),
+                'vat_rate': products[item_data['product_id']].vat_rate,
                 'discount_percent': item_data.get('discount_percent', 0)
-            })
+            } for item_data in items_data])
             
-            item.calculate_amounts()
-            item.save()
-        
-        quotation.calculate_totals()
-        quotation.save()
-        
-        return quotation
+            quotation.calculate_totals()
+            quotation.save()
+            
+            return quotation
     
     def list_quotations(self):
         """List all quotations"""
@@ -81,33 +83,34 @@ class QuotationController:
     
     def convert_to_sales_order(self, quotation_id):
         """Convert quotation to sales order"""
-        quotation = self.get_quotation(quotation_id)
-        
-        # Create sales order from quotation
-        order_controller = SalesOrderController(self.engine)
-        order_data = {
-            'customer_id': quotation.customer_id,
-            'quotation_id': quotation.id,
-            'payment_terms': quotation.customer.payment_terms
-        }
-        
-        items_data = []
-        for item in quotation.items:
-            items_data.append({
-                'product_id': item.product_id,
-                'uom_id': item.uom_id,
-                'qty': item.qty,
-                'rate': item.rate,
-                'discount_percent': item.discount_percent
-            })
-        
-        sales_order = order_controller.create_sales_order(order_data, items_data)
-        
-        # Update quotation status
-        quotation.status = 'accepted'
-        quotation.save()
-        
-        return sales_order
+        with Database().unit_of_work():
+            quotation = Quotation.load('with_items').find_by_id(quotation_id)
+            
+            # Create sales order from quotation
+            order_controller = SalesOrderController(self.engine)
+            order_data = {
+                'customer_id': quotation.customer_id,
+                'quotation_id': quotation.id,
+                'payment_terms': quotation.customer.payment_terms
+            }
+            
+            items_data = []
+            for item in quotation.items:
+                items_data.append({
+                    'product_id': item.product_id,
+                    'uom_id': item.uom_id,
+                    'qty': item.qty,
+                    'rate': item.rate,
+                    'discount_percent': item.discount_percent
+                })
+            
+            sales_order = order_controller.create_sales_order(order_data, items_data)
+            
+            # Update quotation status
+            quotation.status = 'accepted'
+            quotation.save()
+            
+            return sales_order
 
 
 class SalesOrderController:
@@ -118,37 +121,29 @@ class SalesOrderController:
     
     def create_sales_order(self, data, items_data):
         """Create new sales order"""
-        # Generate order number
-        last_order = SalesOrder.find_all()
-        order_no = f"SO-{len(last_order) + 1:05d}"
-        
-        data['order_no'] = order_no
-        data['order_date'] = date.today()
-        data['status'] = 'draft'
-        
-        order = SalesOrder.create(data)
-        
-        # Add line items
-        for item_data in items_data:
-            product = Product.find_by_id(item_data['product_id'])
+        with Database().unit_of_work():
+            data['order_no'] = SequenceService().next_number('SO')
+            data['order_date'] = date.today()
+            data['status'] = 'draft'
+            
+            order = SalesOrder.create(data)
             
-            item = SalesOrderItem.create({
+            # Add line items
+            products = _load_products(items_data)
+            SalesOrderItem.bulk_create([{
                 'sales_order_id': order.id,
                 'product_id': item_data['product_id'],
                 'uom_id': item_data['uom_id'],
                 'qty': item_data['qty'],
-                'rate': item_data.get('rate', product.sale_rate),
-                'vat_rate': product.vat_rate,
+                'rate': item_data.get('rate', products[item_data['product_id']].sale_rate),
+                'vat_rate': products[item_data['product_id']].vat_rate,
                 'discount_percent': item_data.get('discount_percent', 0)
-            })
+            } for item_data in items_data])
             
-            item.calculate_amounts()
-            item.save()
-        
-        order.calculate_totals()
-        order.save()
-        
-        return order
+            order.calculate_totals()
+            order.save()
+            
+            return order
     
     def list_orders(self):
         """List all sales orders"""
@@ -174,25 +169,21 @@ class SalesInvoiceController:
     
     def create_invoice_from_order(self, order_id):
         """Create invoice from sales order"""
-        order = SalesOrder.find_by_id(order_id)
-        
-        # Generate invoice number
-        last_invoice = SalesInvoice.find_all()
-        invoice_no = f"INV-{len(last_invoice) + 1:05d}"
-        
-        invoice = SalesInvoice.create({
-            'invoice_no': invoice_no,
-            'invoice_date': date.today(),
-            'customer_id': order.customer_id,
-            'sales_order_id': order.id,
-            'customer_vat_no': order.customer.vat_no,
-            'status': 'draft',
-            'payment_status': 'unpaid'
-        })
-        
-        # Add line items from order
-        for order_item in order.items:
-            item = SalesInvoiceItem.create({
+        with Database().unit_of_work():
+            order = SalesOrder.load('with_items_and_products').find_by_id(order_id)
+            
+            invoice = SalesInvoice.create({
+                'invoice_no': SequenceService().next_number('INV'),
+                'invoice_date': date.today(),
+                'customer_id': order.customer_id,
+                'sales_order_id': order.id,
+                'customer_vat_no': order.customer.vat_no,
+                'status': 'draft',
+                'payment_status': 'unpaid'
+            })
+            
+            # Add line items from order
+            SalesInvoiceItem.bulk_create([{
                 'invoice_id': invoice.id,
                 'product_id': order_item.product_id,
                 'uom_id': order_item.uom_id,
@@ -200,22 +191,24 @@ class SalesInvoiceController:
                 'hsn_code': order_item.product.hsn_code,
                 'qty': order_item.qty,
                 'rate': order_item.rate,
-                'vat_rate': order_item.vat_rate,
+                'tax_rate': order_item.vat_rate,
                 'discount_percent': order_item.discount_percent
-            })
+            } for order_item in order.items])
             
-            item.calculate_amounts()
-            item.save()
-        
-        invoice.calculate_totals()
-        invoice.save()
-        
-        return invoice
+            invoice.calculate_totals()
+            invoice.save()
+            
+            return invoice
     
     def list_invoices(self):
         """List all invoices"""
         return SalesInvoice.find_all()
     
+    def get_totals_by_status(self):
+        """Invoice count and amounts per status, totalled in the database"""
+        rows = SalesInvoice.aggregate(group_by=['status'], sums=['total_amount', 'paid_amount', 'balance_amount'])
+        return {row.pop('status'): row for row in rows}
+    
     def get_invoice(self, invoice_id):
         """Get invoice by ID"""
         return SalesInvoice.find_by_id(invoice_id)
@@ -6,6 +6,7 @@ import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+from mindzen_erp.core.sequence import SequenceService
 from ..models.sale_order import SaleOrder, SaleOrderLine
 
 logger = logging.getLogger(__name__)
@@ -18,8 +19,7 @@ class SaleController:
         """Create a new quotation/order"""
         # Generate sequence name if not provided
         if not data.get('name'):
-            count = len(SaleOrder.find_all()) + 1
-            data['name'] = f"SO{str(count).zfill(3)}"
+            data['name'] = SequenceService().next_number('SAL')
             
         order = SaleOrder.create(data)
         logger.info(f"Created order: {order.name}")
@@ -8,6 +8,8 @@ from mindzen_erp.modules.purchase.models import (
     Vendor, PurchaseInvoice, PurchaseInvoiceItem
 )
 from mindzen_erp.modules.inventory.models import Product, UOM, ProductUOM
+from mindzen_erp.core.orm import Database
+from mindzen_erp.core.sequence import SequenceService
 from datetime import date
 
 class TransactionController:
@@ -19,46 +21,43 @@ class SalesInvoiceController(TransactionController):
     """Sales Invoice Management"""
     
     def create_invoice(self, data, items_data):
-        last_inv = SalesInvoice.find_all()
-        data['invoice_no'] = f"SINV-{len(last_inv) + 1:05d}"
-        invoice = SalesInvoice.create(data)
-        
-        for item_data in items_data:
-            product = Product.find_by_id(item_data['product_id'])
-            item = SalesInvoiceItem.create({
+        with Database().unit_of_work():
+            data['invoice_no'] = SequenceService().next_number('SINV', data.get('invoice_date'))
+            invoice = SalesInvoice.create(data)
+            
+            products = {
+                product_id: Product.find_by_id(product_id)
+                for product_id in {item_data['product_id'] for item_data in items_data}
+            }
+            SalesInvoiceItem.bulk_create([{
                 'invoice_id': invoice.id,
                 'product_id': item_data['product_id'],
                 'uom_id': item_data['uom_id'],
                 'qty': item_data['qty'],
                 'rate': item_data['rate'],
-                'tax_rate': product.vat_rate, # From product master
-            })
-            item.calculate_amounts()
-            item.save()
+                'tax_rate': products[item_data['product_id']].vat_rate, # From product master
+            } for item_data in items_data])
             
-        invoice.calculate_totals()
-        invoice.save()
-        return invoice
+            invoice.calculate_totals()
+            invoice.save()
+            return invoice
 
 class PurchaseInvoiceController(TransactionController):
     """Purchase Invoice Management"""
     
     def create_invoice(self, data, items_data):
-        last_inv = PurchaseInvoice.find_all()
-        data['purchase_no'] = f"PINV-{len(last_inv) + 1:05d}"
-        invoice = PurchaseInvoice.create(data)
-        
-        for item_data in items_data:
-            item = PurchaseInvoiceItem.create({
+        with Database().unit_of_work():
+            data['purchase_no'] = SequenceService().next_number('PINV', data.get('invoice_date'))
+            invoice = PurchaseInvoice.create(data)
+            
+            PurchaseInvoiceItem.bulk_create([{
                 'invoice_id': invoice.id,
                 'product_id': item_data['product_id'],
                 'uom_id': item_data['uom_id'],
                 'qty': item_data['qty'],
                 'rate': item_data['rate'],
-            })
-            item.calculate_amounts()
-            item.save()
+            } for item_data in items_data])
             
-        invoice.calculate_totals()
-        invoice.save()
-        return invoice
+            invoice.calculate_totals()
+            invoice.save()
+            return invoice
@@ -8,6 +8,7 @@ from mindzen_erp.core.orm import BaseModel
 class Customer(BaseModel):
     """Customer Master"""
     __tablename__ = 'customers'
+    __cacheable__ = True
     
     id = Column(Integer, primary_key=True)
     name = Column(String(300), nullable=False)
@@ -9,6 +9,9 @@ from mindzen_erp.core.orm import BaseModel
 class Quotation(BaseModel):
     """Sales Quotation"""
     __tablename__ = 'quotations'
+    __load_plans__ = {
+        'with_items': ['customer', 'items']
+    }
     
     id = Column(Integer, primary_key=True)
     quotation_no = Column(String(50), unique=True, nullable=False)
@@ -9,6 +9,9 @@ from mindzen_erp.core.orm import BaseModel
 class SalesOrder(BaseModel):
     """Sales Order"""
     __tablename__ = 'sales_orders'
+    __load_plans__ = {
+        'with_items_and_products': ['customer', 'items.product']
+    }
     
     id = Column(Integer, primary_key=True)
     order_no = Column(String(50), unique=True, nullable=False)
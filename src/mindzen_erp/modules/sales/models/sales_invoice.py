@@ -4,11 +4,15 @@ Sales Invoice Model
 from sqlalchemy import Column, Integer, String, Date, Numeric, Boolean, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from datetime import date
+from decimal import Decimal
 from mindzen_erp.core.orm import BaseModel
 
 class SalesInvoice(BaseModel):
     """Sales Invoice"""
     __tablename__ = 'sales_invoices'
+    __load_plans__ = {
+        'with_items_and_products': ['customer', 'items.product']
+    }
     
     id = Column(Integer, primary_key=True)
     invoice_no = Column(String(50), unique=True, nullable=False)
@@ -17,7 +21,7 @@ class SalesInvoice(BaseModel):
     sales_order_id = Column(Integer, ForeignKey('sales_orders.id'))
     customer_vat_no = Column(String(15))
     invoice_type = Column(String(50), default='regular')
-    status = Column(String(50), default='draft')
+    status = Column(String(50), default='draft', index=True)
     subtotal = Column(Numeric(15, 2), default=0)
     discount_amount = Column(Numeric(15, 2), default=0)
     taxable_amount = Column(Numeric(15, 2), default=0)
@@ -43,7 +47,7 @@ class SalesInvoice(BaseModel):
         self.subtotal = sum(item.amount for item in self.items)
         self.taxable_amount = self.subtotal - self.discount_amount
         self.tax_amount = sum(item.tax_amount for item in self.items)
-        self.zakat_amount = self.taxable_amount * 0.025 # 2.5% Zakat Provision
+        self.zakat_amount = self.taxable_amount * Decimal('0.025') # 2.5% Zakat Provision
         exact_total = self.taxable_amount + self.tax_amount
         self.total_amount = round(exact_total, 2)
         self.round_off = self.total_amount - exact_total
@@ -1,51 +1,108 @@
-from fastapi import FastAPI, Request, Depends, Form, Response
+from fastapi import FastAPI, Request, Depends, Form, Response, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
 import uvicorn
+import asyncio
 import os
 import sys
 import logging
 from pathlib import Path
 from datetime import date, datetime
-from typing import List, Optional, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from mindzen_erp.core import Engine, ConfigManager
-from mindzen_erp.core.orm import Database
+from mindzen_erp.core.orm import Database, AsyncDatabase
+from mindzen_erp.core.cache import CacheManager
 from mindzen_erp.core.auth_controller import AuthController
-from mindzen_erp.modules.crm.controllers import LeadController
-from mindzen_erp.modules.sales.controllers import SalesOrderController, QuotationController, CustomerController
-from mindzen_erp.modules.sales.controllers.transaction_controller import SalesInvoiceController, PurchaseInvoiceController
-from mindzen_erp.modules.inventory.controllers import ProductController, WarehouseController
-from mindzen_erp.modules.purchase.models.vendor import Vendor
 from mindzen_erp.core.admin_models import Country, Currency, FinancialYear
 from mindzen_erp.core.tax_models import TaxRegime, TaxType, TaxRate
-from mindzen_erp.modules.finance.models.accounting import Ledger, AccountGroup
-from mindzen_erp.modules.inventory.models.product import Product
-from mindzen_erp.modules.inventory.models.product import Product
-from mindzen_erp.modules.sales.models.customer import Customer
 from mindzen_erp.core.company import Company
 
+logger = logging.getLogger(__name__)
+
+# Columns rendered by the list pages (fetched as plain rows, not ORM objects)
+LEAD_LIST_FIELDS = ['id', 'name', 'email', 'company', 'status', 'expected_revenue']
+PRODUCT_LIST_FIELDS = ['id', 'code', 'name', 'product_type', 'category.name', 'sale_rate', 'vat_rate']
+CUSTOMER_LIST_FIELDS = ['id', 'name', 'phone', 'email', 'vat_no']
+VENDOR_LIST_FIELDS = ['id', 'name', 'contact_person', 'phone', 'city', 'country', 'vat_no']
+
 # Initialize Engine & DB
 engine = Engine()
 engine.initialize()
 engine.discover_modules()
-engine.install_module('crm')
-engine.install_module('sales')
-engine.install_module('inventory')
-engine.install_module('purchase')
-engine.install_module('finance')
+engine.install_modules(['crm', 'sales', 'inventory', 'purchase', 'finance'])
+
+# Module models and controllers, imported when a route first uses them
+LeadController = engine.modules.lazy('crm', 'controllers', 'LeadController')
+Lead = engine.modules.lazy('crm', 'models.lead', 'Lead')
+QuotationController = engine.modules.lazy('sales', 'controllers', 'QuotationController')
+SalesInvoiceController = engine.modules.lazy('sales', 'controllers.transaction_controller', 'SalesInvoiceController')
+PurchaseInvoiceController = engine.modules.lazy('sales', 'controllers.transaction_controller', 'PurchaseInvoiceController')
+Customer = engine.modules.lazy('sales', 'models.customer', 'Customer')
+Quotation = engine.modules.lazy('sales', 'models.quotation', 'Quotation')
+SalesOrder = engine.modules.lazy('sales', 'models.sale_order', 'SalesOrder')
+Product = engine.modules.lazy('inventory', 'models.product', 'Product')
+WarehouseController = engine.modules.lazy('inventory', 'controllers', 'WarehouseController')
+StockRepostWorker = engine.modules.lazy('inventory', 'controllers', 'StockRepostWorker')
+Vendor = engine.modules.lazy('purchase', 'models.vendor', 'Vendor')
+Ledger = engine.modules.lazy('finance', 'models.accounting', 'Ledger')
+AccountGroup = engine.modules.lazy('finance', 'models.accounting', 'AccountGroup')
 
 # Database Connection
 db_url = os.getenv("DATABASE_URL", "sqlite:///./mindzen_erp_v2.db")
-Database().connect(db_url)
+Database().connect(db_url, engine.config)
+# Routes query through the asyncio driver so they never block the event loop
+AsyncDatabase().connect(db_url, engine.config)
 
 # Ensure Admin User
 AuthController(engine).ensure_superadmin()
 
+# Recomputes stock ledgers after backdated postings (created on startup)
+repost_worker = None
+repost_worker_started: Optional[asyncio.Future] = None
+
+def start_repost_worker():
+    global repost_worker
+    worker = StockRepostWorker(
+        engine.config.get('inventory.valuation_method', 'moving_average'),
+        engine.config.get('inventory.valuation_batch_size', 5000),
+        engine.config.get('inventory.repost_poll_interval', 5),
+        engine.config.get('inventory.repost_lease_seconds', 300)
+    )
+    worker.start()
+    repost_worker = worker
+
 app = FastAPI(title="MindZen ERP")
 
+@app.on_event("startup")
+async def start_background_workers():
+    # Module models are imported and configured before any request is served:
+    # a query running during the import would configure a half-imported model set
+    await run_in_threadpool(engine.modules.load_models)
+    global repost_worker_started
+    repost_worker_started = asyncio.get_running_loop().run_in_executor(None, start_repost_worker)
+    repost_worker_started.add_done_callback(log_repost_worker_failure)
+    engine.outbox.start()
+    if engine.config.get('events.broadcast_enabled', False):
+        engine.broadcast.start()
+
+def log_repost_worker_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Stock repost worker failed to start: {future.exception()}")
+
+@app.on_event("shutdown")
+async def close_database():
+    # A worker still starting would be left running after shutdown
+    if repost_worker_started is not None:
+        await asyncio.wait([repost_worker_started])
+    if repost_worker is not None:
+        repost_worker.stop(timeout=10)
+    await run_in_threadpool(engine.shutdown)
+    await AsyncDatabase().dispose()
+
 # Add Session Middleware (Change 'secret-key' in production)
 app.add_middleware(SessionMiddleware, secret_key="super-secret-mindzen-key")
 
@@ -66,8 +123,8 @@ async def splash(request: Request):
 
 @app.get("/finance/coa", response_class=HTMLResponse)
 async def list_coa(request: Request):
-    ledgers = Ledger.find_all()
-    groups = AccountGroup.find_all()
+    ledgers = await Ledger.afind_all()
+    groups = await AccountGroup.afind_all()
     return templates.TemplateResponse("finance/coa.html", {
         "request": request,
         "ledgers": ledgers,
@@ -86,7 +143,7 @@ async def login_submit(request: Request):
     password = form.get("password")
     
     auth = AuthController(engine)
-    user = auth.login(username, password)
+    user = await run_in_threadpool(auth.login, username, password)
     
     if user:
         request.session["user"] = {"username": user.username, "name": user.name, "is_admin": user.is_admin}
@@ -109,6 +166,29 @@ def get_current_user(request: Request):
         return None
     return user
 
+# Dependency for the admin JSON endpoints: a signed-in administrator
+def require_admin(request: Request):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not signed in")
+    if not user.get("is_admin"):
+        raise HTTPException(status_code=403, detail="Administrators only")
+    return user
+
+# Controllers are synchronous: run them in a worker thread, with all their
+# ORM calls in one session and one commit, so they don't block the event loop.
+async def run_in_unit_of_work(func, *args):
+    def call():
+        with Database().unit_of_work():
+            return func(*args)
+    return await run_in_threadpool(call)
+
+# Dependency giving routes the unit-of-work runner (overridable in tests)
+UnitOfWork = Callable[..., Awaitable[Any]]
+
+def get_unit_of_work() -> UnitOfWork:
+    return run_in_unit_of_work
+
 # --- DASHBOARD ---
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
@@ -116,7 +196,7 @@ async def dashboard(request: Request):
     if not user:
         return RedirectResponse(url="/splash") # Start with splash on first load
         
-    company = Company.find_all()
+    company = await Company.afind_all()
     current_company = company[0] if company else None
 
     return templates.TemplateResponse("dashboard.html", {
@@ -129,8 +209,7 @@ async def dashboard(request: Request):
 # --- CRM ROUTES ---
 @app.get("/crm/leads", response_class=HTMLResponse)
 async def list_leads(request: Request):
-    controller = LeadController(engine)
-    leads = controller.list_leads()
+    leads = await Lead.afind_values(LEAD_LIST_FIELDS, limit=100)
     return templates.TemplateResponse("crm/leads.html", {
         "request": request, 
         "leads": leads,
@@ -146,20 +225,19 @@ async def new_lead_form(request: Request):
     })
 
 @app.post("/crm/leads", response_class=HTMLResponse)
-async def create_lead(request: Request):
+async def create_lead(request: Request, unit_of_work: UnitOfWork = Depends(get_unit_of_work)):
     form = await request.form()
     data = dict(form)
     if 'expected_revenue' in data:
         data['expected_revenue'] = float(data['expected_revenue'])
     
     controller = LeadController(engine)
-    controller.create_lead(data)
+    await unit_of_work(controller.create_lead, data)
     return RedirectResponse(url="/crm/leads", status_code=303)
 
 @app.get("/crm/leads/{lead_id}", response_class=HTMLResponse)
 async def edit_lead_form(request: Request, lead_id: int):
-    controller = LeadController(engine)
-    lead = controller.get_lead(lead_id)
+    lead = await Lead.afind_by_id(lead_id)
     return templates.TemplateResponse("crm/lead_form.html", {
         "request": request,
         "lead": lead,
@@ -167,22 +245,22 @@ async def edit_lead_form(request: Request, lead_id: int):
     })
 
 @app.post("/crm/leads/{lead_id}", response_class=HTMLResponse)
-async def update_lead(request: Request, lead_id: int):
+async def update_lead(request: Request, lead_id: int, unit_of_work: UnitOfWork = Depends(get_unit_of_work)):
     form = await request.form()
     data = dict(form)
     if 'expected_revenue' in data:
         data['expected_revenue'] = float(data['expected_revenue'])
         
     controller = LeadController(engine)
-    controller.update_lead(lead_id, data)
+    await unit_of_work(controller.update_lead, lead_id, data)
     return RedirectResponse(url="/crm/leads", status_code=303)
 
 # --- ADMIN & CONFIG ROUTES ---
 @app.get("/admin/config", response_class=HTMLResponse)
 async def system_config(request: Request):
-    countries = Country.find_all()
-    currencies = Currency.find_all()
-    fy = FinancialYear.find_all()
+    countries = await Country.afind_all()
+    currencies = await Currency.afind_all()
+    fy = await FinancialYear.afind_all()
     return templates.TemplateResponse("admin/config.html", {
         "request": request,
         "countries": countries,
@@ -194,13 +272,13 @@ async def system_config(request: Request):
 @app.post("/admin/countries")
 async def add_country(request: Request):
     form_data = await request.form()
-    Country.create(dict(form_data))
+    await Country.acreate(dict(form_data))
     return RedirectResponse(url="/admin/config", status_code=303)
 
 @app.get("/admin/tax", response_class=HTMLResponse)
 async def tax_engine(request: Request):
-    regimes = TaxRegime.find_all()
-    countries = Country.find_all()
+    regimes = await TaxRegime.afind_all()
+    countries = await Country.afind_all()
     return templates.TemplateResponse("admin/tax_engine.html", {
         "request": request,
         "regimes": regimes,
@@ -211,14 +289,49 @@ async def tax_engine(request: Request):
 @app.post("/admin/tax/regimes")
 async def add_tax_regime(request: Request):
     form_data = await request.form()
-    TaxRegime.create(dict(form_data))
+    await TaxRegime.acreate(dict(form_data))
     return RedirectResponse(url="/admin/tax", status_code=303)
 
+@app.get("/admin/cache/stats", dependencies=[Depends(require_admin)])
+async def cache_stats(request: Request):
+    return CacheManager().stats()
+
+@app.get("/admin/pool/stats", dependencies=[Depends(require_admin)])
+async def pool_stats(request: Request):
+    return Database().pool_stats()
+
+@app.get("/admin/outbox/stats", dependencies=[Depends(require_admin)])
+async def outbox_stats(request: Request):
+    return await run_in_threadpool(engine.outbox.stats)
+
+@app.get("/admin/events/broadcast/stats", dependencies=[Depends(require_admin)])
+async def broadcast_stats(request: Request):
+    return engine.broadcast.stats()
+
+@app.get("/admin/events/instrumentation", dependencies=[Depends(require_admin)])
+async def instrumentation_stats(request: Request, kind: Optional[str] = None):
+    return engine.instrumentation.stats(kind)
+
+@app.get("/admin/events/instrumentation/slowest", dependencies=[Depends(require_admin)])
+async def instrumentation_slowest(request: Request, limit: int = 10):
+    return engine.instrumentation.slowest(limit)
+
+@app.get("/admin/modules/import-times", dependencies=[Depends(require_admin)])
+async def module_import_times(request: Request):
+    return engine.modules.get_import_stats()
+
+@app.get("/admin/modules/install-times", dependencies=[Depends(require_admin)])
+async def module_install_times(request: Request):
+    return engine.modules.get_install_stats()
+
+@app.get("/inventory/reposting")
+async def repost_progress(request: Request):
+    return await run_in_threadpool(WarehouseController(engine).get_repost_progress)
+
 # --- MASTER SCREENS ---
 @app.get("/inventory/products", response_class=HTMLResponse)
 async def list_products(request: Request):
-    prod_controller = ProductController(engine)
-    products = prod_controller.list_products()
+    products = await Product.afind_values(PRODUCT_LIST_FIELDS)
     # Mock UOMs if none exist
     uoms = [{"id": 1, "name": "Piece"}, {"id": 2, "name": "Carton"}]
     return templates.TemplateResponse("inventory/products.html", {
@@ -237,13 +350,12 @@ async def add_product(request: Request):
         data['sale_rate'] = float(data['sale_rate'])
     if 'vat_rate' in data and data['vat_rate']:
         data['vat_rate'] = float(data['vat_rate'])
-    Product.create(data)
+    await Product.acreate(data)
     return RedirectResponse(url="/inventory/products", status_code=303)
 
 @app.get("/sales/customers", response_class=HTMLResponse)
 async def list_customers(request: Request):
-    controller = CustomerController(engine)
-    customers = controller.list_customers()
+    customers = await Customer.afind_values(CUSTOMER_LIST_FIELDS, is_active=True)
     return templates.TemplateResponse("sales/customers.html", {
         "request": request, 
         "customers": customers,
@@ -253,25 +365,25 @@ async def list_customers(request: Request):
 @app.post("/sales/customers")
 async def add_customer(request: Request):
     form_data = await request.form()
-    Customer.create(dict(form_data))
+    await Customer.acreate(dict(form_data))
     return RedirectResponse(url="/sales/customers", status_code=303)
 
 # --- SALES ROUTES ---
 @app.get("/sales", response_class=HTMLResponse)
 @app.get("/sales/invoice/new", response_class=HTMLResponse)
 async def new_invoice_form(request: Request):
-    prod_controller = ProductController(engine)
-    cust_controller = CustomerController(engine)
+    products = await Product.afind_all()
+    customers = await Customer.afind_by(is_active=True)
     return templates.TemplateResponse("sales/invoice_form.html", {
         "request": request,
-        "products": prod_controller.list_products(),
-        "customers": cust_controller.list_customers(),
+        "products": products,
+        "customers": customers,
         "date_today": date.today().strftime("%Y-%m-%d"),
         "active_module": "sales"
     })
 
 @app.post("/sales/invoices")
-async def create_invoice(request: Request):
+async def create_invoice(request: Request, unit_of_work: UnitOfWork = Depends(get_unit_of_work)):
     data = await request.json()
     invoice_data = {
         'customer_id': data.get('customer_id'),
@@ -282,7 +394,7 @@ async def create_invoice(request: Request):
     items_data = data.get('items', [])
     
     controller = SalesInvoiceController(engine)
-    controller.create_invoice(invoice_data, items_data)
+    await unit_of_work(controller.create_invoice, invoice_data, items_data)
     
     return {"status": "success", "message": "Invoice Created"}
 
@@ -293,8 +405,7 @@ async def list_invoices(request: Request):
 
 @app.get("/sales/orders", response_class=HTMLResponse)
 async def list_orders(request: Request):
-    controller = SalesOrderController(engine)
-    orders = controller.list_orders()
+    orders = await SalesOrder.afind_all()
     return templates.TemplateResponse("sales/quotations.html", { # Reusing template for now
         "request": request, 
         "orders": orders,
@@ -310,19 +421,18 @@ async def new_quotation_form(request: Request):
     })
 
 @app.post("/sales/quotations", response_class=HTMLResponse)
-async def create_quotation(request: Request):
+async def create_quotation(request: Request, unit_of_work: UnitOfWork = Depends(get_unit_of_work)):
     form = await request.form()
     data = dict(form)
     # Basic items_data for testing
     items_data = [] 
     controller = QuotationController(engine)
-    controller.create_quotation(data, items_data)
+    await unit_of_work(controller.create_quotation, data, items_data)
     return RedirectResponse(url="/sales/quotations", status_code=303)
 
 @app.get("/sales/quotations/{quot_id}", response_class=HTMLResponse)
 async def edit_quotation_form(request: Request, quot_id: int):
-    controller = QuotationController(engine)
-    quotation = controller.get_quotation(quot_id)
+    quotation = await Quotation.afind_by_id(quot_id)
     return templates.TemplateResponse("sales/quotation_form.html", {
         "request": request,
         "order": quotation,
@@ -333,7 +443,7 @@ async def edit_quotation_form(request: Request, quot_id: int):
 @app.get("/purchase", response_class=HTMLResponse)
 @app.get("/purchase/vendors", response_class=HTMLResponse)
 async def list_vendors(request: Request):
-    vendors = Vendor.find_all()
+    vendors = await Vendor.afind_values(VENDOR_LIST_FIELDS)
     return templates.TemplateResponse("purchase/vendors.html", {
         "request": request,
         "vendors": vendors,
@@ -342,18 +452,18 @@ async def list_vendors(request: Request):
 
 @app.get("/purchase/invoices/new", response_class=HTMLResponse)
 async def new_purchase_invoice_form(request: Request):
-    prod_controller = ProductController(engine)
-    vendors = Vendor.find_all()
+    products = await Product.afind_all()
+    vendors = await Vendor.afind_all()
     return templates.TemplateResponse("purchase/invoice_form.html", {
         "request": request,
-        "products": prod_controller.list_products(),
+        "products": products,
         "vendors": vendors,
         "date_today": date.today().strftime("%Y-%m-%d"),
         "active_module": "purchase"
     })
 
 @app.post("/purchase/invoices")
-async def create_purchase_invoice(request: Request):
+async def create_purchase_invoice(request: Request, unit_of_work: UnitOfWork = Depends(get_unit_of_work)):
     data = await request.json()
     invoice_data = {
         'vendor_id': data.get('vendor_id'),
@@ -364,7 +474,7 @@ async def create_purchase_invoice(request: Request):
     items_data = data.get('items', [])
     
     controller = PurchaseInvoiceController(engine)
-    controller.create_invoice(invoice_data, items_data)
+    await unit_of_work(controller.create_invoice, invoice_data, items_data)
     return {"status": "success", "message": "Purchase Invoice Created"}
 
 @app.get("/inventory", response_class=HTMLResponse)
@@ -0,0 +1,116 @@
+
+import os
+import sys
+import time
+import logging
+import threading
+from typing import Callable, Dict, List
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from mindzen_erp.core.event_bus import EventBus
+from mindzen_erp.core.hooks import HookManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("bench_event_bus")
+
+THREAD_COUNTS = [1, 2, 4, 8]
+DURATION = 1.0  # seconds per measurement
+
+def run_threads(thread_count: int, work: Callable[[], None], mutate: Callable[[int], None]) -> Dict[str, float]:
+    """Run work in thread_count threads for DURATION while one thread keeps mutating the tables"""
+    stop = threading.Event()
+    counts: List[int] = [0] * thread_count
+    errors: List[BaseException] = []
+    
+    def worker(index: int) -> None:
+        try:
+            while not stop.is_set():
+                work()
+                counts[index] += 1
+        except BaseException as e:
+            errors.append(e)
+    
+    def mutator() -> None:
+        step = 0
+        while not stop.is_set():
+            mutate(step)
+            step += 1
+            time.sleep(0.0001)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(thread_count)]
+    threads.append(threading.Thread(target=mutator))
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    if errors:
+        raise AssertionError(f"{len(errors)} worker(s) failed, first: {errors[0]!r}")
+    return {'ops_per_sec': sum(counts) / DURATION}
+
+def bench_publish(io_wait: float) -> Dict[int, float]:
+    bus = EventBus()
+    
+    def subscriber(data):
+        if io_wait:
+            # Stands in for a subscriber doing I/O (GIL released)
+            time.sleep(io_wait)
+    
+    for _ in range(4):
+        bus.subscribe('sales.order.created', subscriber)
+    bus.subscribe('sales.**', subscriber)
+    
+    def churn(step: int) -> None:
+        # Subscribe and unsubscribe while publishers iterate the same topic
+        callback = lambda data: None
+        bus.subscribe('sales.order.created', callback)
+        bus.unsubscribe('sales.order.created', callback)
+    
+    results = {}
+    for thread_count in THREAD_COUNTS:
+        stats = run_threads(thread_count, lambda: bus.publish('sales.order.created', {'order_id': 1}), churn)
+        results[thread_count] = stats['ops_per_sec']
+    assert bus.get_subscriber_count('sales.order.created') == 4
+    return results
+
+def bench_hooks() -> Dict[int, float]:
+    hooks = HookManager(EventBus())
+    for _ in range(4):
+        hooks.register_hook('on_opportunity_won', lambda **kwargs: kwargs.get('opportunity_id'))
+    
+    def churn(step: int) -> None:
+        hooks.register_hook(f'on_temp_{step % 10}', lambda **kwargs: None)
+        if step % 10 == 9:
+            for i in range(10):
+                hooks.clear_hooks(f'on_temp_{i}')
+    
+    results = {}
+    for thread_count in THREAD_COUNTS:
+        stats = run_threads(thread_count, lambda: hooks.execute('on_opportunity_won', opportunity_id=1), churn)
+        results[thread_count] = stats['ops_per_sec']
+    return results
+
+def report(title: str, results: Dict[int, float]) -> None:
+    base = results[THREAD_COUNTS[0]]
+    logger.info(title)
+    for thread_count, ops in results.items():
+        logger.info(f"  {thread_count} thread(s): {ops:>12,.0f} ops/s  (x{ops / base:.2f})")
+
+def run_benchmarks():
+    try:
+        report("EventBus.publish, trivial subscribers (CPU-bound, bounded by the GIL):", bench_publish(0))
+        report("EventBus.publish, subscribers waiting 0.5 ms on I/O:", bench_publish(0.0005))
+        report("HookManager.execute, trivial callbacks:", bench_hooks())
+    except AssertionError as e:
+        logger.error(f"❌ Benchmark Failed: {e}")
+        sys.exit(1)
+    else:
+        logger.info("✨ No errors while subscriber tables changed under concurrent publishers")
+
+if __name__ == "__main__":
+    run_benchmarks()
@@ -0,0 +1,42 @@
+import importlib
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from mindzen_erp.core.auth_controller import AuthController
+from mindzen_erp.core.cache import CacheManager
+from mindzen_erp.core.orm import AsyncDatabase, Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Database singleton connected to a fresh SQLite file (threads share it, unlike :memory:)"""
+    database = Database()
+    database.connect(f"sqlite:///{tmp_path / 'test.db'}")
+    CacheManager().clear()
+    yield database
+    database.engine.dispose()
+    CacheManager().clear()
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    """The web app on a fresh SQLite file; startup workers are not run"""
+    url = f"sqlite:///{tmp_path_factory.mktemp('web') / 'web.db'}"
+    os.environ['DATABASE_URL'] = url
+    try:
+        web = importlib.import_module('mindzen_erp.web')
+    finally:
+        del os.environ['DATABASE_URL']
+    # The app is imported once per session: point it at this module's database
+    Database().connect(url, web.engine.config)
+    AsyncDatabase().connect(url, web.engine.config)
+    AuthController(web.engine).ensure_superadmin()
+    # Done in the background on startup, which TestClient does not run here
+    web.engine.modules.load_models()
+    return TestClient(web.app)
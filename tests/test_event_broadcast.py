@@ -0,0 +1,46 @@
+import time
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from mindzen_erp.core.cache import RECORD_CHANGED_EVENT, CacheManager
+from mindzen_erp.core.event_broadcast import BroadcastEvent, EventBroadcaster
+from mindzen_erp.core.event_bus import EventBus
+
+
+@pytest.fixture
+def broadcaster(db, monkeypatch):
+    bus = EventBus()
+    # Cache invalidations go out on this bus, as in a running engine
+    monkeypatch.setattr(CacheManager(), 'event_bus', None)
+    CacheManager().bind(bus)
+    broadcaster = EventBroadcaster(bus, [RECORD_CHANGED_EVENT], retention_seconds=60)
+    for topic, callback in broadcaster._callbacks.items():
+        bus.subscribe(topic, callback)
+    yield broadcaster
+    bus.shutdown()
+
+
+def test_failed_flush_keeps_events_buffered(db, broadcaster):
+    broadcaster.event_bus.publish(RECORD_CHANGED_EVENT, {'model': 'products', 'ids': [1]})
+    BroadcastEvent.__table__.drop(db.engine)
+
+    with pytest.raises(OperationalError):
+        broadcaster.flush()
+
+    BroadcastEvent.__table__.create(db.engine)
+    assert broadcaster.flush() == 1
+    assert len(BroadcastEvent.find_values(['id'])) == 1
+
+
+def test_purge_is_not_broadcast(db, broadcaster):
+    with db.engine.begin() as connection:
+        connection.execute(insert(BroadcastEvent.__table__).values(
+            origin='other', topic=RECORD_CHANGED_EVENT, published_at=time.time() - 120
+        ))
+
+    broadcaster._purge()
+
+    assert BroadcastEvent.find_values(['id']) == []
+    assert broadcaster.flush() == 0
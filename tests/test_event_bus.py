@@ -0,0 +1,76 @@
+import contextvars
+
+from mindzen_erp.core.event_bus import EventBus, TopicTrie
+from mindzen_erp.core.instrumentation import DispatchInstrumentation
+from mindzen_erp.core.orm import Database
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+
+def test_queued_subscriber_runs_outside_publisher_context(db):
+    bus = EventBus()
+    seen = []
+    bus.subscribe('sales.order.created', lambda data: seen.append((Database().in_unit_of_work, request_id.get())),
+                  queued=True)
+
+    request_id.set('req-1')
+    with Database().unit_of_work():
+        bus.publish('sales.order.created', {'order_id': 1})
+        assert bus.drain(5)
+    bus.shutdown()
+
+    assert seen == [(False, None)]
+
+
+def test_single_wildcard_matches_one_segment_and_double_any_number():
+    trie = TopicTrie()
+    for pattern in ['sales.*', 'sales.**', '*.order.created', 'sales.*.created', '**']:
+        trie.add(pattern)
+
+    assert trie.match('sales.order') == ['sales.*', 'sales.**', '**']
+    assert trie.match('sales.order.created') == ['sales.**', '*.order.created', 'sales.*.created', '**']
+    # '**' also matches no segment at all; '*' needs exactly one
+    assert trie.match('sales') == ['sales.**', '**']
+    assert trie.match('crm.order.created') == ['*.order.created', '**']
+
+
+def test_unsubscribed_wildcard_pattern_stops_matching():
+    bus = EventBus()
+    seen = []
+    on_any_sale = lambda data: seen.append(('any', data))
+    bus.subscribe('sales.**', on_any_sale)
+    bus.subscribe('sales.*', lambda data: seen.append(('one', data)))
+
+    bus.publish('sales.order.created', 1)
+    bus.unsubscribe('sales.**', on_any_sale)
+    bus.publish('sales.order.created', 2)
+    bus.publish('sales.order', 3)
+    bus.shutdown()
+
+    assert seen == [('any', 1), ('one', 3)]
+    assert bus.get_subscriber_count('sales.**') == 0
+
+
+def test_wildcard_subscribers_are_timed_under_the_published_topic():
+    bus = EventBus(instrumentation=DispatchInstrumentation(enabled=True))
+    received = []
+
+    def on_sale_queued(data):
+        received.append(data)
+
+    def on_sale_inline(data):
+        received.append(data)
+
+    bus.subscribe('sales.**', on_sale_queued, queued=True)
+    bus.subscribe('sales.**', on_sale_inline)
+    bus.publish('sales.order.created', {'order_id': 1})
+    bus.publish('sales.invoice.paid', {'invoice_id': 2})
+    assert bus.drain(5)
+    bus.shutdown()
+
+    stats = bus.instrumentation.stats('event')
+    assert sorted(stats) == ['sales.invoice.paid', 'sales.order.created']
+    for topic in stats:
+        assert stats[topic]['calls'] == 2
+        assert sorted(name.rsplit('.', 1)[-1] for name in stats[topic]['callbacks']) == \
+            ['on_sale_inline', 'on_sale_queued']
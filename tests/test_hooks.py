@@ -0,0 +1,36 @@
+import contextvars
+import threading
+import time
+
+from mindzen_erp.core.event_bus import EventBus
+from mindzen_erp.core.hooks import HookManager
+from mindzen_erp.core.orm import Database
+
+company_id = contextvars.ContextVar('company_id', default=None)
+
+
+def test_timed_out_hook_does_not_hold_up_the_next_one():
+    hooks = HookManager(EventBus(), max_workers=1)
+    release = threading.Event()
+    hooks.register_hook('post_install', lambda: release.wait(10), priority=10, timeout=0.1)
+    hooks.register_hook('post_install', lambda: 'done', timeout=1)
+
+    start = time.monotonic()
+    try:
+        assert hooks.execute('post_install') == ['done']
+        assert time.monotonic() - start < 1
+    finally:
+        release.set()
+        hooks.shutdown()
+
+
+def test_pool_callback_sees_caller_context_but_not_its_unit_of_work(db):
+    hooks = HookManager(EventBus())
+    hooks.register_hook('post_install', lambda: (company_id.get(), Database().in_unit_of_work), parallel=True)
+
+    company_id.set(7)
+    try:
+        with Database().unit_of_work():
+            assert hooks.execute('post_install') == [(7, False)]
+    finally:
+        hooks.shutdown()
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+
+def test_repost_progress_reports_failed_request_error(client):
+    from mindzen_erp.modules.inventory.models import StockRepostRequest
+
+    StockRepostRequest.create({
+        'product_id': 1, 'warehouse_id': 1, 'from_date': datetime(2026, 1, 5),
+        'status': StockRepostRequest.QUEUED, 'error': 'Previous attempt failed: disk full'
+    })
+
+    response = client.get('/inventory/reposting')
+    assert response.status_code == 200
+    [progress] = response.json()
+    assert progress['status'] == StockRepostRequest.QUEUED
+    assert progress['error'] == 'Previous attempt failed: disk full'
+    assert progress['processed'] == 0
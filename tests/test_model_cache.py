@@ -0,0 +1,33 @@
+from sqlalchemy import event, text
+
+from mindzen_erp.core.admin_models import Currency
+from mindzen_erp.core.cache import CacheManager, ModelCache, MISSING
+
+
+def test_put_skipped_after_invalidation():
+    cache = ModelCache('currencies')
+    generation = cache.generation
+    cache.invalidate([1])
+    assert cache.put(('id', 1), {'id': 1}, generation) is False
+    assert cache.get(('id', 1)) is MISSING
+    assert cache.put(('id', 1), {'id': 1}, cache.generation) is True
+
+
+def test_invalidation_between_load_and_put_is_not_cached(db):
+    currency = Currency.create({'name': 'Riyal', 'code': 'SAR'})
+    invalidated = []
+
+    def invalidate_after_select(conn, cursor, statement, parameters, context, executemany):
+        # Another writer's commit is announced while this reader holds the old row
+        if not invalidated and statement.lstrip().upper().startswith('SELECT') and 'currencies' in statement:
+            invalidated.append(True)
+            CacheManager().record_changed('currencies', [currency.id])
+
+    event.listen(db.engine, 'after_cursor_execute', invalidate_after_select)
+    assert Currency.find_by_id(currency.id).name == 'Riyal'
+    event.remove(db.engine, 'after_cursor_execute', invalidate_after_select)
+
+    # Changed behind the cache's back: only a cached stale row would still say 'Riyal'
+    with db.engine.begin() as connection:
+        connection.execute(text("UPDATE currencies SET name = 'Saudi Riyal' WHERE id = :id"), {'id': currency.id})
+    assert Currency.find_by_id(currency.id).name == 'Saudi Riyal'
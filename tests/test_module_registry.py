@@ -0,0 +1,73 @@
+import threading
+import types
+
+import pytest
+from sqlalchemy import Column, String
+
+from mindzen_erp.core import module_registry
+from mindzen_erp.core.config import ConfigManager
+from mindzen_erp.core.event_bus import EventBus
+from mindzen_erp.core.hooks import HookManager
+from mindzen_erp.core.orm import BaseModel
+
+
+def test_model_imported_after_connect_gets_its_table(db):
+    # As if a module's models file were imported directly, bypassing the registry
+    class ShippingZone(BaseModel):
+        __tablename__ = 'test_shipping_zones'
+        name = Column(String(100))
+
+    zone = ShippingZone.create({'name': 'GCC'})
+    assert ShippingZone.find_by_id(zone.id).name == 'GCC'
+
+
+def test_lazy_import_waits_for_a_model_import_in_progress():
+    class Registry:
+        def load(self, module_name, part):
+            return types.SimpleNamespace(Lead='lead model')
+
+    lead = module_registry.LazyImport(Registry(), 'crm', 'models.lead', 'Lead')
+    resolved = []
+    thread = threading.Thread(target=lambda: resolved.append(lead.resolve()))
+
+    with module_registry._MODEL_IMPORT_LOCK:
+        thread.start()
+        thread.join(0.2)
+        assert resolved == []
+
+    thread.join(5)
+    assert resolved == ['lead model']
+
+
+def registry_with(manifests, installed=()):
+    events = EventBus()
+    registry = module_registry.ModuleRegistry(ConfigManager(), events, HookManager(events))
+    registry.available_modules = {name: module_registry.ModuleMetadata({'name': name, 'depends': depends})
+                                  for name, depends in manifests.items()}
+    registry.installed_modules = {name: object() for name in installed}
+    return registry
+
+
+def test_plan_puts_independent_modules_in_the_same_level():
+    registry = registry_with({
+        'base': [], 'crm': ['base'], 'inventory': ['base'], 'sales': ['crm', 'inventory'], 'website': []
+    })
+
+    levels = registry.plan(['sales', 'website'])
+
+    assert [sorted(level) for level in levels] == [['base', 'website'], ['crm', 'inventory'], ['sales']]
+    # Installed dependencies are left out
+    assert registry_with({'base': [], 'crm': ['base']}, installed=['base']).plan(['crm']) == [['crm']]
+
+
+def test_plan_reports_dependency_cycle():
+    registry = registry_with({'base': [], 'sales': ['base', 'stock'], 'stock': ['invoicing'], 'invoicing': ['sales']})
+
+    with pytest.raises(ValueError, match='dependency cycle') as error:
+        registry.plan(['sales'])
+
+    cycle = str(error.value).split(': ', 1)[1].split(' -> ')
+    assert cycle[0] == cycle[-1]
+    assert sorted(cycle[:-1]) == ['invoicing', 'sales', 'stock']
+    with pytest.raises(ValueError, match="Module 'missing' not found"):
+        registry_with({'crm': ['missing']}).plan(['crm'])
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from mindzen_erp.modules.inventory.models import StockLedger
+
+
+def test_bulk_create_returns_ids_in_input_order_and_keeps_defaults(db):
+    posted = datetime(2026, 1, 5)
+    created = datetime(2025, 12, 31, tzinfo=timezone.utc)
+    rows = [
+        {'product_id': 1, 'warehouse_id': 1, 'qty': 1, 'voucher_type': 'Stock Entry', 'voucher_no': 'A'},
+        {'product_id': 1, 'warehouse_id': 1, 'qty': 2, 'voucher_type': 'Stock Entry', 'voucher_no': 'B',
+         'posting_date': posted, 'created_at': created},
+        {'product_id': 1, 'warehouse_id': 1, 'qty': 3, 'voucher_type': 'Stock Entry', 'voucher_no': 'C'},
+        {'product_id': 1, 'warehouse_id': 1, 'qty': 4, 'voucher_type': 'Stock Entry', 'voucher_no': 'D',
+         'posting_date': posted},
+    ]
+
+    ids = StockLedger.bulk_create(rows)
+
+    assert ids == sorted(ids)
+    assert [StockLedger.find_by_id(record_id).voucher_no for record_id in ids] == ['A', 'B', 'C', 'D']
+    entries = {entry.voucher_no: entry for entry in StockLedger.find_all()}
+    # Rows that left columns out got the Python and server defaults, not NULL
+    assert entries['A'].posting_date is not None and entries['C'].posting_date is not None
+    assert entries['A'].created_at is not None and entries['D'].created_at is not None
+    assert entries['B'].posting_date == entries['D'].posting_date == posted
+    assert entries['B'].created_at.year == 2025
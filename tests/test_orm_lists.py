@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy.orm.exc import DetachedInstanceError
+
+from mindzen_erp.modules.crm.models.opportunity import Opportunity
+
+
+def test_find_all_loads_text_columns(db):
+    Opportunity.create({'name': 'Renewal', 'notes': 'Call back in May'})
+
+    opportunity = Opportunity.find_all()[0]
+    assert opportunity.notes == 'Call back in May'
+    assert opportunity.to_dict()['notes'] == 'Call back in May'
+    assert [o.notes for o in Opportunity.find_by(name='Renewal')] == ['Call back in May']
+    assert [o.notes for o in Opportunity.iter_all()] == ['Call back in May']
+
+
+def test_defer_text_leaves_text_columns_unloaded(db):
+    Opportunity.create({'name': 'Renewal', 'notes': 'Call back in May'})
+
+    opportunity = Opportunity.find_all(defer_text=True)[0]
+    assert opportunity.name == 'Renewal'
+    with pytest.raises(DetachedInstanceError):
+        opportunity.notes
+
+
+@pytest.fixture
+def opportunities(db):
+    for name, amount, stage, assigned_to in [('Acme renewal', 500, 'won', 1), ('Globex pilot', 1200, 'proposal', None),
+                                             ('ACME expansion', 800, 'proposal', 2), ('Initech', 300, 'lost', None)]:
+        Opportunity.create({'name': name, 'amount': amount, 'stage': stage, 'assigned_to': assigned_to})
+
+
+def names(records):
+    return [record.name for record in records]
+
+
+def test_find_by_lookup_operators(opportunities):
+    assert names(Opportunity.find_by(amount__gte=800, order_by='name')) == ['ACME expansion', 'Globex pilot']
+    assert names(Opportunity.find_by(amount__lt=500)) == ['Initech']
+    assert names(Opportunity.find_by(stage__in=['won', 'lost'], order_by='amount')) == ['Initech', 'Acme renewal']
+    assert names(Opportunity.find_by(stage__not_in=['proposal'], stage__ne='lost')) == ['Acme renewal']
+    assert names(Opportunity.find_by(name__icontains='acme', order_by='amount')) == ['Acme renewal', 'ACME expansion']
+    assert names(Opportunity.find_by(name__startswith='Glo')) == ['Globex pilot']
+    assert names(Opportunity.find_by(assigned_to__isnull=True, order_by='name')) == ['Globex pilot', 'Initech']
+    assert names(Opportunity.find_by(assigned_to=None, stage='lost')) == ['Initech']
+
+    with pytest.raises(ValueError, match="Unsupported lookup 'between'"):
+        Opportunity.find_by(amount__between=(1, 2))
+
+
+def test_find_by_orders_and_pages_in_sql(opportunities):
+    assert names(Opportunity.find_by(order_by='-amount', limit=2)) == ['Globex pilot', 'ACME expansion']
+    assert names(Opportunity.find_by(order_by='-amount', limit=2, offset=2)) == ['Acme renewal', 'Initech']
+    assert names(Opportunity.find_by(order_by=['stage', '-amount'])) == \
+        ['Initech', 'Globex pilot', 'ACME expansion', 'Acme renewal']
+
+
+def test_update_and_delete_where_write_matching_rows(opportunities):
+    assert Opportunity.find_by(stage='proposal', order_by='name')[0].assigned_to == 2
+
+    assert Opportunity.update_where({'stage': 'proposal'}, {'assigned_to': 7}) == 2
+    assert [o.assigned_to for o in Opportunity.find_by(stage='proposal', order_by='name')] == [7, 7]
+
+    assert Opportunity.delete_where({'amount__lt': 600}) == 2
+    assert names(Opportunity.find_all()) == ['Globex pilot', 'ACME expansion']
+
+
+def test_update_and_delete_where_reject_unknown_columns(opportunities):
+    with pytest.raises(ValueError, match='has no column'):
+        Opportunity.update_where({'stage': 'won'}, {'assignee': 7})
+    # A misspelt criteria field would otherwise match every row
+    with pytest.raises(ValueError, match='stag'):
+        Opportunity.update_where({'stag': 'won'}, {'assigned_to': 7})
+    with pytest.raises(ValueError, match='stag'):
+        Opportunity.delete_where({'stag__in': ['won']})
+
+    assert len(Opportunity.find_all()) == 4
+    assert Opportunity.find_by(assigned_to=7) == []
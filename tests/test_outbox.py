@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from mindzen_erp.core.event_bus import EventBus
+from mindzen_erp.core.outbox import OutboxEvent, OutboxRelay
+
+
+def relay_with_log():
+    bus = EventBus()
+    received = []
+    bus.subscribe('crm.lead.*', lambda data: received.append(data))
+    return OutboxRelay(bus, batch_size=2), received
+
+
+def test_relay_skips_live_claims_and_takes_over_expired_ones(db):
+    relay, received = relay_with_log()
+    first = relay.publish('crm.lead.converted', {'lead_id': 1})
+    held = relay.publish('crm.lead.converted', {'lead_id': 2})
+    abandoned = relay.publish('crm.lead.converted', {'lead_id': 3})
+    OutboxEvent.update_where({'id': held}, {'claimed_by': 'other', 'claimed_until': datetime.now() + timedelta(hours=1)})
+    OutboxEvent.update_where({'id': abandoned}, {'claimed_by': 'dead', 'claimed_until': datetime.now() - timedelta(seconds=1)})
+
+    assert relay.run_pending() == 2
+    assert [(data['lead_id'], data['_outbox_id']) for data in received] == [(1, first), (3, abandoned)]
+    assert OutboxEvent.find_by_id(held).dispatched_at is None
+    assert OutboxEvent.find_by_id(abandoned).claimed_by == relay.relay_id
+    assert relay.stats()['pending'] == 1
+
+
+def test_stop_dispatches_events_of_a_relay_never_started(db):
+    relay, received = relay_with_log()
+    relay.publish('crm.lead.converted', {'lead_id': 7})
+
+    relay.stop()
+
+    assert [data['lead_id'] for data in received] == [7]
+    assert relay.stats()['pending'] == 0
+
+
+def test_replay_publishes_dispatched_events_again_in_offset_order(db):
+    relay, received = relay_with_log()
+    offsets = [relay.publish(topic, {'n': n}) for n, topic in
+               enumerate(['crm.lead.converted', 'crm.lead.lost', 'crm.lead.converted', 'crm.lead.converted'])]
+    relay.run_pending()
+    received.clear()
+
+    assert relay.replay(offsets[1]) == 3
+    assert [data['n'] for data in received] == [1, 2, 3]
+
+    replayed = []
+    assert relay.replay(offsets[0], offsets[2], topic='crm.lead.converted',
+                        callback=lambda topic, data: replayed.append(data['n'])) == 2
+    assert replayed == [0, 2]
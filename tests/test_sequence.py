@@ -0,0 +1,64 @@
+import threading
+from datetime import date
+
+import pytest
+
+from mindzen_erp.core.admin_models import FinancialYear
+from mindzen_erp.core.orm import Database
+from mindzen_erp.core.sequence import DocumentSequence, SequenceService
+
+
+@pytest.fixture
+def sequences(db, monkeypatch):
+    service = SequenceService()
+    service.reset()
+    monkeypatch.setattr(service, 'block_size', 5)
+    monkeypatch.setattr(service, '_block_sizes', {})
+    yield service
+    service.reset()
+
+
+def counter(prefix: str, fiscal_year: str) -> int:
+    return DocumentSequence.find_by(prefix=prefix, fiscal_year=fiscal_year)[0].next_value
+
+
+def test_numbers_come_from_one_preallocated_block(sequences):
+    numbers = [sequences.next_number('INV', date(2026, 5, 1)) for _ in range(3)]
+
+    assert numbers == ['INV-2026-00001', 'INV-2026-00002', 'INV-2026-00003']
+    # One reservation of five numbers
+    assert counter('INV', '2026') == 6
+
+    # Another worker reserves the next block; this one resumes after it once its own runs out
+    with Database().get_session() as session:
+        assert sequences._reserve(session, 'INV', '2026', 5) == 6
+    assert [sequences.next_value('INV', '2026') for _ in range(3)] == [4, 5, 11]
+
+
+def test_series_rolls_over_with_the_fiscal_year(sequences):
+    FinancialYear.create({'name': 'FY 2025-26', 'start_date': date(2025, 4, 1), 'end_date': date(2026, 3, 31)})
+
+    assert sequences.next_number('SINV', date(2025, 4, 1)) == 'SINV-2025-00001'
+    assert sequences.next_number('SINV', date(2026, 3, 31)) == 'SINV-2025-00002'
+    # No fiscal year defined past March 2026: the calendar year labels the series
+    assert sequences.next_number('SINV', date(2026, 4, 1)) == 'SINV-2026-00001'
+    assert sequences.next_number('SINV', date(2026, 3, 1), padding=3) == 'SINV-2025-003'
+
+
+def test_concurrent_callers_get_distinct_dense_numbers(sequences):
+    issued = []
+    lock = threading.Lock()
+
+    def issue():
+        values = [sequences.next_value('QT', '2026') for _ in range(25)]
+        with lock:
+            issued.extend(values)
+
+    threads = [threading.Thread(target=issue) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(issued) == list(range(1, 201))
+    assert counter('QT', '2026') == 201
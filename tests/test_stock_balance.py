@@ -0,0 +1,56 @@
+from datetime import datetime
+from decimal import Decimal
+
+from mindzen_erp.modules.inventory.models import StockBalance, StockLedger
+
+
+def entry(product_id: int, qty: int, value: int, batch_no=None, warehouse_id: int = 1) -> dict:
+    return {
+        'product_id': product_id, 'warehouse_id': warehouse_id, 'batch_no': batch_no,
+        'posting_date': datetime(2026, 1, 1), 'qty': qty, 'stock_value_difference': value,
+        'voucher_type': 'Stock Entry', 'voucher_no': 'STE-1'
+    }
+
+
+def ledger_totals():
+    totals = {}
+    for row in StockLedger.find_values(['product_id', 'warehouse_id', 'batch_no', 'qty', 'stock_value_difference']):
+        key = StockBalance.bin_key(row._asdict())
+        qty, value = totals.get(key, (0, 0))
+        totals[key] = (qty + row.qty, value + row.stock_value_difference)
+    return totals
+
+
+def bins():
+    return {(row.product_id, row.warehouse_id, row.batch_no): (row.actual_qty, row.stock_value)
+            for row in StockBalance.find_values(['product_id', 'warehouse_id', 'batch_no', 'actual_qty', 'stock_value'])}
+
+
+def test_posting_keeps_bins_equal_to_ledger_totals(db):
+    StockLedger.post([entry(1, 10, 1000), entry(1, 5, 550, batch_no='B1'), entry(2, 3, 90, warehouse_id=2)])
+    StockLedger.post([entry(1, -4, -400), entry(1, 2, 220, batch_no='B1'), entry(1, -1, -100)])
+
+    assert bins() == ledger_totals()
+    assert bins()[(1, 1, '')] == (Decimal('5'), Decimal('500'))
+    # Each ledger row carries its bin's quantity after it
+    assert [row.qty_after_transaction for row in StockLedger.find_values(['id', 'qty_after_transaction'])] == \
+        [10, 5, 3, 6, 7, 5]
+
+
+def test_apply_returns_added_and_resulting_bin_quantities(db):
+    StockBalance.apply([entry(1, 10, 1000)])
+
+    deltas = StockBalance.apply([entry(1, -3, -300), entry(1, -2, -200), entry(2, 4, 40)])
+
+    assert deltas == {(1, 1, ''): (Decimal('-5'), Decimal('5')), (2, 1, ''): (Decimal('4'), Decimal('4'))}
+    assert bins() == {(1, 1, ''): (Decimal('5'), Decimal('500')), (2, 1, ''): (Decimal('4'), Decimal('40'))}
+
+
+def test_new_balance_table_is_backfilled_from_existing_ledger(db):
+    StockLedger.post([entry(1, 10, 1000), entry(1, -4, -400), entry(1, 5, 550, batch_no='B1')])
+    StockBalance.__table__.drop(db.engine)
+
+    db.create_tables()
+
+    assert bins() == ledger_totals() == {(1, 1, ''): (Decimal('6'), Decimal('600')),
+                                         (1, 1, 'B1'): (Decimal('5'), Decimal('550'))}
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from mindzen_erp.modules.inventory.controllers.reposting import StockRepostWorker
+from mindzen_erp.modules.inventory.controllers.valuation import StockValuationEngine
+from mindzen_erp.modules.inventory.models import (
+    StockLedger, StockRepostRequest, StockValuationCheckpoint, StockValuationSnapshot
+)
+
+
+def receipt(day: int, qty: int, rate: int) -> dict:
+    return {
+        'product_id': 1, 'warehouse_id': 1, 'posting_date': datetime(2026, 1, day),
+        'qty': qty, 'incoming_rate': rate, 'voucher_type': 'Stock Entry', 'voucher_no': f'STE-{day}'
+    }
+
+
+def ledger_values():
+    return [(row.id, row.qty_after_transaction, row.valuation_rate, row.stock_value)
+            for row in StockLedger.find_values(['id', 'qty_after_transaction', 'valuation_rate', 'stock_value'])]
+
+
+def test_repost_resumes_from_last_snapshot_before_its_date(db, monkeypatch):
+    StockLedger.post([receipt(day, 10, 100 + day) for day in range(1, 9)])
+    StockValuationEngine(batch_size=2).run()
+
+    StockLedger.post([{**receipt(5, -15, 0), 'posting_date': datetime(2026, 1, 5, 12)}])
+    worker = StockRepostWorker(batch_size=2)
+    start_positions = []
+    batch_query = worker.valuation._batch_query
+
+    def record_batch_query(product_id, warehouse_id, position):
+        if not start_positions:
+            start_positions.append(position)
+        return batch_query(product_id, warehouse_id, position)
+
+    monkeypatch.setattr(worker.valuation, '_batch_query', record_batch_query)
+    assert worker.run_pending() == 1
+    # Entries up to 4 Jan were neither read nor rewritten
+    assert start_positions[0][0] == datetime(2026, 1, 4)
+    reposted = ledger_values()
+
+    # The same as valuing the whole ledger from scratch
+    StockValuationCheckpoint.delete_where({})
+    StockValuationSnapshot.delete_where({})
+    StockValuationEngine(batch_size=2).run()
+    assert ledger_values() == reposted
+
+
+def test_worker_requeues_only_expired_claims(db):
+    now = datetime.now()
+    live = StockRepostRequest.create({
+        'product_id': 1, 'warehouse_id': 1, 'from_date': datetime(2026, 1, 1),
+        'status': StockRepostRequest.RUNNING, 'claimed_by': 'other-worker', 'claimed_until': now + timedelta(hours=1)
+    })
+    expired = StockRepostRequest.create({
+        'product_id': 2, 'warehouse_id': 1, 'from_date': datetime(2026, 1, 1),
+        'status': StockRepostRequest.RUNNING, 'claimed_by': 'dead-worker', 'claimed_until': now - timedelta(seconds=1)
+    })
+
+    worker = StockRepostWorker()
+    assert worker.run_pending() == 1
+
+    assert StockRepostRequest.find_by_id(live.id).status == StockRepostRequest.RUNNING
+    assert StockRepostRequest.find_by_id(live.id).claimed_by == 'other-worker'
+    assert StockRepostRequest.find_by_id(expired.id).status == StockRepostRequest.COMPLETED
+    assert StockRepostRequest.find_by_id(expired.id).claimed_by == worker.worker_id
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from mindzen_erp.modules.inventory.controllers.valuation import StockValuationEngine
+from mindzen_erp.modules.inventory.models import StockBalance, StockLedger
+
+# (day, qty, incoming rate); day 4 issues below zero, day 5 settles it
+LEDGER = [(1, 10, 100), (2, 10, 130), (3, -15, 0), (4, -10, 0), (5, 20, 120), (6, -5, 0)]
+
+# (qty after, valuation rate, stock value, value difference) per entry, worked out by hand
+EXPECTED = {
+    'moving_average': [
+        (10, 100, 1000, 1000), (20, 115, 2300, 1300), (5, 115, 575, -1725),
+        (-5, 115, -575, -1150), (15, 120, 1800, 2375), (10, 120, 1200, -600),
+    ],
+    # Day 3 consumes the 100 layer and half the 130 layer; the shortfall is valued at 130
+    'fifo': [
+        (10, 100, 1000, 1000), (20, 115, 2300, 1300), (5, 130, 650, -1650),
+        (-5, 130, -650, -1300), (15, 120, 1800, 2450), (10, 120, 1200, -600),
+    ],
+}
+
+
+def post(entries):
+    StockLedger.post([{
+        'product_id': 1, 'warehouse_id': 1, 'posting_date': datetime(2026, 1, day),
+        'qty': qty, 'incoming_rate': rate, 'voucher_type': 'Stock Entry', 'voucher_no': f'STE-{day}'
+    } for day, qty, rate in entries])
+
+
+def valued_ledger():
+    return [(row.qty_after_transaction, row.valuation_rate, row.stock_value, row.stock_value_difference)
+            for row in StockLedger.find_values(
+                ['id', 'qty_after_transaction', 'valuation_rate', 'stock_value', 'stock_value_difference'])]
+
+
+@pytest.mark.parametrize('method', ['moving_average', 'fifo'])
+def test_streamed_valuation_matches_hand_computed_ledger(db, method):
+    post(LEDGER)
+
+    assert StockValuationEngine(method, batch_size=2).run() == {'pairs': 1, 'entries': 6}
+
+    assert valued_ledger() == EXPECTED[method]
+    assert StockBalance.find_values(['stock_value'])[0].stock_value == 1200
+
+
+@pytest.mark.parametrize('method', ['moving_average', 'fifo'])
+def test_run_resumes_from_checkpoint(db, method):
+    post(LEDGER[:3])
+    assert StockValuationEngine(method, batch_size=2).run()['entries'] == 3
+
+    post(LEDGER[3:])
+    engine = StockValuationEngine(method, batch_size=2)
+    assert engine.pending_pairs() == [(1, 1)]
+    assert engine.run()['entries'] == 3
+
+    assert valued_ledger() == EXPECTED[method]
+    assert engine.run() == {'pairs': 0, 'entries': 0}
@@ -0,0 +1,14 @@
+import pytest
+
+ADMIN_ENDPOINTS = ['/admin/cache/stats', '/admin/pool/stats', '/admin/outbox/stats', '/admin/events/instrumentation',
+                   '/admin/events/instrumentation/slowest', '/admin/modules/import-times']
+
+
+@pytest.mark.parametrize('path', ADMIN_ENDPOINTS)
+def test_admin_endpoints_require_signed_in_administrator(client, path):
+    client.cookies.clear()
+    assert client.get(path).status_code == 401
+
+    client.post('/login', data={'username': 'admin', 'password': 'admin'}, follow_redirects=False)
+    assert client.get(path).status_code == 200
+    client.cookies.clear()